@@ -0,0 +1,177 @@
+import os
+import copy
+import json
+import threading
+import itertools
+import streamlit as st
+import azure.cognitiveservices.speech as speechsdk
+from settings import as_flag
+from segment_merge import merge_segment_results
+from assessment_core import ASSESSMENT_SAMPLE_RATE, AssessmentService, CachedAssessmentService, WarmPool, iter_chunks
+
+
+def make_pronunciation_config(reference_text):
+    pronunciation_config = speechsdk.PronunciationAssessmentConfig(
+        reference_text=reference_text,
+        grading_system=speechsdk.PronunciationAssessmentGradingSystem.HundredMark,
+        granularity=speechsdk.PronunciationAssessmentGranularity.Phoneme,
+        enable_miscue=True,
+    )
+    pronunciation_config.enable_prosody_assessment()
+    pronunciation_config.phoneme_alphabet = "IPA"
+    return pronunciation_config
+
+
+class AzureAssessmentService(AssessmentService):
+    """
+    Azure pronunciation assessment with a pool of pre-connected recognizers.
+
+    Each slot holds a recognizer reading from a push stream whose connection is
+    opened ahead of time, so an attempt does not pay for connection setup and auth.
+    A recognizer serves a single stream, so a fresh slot is prepared in the
+    background as soon as a lease is returned (see WarmPool).
+    """
+
+    def __init__(self, speech_key, service_region, pool_size=4, continuous=True, timeout=120):
+        # continuous recognition keeps listening past pauses, so multi-sentence
+        # lesson texts are not cut off after the first sentence
+        self.continuous = continuous
+        self.timeout = timeout
+        self.config_signature = f"azure|HundredMark|Phoneme|miscue|prosody|IPA|continuous={continuous}"
+        self.speech_config = speechsdk.SpeechConfig(subscription=speech_key, region=service_region)
+        self.stream_format = speechsdk.audio.AudioStreamFormat(
+            samples_per_second=ASSESSMENT_SAMPLE_RATE, bits_per_sample=16, channels=1
+        )
+        self._pool = WarmPool(self._new_slot, pool_size, discard=self._close_slot)
+
+    def _new_slot(self):
+        stream = speechsdk.audio.PushAudioInputStream(stream_format=self.stream_format)
+        audio_config = speechsdk.audio.AudioConfig(stream=stream)
+        recognizer = speechsdk.SpeechRecognizer(speech_config=self.speech_config, audio_config=audio_config)
+        connection = speechsdk.Connection.from_recognizer(recognizer)
+        try:
+            connection.open(self.continuous)
+        except Exception as e:
+            # the recognizer connects by itself on first use, warming up is best effort
+            print(f"Failed to pre-open the speech connection: {e}")
+        return recognizer, stream, connection
+
+    @staticmethod
+    def _close_slot(slot):
+        _, _, connection = slot
+        connection.close()
+
+    def lease(self):
+        return self._pool.lease()
+
+    @staticmethod
+    def _parse(result):
+        if result.reason == speechsdk.ResultReason.Canceled:
+            details = result.cancellation_details
+            raise RuntimeError(f"Speech recognition canceled: {details.reason} {details.error_details}")
+        return json.loads(result.properties.get(speechsdk.PropertyId.SpeechServiceResponse_JsonResult))
+
+    def _recognize_continuous(self, recognizer, stream, pcm):
+        segments, errors = [], []
+        done = threading.Event()
+
+        def on_recognized(evt):
+            if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech:
+                segments.append(json.loads(
+                    evt.result.properties.get(speechsdk.PropertyId.SpeechServiceResponse_JsonResult)
+                ))
+
+        def on_canceled(evt):
+            details = evt.cancellation_details
+            if details.reason == speechsdk.CancellationReason.Error:
+                errors.append(details.error_details)
+            done.set()
+
+        recognizer.recognized.connect(on_recognized)
+        recognizer.canceled.connect(on_canceled)
+        recognizer.session_stopped.connect(lambda evt: done.set())
+
+        recognizer.start_continuous_recognition_async().get()
+        for chunk in iter_chunks(pcm):
+            stream.write(chunk)
+        stream.close()
+        finished = done.wait(self.timeout)
+        recognizer.stop_continuous_recognition_async().get()
+
+        # the segments received so far would be merged as if the recording ended there
+        if errors:
+            raise RuntimeError(f"Speech recognition canceled after {len(segments)} segment(s): {errors[0]}")
+        if not finished:
+            raise TimeoutError(f"Speech recognition did not finish within {self.timeout}s "
+                               f"({len(segments)} segment(s) received)")
+        return segments
+
+    def assess_pcm(self, pcm, reference_text):
+        with self.lease() as (recognizer, stream, _):
+            make_pronunciation_config(reference_text).apply_to(recognizer)
+            if self.continuous:
+                segments = self._recognize_continuous(recognizer, stream, pcm)
+                return merge_segment_results(segments, reference_text)
+            # recognition starts first, so the upload begins with the first chunk
+            future = recognizer.recognize_once_async()
+            for chunk in iter_chunks(pcm):
+                stream.write(chunk)
+            stream.close()
+            return self._parse(future.get())
+
+
+class ReplayAssessmentService(AssessmentService):
+    """
+    Local stand-in that replays recorded Azure JSON results (e.g. a practice_history
+    folder) in a fixed order, for testing the learning page without the network.
+    """
+
+    config_signature = "replay"
+
+    def __init__(self, results_dir):
+        paths = []
+        for root, _, files in os.walk(results_dir):
+            paths += [os.path.join(root, f) for f in files if f.endswith(".json")]
+        results = []
+        for path in sorted(paths):
+            with open(path, "r", encoding="utf-8") as f:
+                result = json.load(f)
+            if isinstance(result, dict) and result.get("NBest"):
+                results.append(result)
+        if not results:
+            raise ValueError(f"No recorded assessment results found in {results_dir}")
+        self._results = itertools.cycle(results)
+        self._lock = threading.Lock()
+
+    def assess(self, audio_file, reference_text):
+        with self._lock:
+            result = next(self._results)
+        return copy.deepcopy(result)
+
+    def assess_pcm(self, pcm, reference_text):
+        return self.assess(None, reference_text)
+
+
+@st.cache_resource
+def get_assessment_service():
+    """One service per server process, shared by every Streamlit session."""
+    settings = st.secrets.get("Assessment", {})
+    backend = settings.get("BACKEND", "azure")
+    if backend == "replay":
+        service = ReplayAssessmentService(settings["REPLAY_DIR"])
+    elif backend == "local":
+        from local_assessment import LocalAssessmentService
+        service = LocalAssessmentService()
+    else:
+        # Be Aware!!! We are using free keys here but nonfree keys in Avatar
+        service = AzureAssessmentService(
+            st.secrets["Azure_Speech"]["SPEECH_KEY"],
+            st.secrets["Azure_Speech"]["SPEECH_REGION"],
+            pool_size=int(settings.get("POOL_SIZE", 4)),
+            continuous=as_flag(settings.get("CONTINUOUS"), default=True),
+        )
+    return CachedAssessmentService(
+        service,
+        ttl=float(settings.get("CACHE_TTL", 3600)),
+        max_entries=int(settings.get("CACHE_SIZE", 256)),
+    )
@@ -0,0 +1,195 @@
+import abc
+import copy
+import time
+import queue
+import hashlib
+import threading
+import collections
+import contextlib
+import numpy as np
+from openvoice.audio import load_audio
+
+# Everything here is free of the Speech SDK and Streamlit, so offline backends
+# (local_assessment) and tests can import it on machines without them.
+
+# Azure recommends 16 kHz / 16 bit / mono for pronunciation assessment
+ASSESSMENT_SAMPLE_RATE = 16000
+
+
+def to_pcm16(audio_file, sample_rate=ASSESSMENT_SAMPLE_RATE):
+    """
+    Decode a wav path or an in-memory buffer (e.g. from st.audio_input) to mono
+    16 bit little-endian PCM bytes, without going through the disk.
+    """
+    if hasattr(audio_file, "seek"):
+        audio_file.seek(0)
+    samples, _ = load_audio(audio_file, sr=sample_rate)
+    return (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+
+def iter_chunks(data, chunk_size=32000):
+    # about one second of 16 kHz PCM16 per write
+    for i in range(0, len(data), chunk_size):
+        yield data[i: i + chunk_size]
+
+
+class AssessmentService(abc.ABC):
+    """
+    Interface of everything that can stand behind pronunciation_assessment.
+
+    assess() returns the parsed Azure JSON result (NBest[0].PronunciationAssessment,
+    Words, Phonemes, Offset, Duration) for the recording and the reference text.
+    """
+
+    # identifies the assessment settings, part of the result cache key
+    config_signature = ""
+
+    def assess(self, audio_file, reference_text):
+        return self.assess_pcm(to_pcm16(audio_file), reference_text)
+
+    @abc.abstractmethod
+    def assess_pcm(self, pcm, reference_text):
+        """Assess 16 kHz mono PCM16 bytes (see to_pcm16)."""
+
+
+class WarmPool:
+    """
+    Pool of single-use resources prepared ahead of time (e.g. connected recognizers).
+
+    lease() hands out a prepared item and, once it is returned, discards it and
+    builds a replacement in the background. A failing factory (network, quota or
+    auth trouble) is retried with exponential backoff instead of losing the slot.
+    When nothing is ready within wait_seconds, lease() builds an item on the spot,
+    so a drained pool slows attempts down but never blocks them forever.
+    """
+
+    def __init__(self, factory, size, discard=None, wait_seconds=2.0, retry_delay=1.0, max_retry_delay=60.0):
+        self.factory = factory
+        self.discard = discard
+        self.wait_seconds = wait_seconds
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._items = queue.Queue()
+        self._closed = threading.Event()
+        for _ in range(size):
+            try:
+                self._items.put(factory())
+            except Exception as e:
+                print(f"Failed to prepare a pooled item: {e}")
+                self._refill_async()
+
+    def _refill_async(self):
+        threading.Thread(target=self._refill, name="warm-pool-refill", daemon=True).start()
+
+    def _refill(self):
+        delay = self.retry_delay
+        while not self._closed.is_set():
+            try:
+                self._items.put(self.factory())
+                return
+            except Exception as e:
+                print(f"Failed to prepare a pooled item, retrying in {delay:.1f}s: {e}")
+            self._closed.wait(delay)
+            delay = min(delay * 2, self.max_retry_delay)
+
+    def _discard(self, item):
+        if self.discard is None:
+            return
+        try:
+            self.discard(item)
+        except Exception:
+            pass
+
+    @property
+    def ready(self):
+        return self._items.qsize()
+
+    @contextlib.contextmanager
+    def lease(self):
+        try:
+            item, pooled = self._items.get(timeout=self.wait_seconds), True
+        except queue.Empty:
+            # every item is in use or still being rebuilt; errors reach the caller
+            item, pooled = self.factory(), False
+        try:
+            yield item
+        finally:
+            self._discard(item)
+            if pooled:
+                self._refill_async()
+
+    def close(self):
+        self._closed.set()
+        while True:
+            try:
+                self._discard(self._items.get_nowait())
+            except queue.Empty:
+                return
+
+
+class CachedAssessmentService(AssessmentService):
+    """
+    Content-addressed result cache in front of another service.
+
+    The key is a hash of the user, the PCM, the reference text and the service's
+    assessment settings, so a user resubmitting the same recording (double clicks,
+    reruns) gets the stored result instead of calling Azure again, while the same
+    audio from another user is assessed as that user's own attempt. Entries expire
+    after ttl seconds and at most max_entries are kept (least recently used are
+    dropped first); results are deep-copied in and out, so callers may mutate them.
+    """
+
+    def __init__(self, service, ttl=3600, max_entries=256):
+        self.service = service
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.config_signature = service.config_signature
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, pcm, reference_text, user_key=""):
+        h = hashlib.sha256(pcm)
+        for part in (reference_text, self.config_signature, user_key):
+            h.update(b"\0" + part.encode("utf-8"))
+        return h.hexdigest()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, result = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return copy.deepcopy(result)
+
+    def _put(self, key, result):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), copy.deepcopy(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def assess_cached(self, audio_file, reference_text, user_key=""):
+        """Return (result, from_cache); user_key scopes the cache entry to one user."""
+        pcm = to_pcm16(audio_file)
+        key = self.key(pcm, reference_text, user_key)
+        result = self._get(key)
+        if result is not None:
+            return result, True
+        result = self.service.assess_pcm(pcm, reference_text)
+        self._put(key, result)
+        return result, False
+
+    def assess(self, audio_file, reference_text):
+        return self.assess_cached(audio_file, reference_text)[0]
+
+    def assess_pcm(self, pcm, reference_text):
+        key = self.key(pcm, reference_text)
+        result = self._get(key)
+        if result is None:
+            result = self.service.assess_pcm(pcm, reference_text)
+            self._put(key, result)
+        return result
@@ -0,0 +1,86 @@
+import uuid
+import threading
+import traceback
+import streamlit as st
+from concurrent.futures import ThreadPoolExecutor
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class AssessmentJob:
+    """
+    Handle of a background assessment, kept in st.session_state between reruns.
+
+    The worker updates status/stage while the script thread polls them and may set
+    partial to whatever can already be shown before the result is complete; meta
+    holds whatever the page needs to apply the result once it is done.
+    """
+
+    def __init__(self, meta=None):
+        self.job_id = uuid.uuid4().hex
+        self.status = "queued"
+        self.stage = "順番を待っています..."
+        self.partial = None
+        self.result = None
+        self.error = None
+        self.traceback = None
+        self.meta = meta or {}
+        self._finished = threading.Event()
+
+    @property
+    def done(self):
+        return self._finished.is_set()
+
+    def wait(self, timeout=None):
+        return self._finished.wait(timeout)
+
+
+class AssessmentJobQueue:
+    """
+    Bounded pool of workers shared by all sessions of one server process.
+
+    At most max_workers jobs run at once and at most max_pending are accepted
+    (running or waiting); submit() raises JobQueueFull beyond that so a burst of
+    submissions cannot pile up unbounded work.
+    """
+
+    def __init__(self, max_workers=4, max_pending=32):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="assessment")
+        self._pending = threading.BoundedSemaphore(max_pending)
+
+    def submit(self, fn, *args, meta=None, **kwargs):
+        """Run fn(job, *args, **kwargs) in the background and return the job handle."""
+        if not self._pending.acquire(blocking=False):
+            raise JobQueueFull()
+        job = AssessmentJob(meta)
+
+        def run():
+            job.status = "running"
+            try:
+                job.result = fn(job, *args, **kwargs)
+                job.status = "done"
+            except Exception as e:
+                job.error = e
+                job.traceback = traceback.format_exc()
+                job.status = "failed"
+            finally:
+                self._pending.release()
+                job._finished.set()
+
+        try:
+            self._executor.submit(run)
+        except Exception:
+            self._pending.release()
+            raise
+        return job
+
+
+@st.cache_resource
+def get_job_queue():
+    settings = st.secrets.get("Assessment", {})
+    return AssessmentJobQueue(
+        max_workers=int(settings.get("JOB_WORKERS", 4)),
+        max_pending=int(settings.get("JOB_QUEUE_SIZE", 32)),
+    )
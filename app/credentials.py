@@ -0,0 +1,65 @@
+import os
+import hmac
+import hashlib
+import threading
+import bcrypt
+import streamlit as st
+from concurrent.futures import ThreadPoolExecutor
+
+
+class CredentialsBusy(Exception):
+    pass
+
+
+class CredentialService:
+    """
+    bcrypt hashing and verification on a small bounded pool.
+
+    At most max_workers hashes run at once (bcrypt releases the GIL, so threads
+    are enough) and at most max_pending requests wait for them; beyond that
+    callers wait up to wait_timeout seconds and then get CredentialsBusy, so a
+    burst of logins queues up instead of pinning every core.
+    """
+
+    def __init__(self, max_workers=2, max_pending=32, rounds=12, wait_timeout=30):
+        self.rounds = rounds
+        self.wait_timeout = wait_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._pending = threading.BoundedSemaphore(max_pending)
+        # signs session tokens, only valid for the lifetime of this process
+        self._token_key = os.urandom(32)
+
+    def _run(self, fn, *args):
+        if not self._pending.acquire(timeout=self.wait_timeout):
+            raise CredentialsBusy()
+        try:
+            return self._executor.submit(fn, *args).result()
+        finally:
+            self._pending.release()
+
+    def hash_password(self, password):
+        return self._run(lambda: bcrypt.hashpw(password.encode(), bcrypt.gensalt(self.rounds)).decode())
+
+    def check_password(self, hashed_password, password):
+        return self._run(lambda: bcrypt.checkpw(password.encode(), hashed_password.encode()))
+
+    def session_token(self, name, password, hashed_password):
+        """Cheap proof that this name/password pair was already verified against hashed_password."""
+        message = "\0".join([name, password, hashed_password]).encode()
+        return hmac.new(self._token_key, message, hashlib.sha256).hexdigest()
+
+    def check_session_token(self, token, name, password, hashed_password):
+        """Constant-time comparison of a stored token (None if there is none) with the expected one."""
+        if not token:
+            return False
+        return hmac.compare_digest(token, self.session_token(name, password, hashed_password))
+
+
+@st.cache_resource
+def get_credential_service():
+    settings = st.secrets.get("Auth", {})
+    return CredentialService(
+        max_workers=int(settings.get("BCRYPT_WORKERS", 2)),
+        max_pending=int(settings.get("BCRYPT_QUEUE_SIZE", 32)),
+        rounds=int(settings.get("BCRYPT_ROUNDS", 12)),
+    )
@@ -1,17 +1,155 @@
 import os
+import re
+import json
+import hashlib
+import soundfile as sf
+
+
+def natural_key(name:str):
+    # "2" < "10", so lessons keep their numbering order
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", name)]
+
+
+class LessonCatalog:
+    """
+    Manifest of the lessons of one learning folder.
+
+    A lesson is identified by the stem of its text file and paired with the video
+    and reference audio of the same stem (<id>.mp4, <id>_stranger.wav), so the
+    pairing no longer depends on filesystem order. Files are tracked by their path
+    relative to the folder; when a name exists in several subfolders the copy next
+    to the text wins and the duplicate is reported. Videos that match no lesson
+    (folders made before videos were named after their lesson) are paired with the
+    lessons still missing one, in natural order. The manifest (id, paths relative
+    to the folder, text hash, reference audio duration) is persisted outside the
+    folder and only rebuilt when the mtime of one of the folder's directories changes.
+    """
+    version = 2
+
+    def __init__(self, path:str, manifest_path:str) -> None:
+        self.path = path
+        self.manifest_path = manifest_path
+        self.lessons = []
+        self._by_id = {}
+
+    def _dir_mtimes(self, dirs):
+        mtimes = {}
+        for rel_dir in dirs:
+            try:
+                mtimes[rel_dir] = os.stat(os.path.join(self.path, rel_dir)).st_mtime_ns
+            except FileNotFoundError:
+                mtimes[rel_dir] = None
+        return mtimes
+
+    def _is_fresh(self, manifest):
+        return (manifest.get("version") == self.version
+                and manifest.get("dirs") == self._dir_mtimes(manifest.get("dirs", {})))
+
+    def _find(self, by_name, name, folder):
+        """Relative path of the file called name, preferring the one in folder."""
+        paths = by_name.get(name, [])
+        same_folder = [path for path in paths if os.path.dirname(path) == folder]
+        if not same_folder and len(paths) > 1:
+            print(f"Lesson catalog {self.path}: {name} found {len(paths)} times, using {paths[0]}")
+        return (same_folder or paths or [None])[0]
+
+    def _build(self):
+        dirs, by_name = [], {}
+        for root, _, file_names in os.walk(self.path):
+            dirs.append(os.path.relpath(root, self.path))
+            for f in file_names:
+                by_name.setdefault(f, []).append(os.path.relpath(os.path.join(root, f), self.path))
+        for paths in by_name.values():
+            paths.sort(key=natural_key)
+
+        texts = sorted((path for f, paths in by_name.items() if f.endswith(".txt") for path in paths),
+                       key=lambda path: natural_key(os.path.basename(path)) + natural_key(path))
+        lessons = []
+        for text in texts:
+            name = os.path.basename(text)
+            lesson_id = os.path.splitext(name)[0]
+            folder = os.path.dirname(text)
+            if len(by_name[name]) > 1:
+                # same lesson file in several folders: keep the ids apart
+                print(f"Lesson catalog {self.path}: {name} found {len(by_name[name])} times")
+                lesson_id = os.path.splitext(text)[0].replace(os.sep, "/")
+            with open(os.path.join(self.path, text), "rb") as f:
+                text_hash = hashlib.sha1(f.read()).hexdigest()
+            stem = os.path.splitext(name)[0]
+            audio = self._find(by_name, f"{stem}_stranger.wav", folder)
+            duration = None
+            if audio is not None:
+                try:
+                    duration = sf.info(os.path.join(self.path, audio)).duration
+                except RuntimeError:
+                    pass
+            lessons.append({
+                "id": lesson_id,
+                "text": text,
+                "video": self._find(by_name, f"{stem}.mp4", folder),
+                "audio": audio,
+                "text_hash": text_hash,
+                "duration": duration,
+            })
+
+        # folders made before videos were named after their lesson: pair the
+        # leftovers in order, as the lessons used to be paired
+        paired = {lesson["video"] for lesson in lessons}
+        videos = sorted((path for f, paths in by_name.items() if f.endswith(".mp4")
+                         for path in paths if path not in paired),
+                        key=lambda path: natural_key(os.path.basename(path)) + natural_key(path))
+        unpaired = [lesson for lesson in lessons if lesson["video"] is None]
+        for lesson, video in zip(unpaired, videos):
+            print(f"Lesson catalog {self.path}: no {lesson['id']}.mp4, pairing {lesson['text']} with {video} by order")
+            lesson["video"] = video
+        for lesson in unpaired[len(videos):]:
+            print(f"Lesson catalog {self.path}: no video for {lesson['text']}")
+        for video in videos[len(unpaired):]:
+            print(f"Lesson catalog {self.path}: no lesson text for {video}")
+        return {"version": self.version, "dirs": self._dir_mtimes(dirs), "lessons": lessons}
+
+    def load(self) -> "LessonCatalog":
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            manifest = None
+        if manifest is None or not self._is_fresh(manifest):
+            manifest = self._build()
+            os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+            tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=4)
+            os.replace(tmp_path, self.manifest_path)
+        self.lessons = manifest["lessons"]
+        self._by_id = {lesson["id"]: lesson for lesson in self.lessons}
+        return self
+
+    def get(self, lesson_id:str):
+        return self._by_id.get(lesson_id)
+
+    def __len__(self):
+        return len(self.lessons)
+
+    def __getitem__(self, index:int):
+        return self.lessons[index]
+
 
 class Dataset:
     """
     class Dataset is designed for loading the learning_database
     """
     root_path = "database/learning_database/"
+    # manifests are kept outside the lesson folders so writing them does not touch their mtime
+    catalog_path = root_path + ".catalog/"
     def __init__(self, user_name:str) -> None:
         # create the folder for the specific user
         self.path = self.root_path + f"{user_name}/"
+        self.catalog = LessonCatalog(self.path, self.catalog_path + f"{user_name}.json")
         # name of text and video
         self.text_data = []
         self.video_data = []
-    
+
     def build_dirs(self):
         # build text and video folder for a user
         # this method seems a little meaningless
@@ -21,14 +159,12 @@ class Dataset:
             print("Failed to build the directories!")
 
     def load_data(self):
-        for root, dirs, files in os.walk(self.path):
-            for f in files:
-                if f.endswith('.txt'):
-                    self.text_data.append(f)
-                elif f.endswith('.mp4'):
-                    self.video_data.append(f)
+        self.catalog.load()
+        # text and video of the same lesson share an index
+        self.text_data = [lesson["text"] for lesson in self.catalog]
+        self.video_data = [lesson["video"] for lesson in self.catalog]
 
 if __name__ == "__main__":
     dataset = Dataset('qi')
     dataset.load_data()
-    print(dataset.text_data, dataset.video_data)
\ No newline at end of file
+    print(dataset.text_data, dataset.video_data)
@@ -1,4 +1,3 @@
-import json
 import streamlit as st
 from time import sleep
 import base64
@@ -7,21 +6,6 @@ from user import User
 
 st.set_page_config(layout="wide", page_icon="logo/done_all.png")
 
-# Function to load user_info from a JSON file
-def load_user_info():
-    try:
-        with open("database/all_users/users_info.json", "r") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return []
-
-# Function to save user_info to a JSON file
-def save_user_info(user_info):
-    with open("database/all_users/users_info.json", "w") as f:
-        json.dump(user_info, f, indent=4)
-    
-# Load user_info as a global variable
-
 st.logo(image="logo/PhonoEcho.png", icon_image="logo/PhonoEcho.png")
 st.markdown(
     """
@@ -50,6 +34,7 @@ if "learning_data" not in st.session_state:
         'overall_score': None,
         'radar_chart': None,
         'waveform_plot': None,
+        'waveform_chart': None,
         'error_table': None,
         'syllable_table': None
     }
@@ -2,6 +2,7 @@ import streamlit as st
 from PIL import Image
 import os
 from datetime import datetime
+from media_server import media_source
 
 def save_audio_file(base_dir, audio_data, sentence_num):
     try:
@@ -68,7 +69,7 @@ sentences = [
 for i, sentence in enumerate(sentences):
     with st.form(f"sentence{i+1}"):
         st.write(sentence["text"])
-        st.audio(sentence["audio"])
+        st.audio(media_source(sentence["audio"]), format="audio/wav")
         audio_recording = st.audio_input("録音しましょう")
         submitted = st.form_submit_button("アップロードしましょう")
 
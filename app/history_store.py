@@ -0,0 +1,210 @@
+import os
+import time
+import uuid
+import atexit
+import threading
+from datetime import datetime
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Azure reports offsets and durations in 100 ns ticks
+TICKS_PER_SECOND = 10000000
+
+SCHEMAS = {
+    "utterances": pa.schema([
+        ("attempt_id", pa.string()),
+        ("recorded_at", pa.timestamp("ms")),
+        ("lesson", pa.string()),
+        ("accuracy", pa.float32()),
+        ("fluency", pa.float32()),
+        ("completeness", pa.float32()),
+        ("prosody", pa.float32()),
+        ("pron_score", pa.float32()),
+        ("duration_s", pa.float32()),
+        ("word_count", pa.int32()),
+        ("display_text", pa.string()),
+    ]),
+    "words": pa.schema([
+        ("attempt_id", pa.string()),
+        ("recorded_at", pa.timestamp("ms")),
+        ("lesson", pa.string()),
+        ("word_index", pa.int32()),
+        ("word", pa.string()),
+        ("error_type", pa.string()),
+        ("accuracy", pa.float32()),
+        ("offset_s", pa.float32()),
+        ("duration_s", pa.float32()),
+    ]),
+    "phonemes": pa.schema([
+        ("attempt_id", pa.string()),
+        ("recorded_at", pa.timestamp("ms")),
+        ("lesson", pa.string()),
+        ("word_index", pa.int32()),
+        ("phoneme_index", pa.int32()),
+        ("phoneme", pa.string()),
+        ("accuracy", pa.float32()),
+        ("offset_s", pa.float32()),
+        ("duration_s", pa.float32()),
+    ]),
+}
+
+
+def _seconds(ticks):
+    return None if ticks is None else ticks / TICKS_PER_SECOND
+
+
+def result_to_rows(attempt_id, recorded_at, lesson, pronunciation_result):
+    """Flatten one Azure result into utterance, word and phoneme rows."""
+    nbest = pronunciation_result["NBest"][0]
+    overall = nbest.get("PronunciationAssessment", {})
+    words = nbest.get("Words", [])
+    base = {"attempt_id": attempt_id, "recorded_at": recorded_at, "lesson": lesson}
+    rows = {
+        "utterances": [dict(
+            base,
+            accuracy=overall.get("AccuracyScore"),
+            fluency=overall.get("FluencyScore"),
+            completeness=overall.get("CompletenessScore"),
+            prosody=overall.get("ProsodyScore"),
+            pron_score=overall.get("PronScore"),
+            duration_s=_seconds(pronunciation_result.get("Duration")),
+            word_count=len(words),
+            display_text=pronunciation_result.get("DisplayText", nbest.get("Display")),
+        )],
+        "words": [],
+        "phonemes": [],
+    }
+    for i, word in enumerate(words):
+        assessment = word.get("PronunciationAssessment", {})
+        rows["words"].append(dict(
+            base,
+            word_index=i,
+            word=word.get("Word"),
+            error_type=assessment.get("ErrorType", "None"),
+            accuracy=assessment.get("AccuracyScore"),
+            offset_s=_seconds(word.get("Offset")),
+            duration_s=_seconds(word.get("Duration")),
+        ))
+        for j, phoneme in enumerate(word.get("Phonemes", [])):
+            rows["phonemes"].append(dict(
+                base,
+                word_index=i,
+                phoneme_index=j,
+                phoneme=phoneme.get("Phoneme"),
+                accuracy=phoneme.get("PronunciationAssessment", {}).get("AccuracyScore"),
+                offset_s=_seconds(phoneme.get("Offset")),
+                duration_s=_seconds(phoneme.get("Duration")),
+            ))
+    return rows
+
+
+class PronunciationHistoryStore:
+    """
+    Per-user append-only columnar store of pronunciation results.
+
+    Utterance-, word- and phoneme-level rows are buffered and written as Parquet
+    parts partitioned by day (<root>/<table>/date=YYYY-MM-DD/part-*.parquet), so
+    analytics read a few typed columns instead of parsing every JSON result.
+    Buffers are flushed every batch_size attempts, by the periodic flusher and at exit.
+    """
+
+    def __init__(self, root, batch_size=20):
+        self.root = root
+        self.batch_size = batch_size
+        self._buffers = {table: [] for table in SCHEMAS}
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def append(self, lesson, pronunciation_result, recorded_at=None, attempt_id=None):
+        recorded_at = recorded_at or datetime.now()
+        attempt_id = attempt_id or uuid.uuid4().hex
+        rows = result_to_rows(attempt_id, recorded_at, lesson, pronunciation_result)
+        with self._lock:
+            for table, table_rows in rows.items():
+                self._buffers[table].extend(table_rows)
+            self._pending += 1
+            if self._pending >= self.batch_size:
+                self._flush_locked()
+        return attempt_id
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        part = f"part-{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet"
+        for table, rows in self._buffers.items():
+            if not rows:
+                continue
+            by_day = {}
+            for row in rows:
+                by_day.setdefault(row["recorded_at"].date().isoformat(), []).append(row)
+            for day, day_rows in by_day.items():
+                folder = os.path.join(self.root, table, f"date={day}")
+                os.makedirs(folder, exist_ok=True)
+                pq.write_table(pa.Table.from_pylist(day_rows, schema=SCHEMAS[table]),
+                               os.path.join(folder, part), compression="zstd")
+            self._buffers[table] = []
+        self._pending = 0
+
+    def read(self, table, columns=None, start_date=None, end_date=None):
+        """
+        Read a table as a pandas DataFrame, optionally limited to a range of days
+        (inclusive, datetime.date or "YYYY-MM-DD"). Rows still buffered are included.
+        """
+        columns = columns or SCHEMAS[table].names
+        start = None if start_date is None else str(start_date)
+        end = None if end_date is None else str(end_date)
+
+        def in_range(day):
+            return (start is None or day >= start) and (end is None or day <= end)
+
+        with self._lock:
+            buffered = [row for row in self._buffers[table] if in_range(row["recorded_at"].date().isoformat())]
+        tables = [pa.Table.from_pylist(buffered, schema=SCHEMAS[table]).select(columns)]
+        path = os.path.join(self.root, table)
+        if os.path.exists(path):
+            dataset = ds.dataset(path, format="parquet", partitioning="hive", schema=SCHEMAS[table].append(
+                pa.field("date", pa.string())))
+            condition = None
+            if start is not None:
+                condition = ds.field("date") >= start
+            if end is not None:
+                condition = ds.field("date") <= end if condition is None else condition & (ds.field("date") <= end)
+            tables.insert(0, dataset.to_table(columns=columns, filter=condition))
+        return pa.concat_tables(tables).to_pandas()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+_flusher = None
+
+
+def _flush_all():
+    for store in list(_stores.values()):
+        try:
+            store.flush()
+        except Exception as e:
+            print(f"Failed to flush the history store {store.root}: {e}")
+
+
+def _flush_periodically(interval):
+    while True:
+        time.sleep(interval)
+        _flush_all()
+
+
+def get_history_store(user_path, flush_interval=60):
+    """One store per user and process, shared by all of the user's sessions."""
+    global _flusher
+    root = os.path.join(user_path, "history_store")
+    with _stores_lock:
+        if root not in _stores:
+            _stores[root] = PronunciationHistoryStore(root)
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_periodically, args=(flush_interval,),
+                                        name="history-store-flush", daemon=True)
+            _flusher.start()
+            atexit.register(_flush_all)
+        return _stores[root]
@@ -1,14 +1,15 @@
 import io
 import os
 import json
-import librosa
+import hashlib
 import time
+import threading
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
 import streamlit as st
 import soundfile as sf
-import azure.cognitiveservices.speech as speechsdk
 from audio_recorder_streamlit import audio_recorder
 from streamlit_extras.grid import grid as extras_grid
 from dataset import Dataset
@@ -22,6 +23,16 @@ import sys
 import os
 # Ensure the tools directory is in the Python path
 sys.path.append(os.path.abspath("app/tools"))	
+# the repository root, for the shared openvoice audio utilities
+sys.path.append(os.path.abspath("."))
+from openvoice.audio import load_audio
+from assessment import get_assessment_service
+from assessment_jobs import get_job_queue, JobQueueFull
+from score_log import get_score_log, empty_lesson
+from lesson_cache import read_lesson_text
+from media_server import media_source
+from result_frame import ResultFrame, as_frame
+from waveform import min_max_envelope, waveform_data
 
 # Initialize global variables for storing radar chart per attempt and error types
 plt.rcParams["font.family"] = "MS Gothic"
@@ -41,6 +52,15 @@ def get_color(score):
         # red
         return "#ff0000"
 
+def score_colors(scores):
+    """get_color for an array of scores."""
+    scores = np.asarray(scores, dtype=float)
+    return np.select(
+        [scores >= 90, scores >= 70, scores >= 60],
+        ["#00ff00", "#ffc000", "#ff4b4b"],
+        default="#ff0000",
+    )
+
 def create_radar_chart(pronunciation_result):
     """
     Creates an enhanced radar chart for pronunciation assessment visualization.
@@ -118,75 +138,69 @@ def create_radar_chart(pronunciation_result):
 
     return fig
 
-def create_waveform_plot(audio_file, pronunciation_result):
-    y, sr = librosa.load(audio_file)
+def create_waveform_plot(audio_file, pronunciation_result, width_px=1200):
+    # drawing does not need a resample, the native rate is fine
+    y, sr = load_audio(audio_file)
     duration = len(y) / sr
 
     fig, ax = plt.subplots(figsize=(12, 6))
-    times = np.linspace(0, duration, num=len(y))
-
-    ax.plot(times, y, color="gray", alpha=0.5)
-
-    words = pronunciation_result["NBest"][0]["Words"]
-    for word in words:
-        if (
-            "PronunciationAssessment" not in word
-            or "ErrorType" not in word["PronunciationAssessment"]
-        ):
-            continue
-        if word["PronunciationAssessment"]["ErrorType"] == "Omission":
-            continue
-
-        start_time = word["Offset"] / 10000000
-        word_duration = word["Duration"] / 10000000
-        end_time = start_time + word_duration
-
-        start_idx = int(start_time * sr)
-        end_idx = int(end_time * sr)
-        word_y = y[start_idx:end_idx]
-        word_times = times[start_idx:end_idx]
-
-        score = word["PronunciationAssessment"].get("AccuracyScore", 0)
-        color = get_color(score)
-
-        ax.plot(word_times, word_y, color=color)
+    # one column per output pixel, whatever the length of the recording
+    lows, highs, bin_size = min_max_envelope(y, width_px)
+    times = (np.arange(len(lows)) + 0.5) * bin_size / sr
+
+    ax.fill_between(times, lows, highs, color="gray", alpha=0.5, linewidth=0)
+    ax.set_xlim(0, duration)
+
+    frame = as_frame(pronunciation_result)
+    spoken = np.flatnonzero(frame.spoken() & ~np.isnan(frame.offset))
+    starts, ends = frame.offset[spoken], frame.end[spoken]
+
+    # envelope columns covered by each word, gathered for all words at once
+    start_bins = (starts * sr).astype(int) // bin_size
+    end_bins = np.minimum(len(lows), -(-(ends * sr).astype(int) // bin_size))
+    counts = np.maximum(end_bins - start_bins, 0)
+    bins = (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            + np.repeat(start_bins, counts))
+    segments = np.stack([
+        np.column_stack([times[bins], lows[bins]]),
+        np.column_stack([times[bins], highs[bins]]),
+    ], axis=1)
+
+    # all word spans in one collection instead of one line per word
+    if len(segments):
+        colors = np.repeat(score_colors(frame.accuracy[spoken]), counts)
+        ax.add_collection(LineCollection(segments, colors=colors, linewidths=1))
+    ax.autoscale_view(scalex=False)
+    y_bottom, y_top = ax.get_ylim()
+    if len(spoken):
+        ax.vlines(np.column_stack([starts, ends]).ravel(), y_bottom, y_top,
+                  colors="gray", linestyles="--", alpha=0.5)
+
+    for text, start_time, end_time in zip(frame.text[spoken], starts, ends):
         ax.text(
             (start_time + end_time) / 2,
-            ax.get_ylim()[0],
-            word["Word"],
+            y_bottom,
+            text,
             ha="center",
             va="bottom",
             fontsize=8,
             rotation=45,
         )
-        ax.axvline(x=start_time, color="gray", linestyle="--", alpha=0.5)
-
-        if "Phonemes" in word:
-            for phoneme in word["Phonemes"]:
-                phoneme_start = phoneme["Offset"] / 10000000
-                phoneme_duration = phoneme["Duration"] / 10000000
-                phoneme_end = phoneme_start + phoneme_duration
-
-                phoneme_score = phoneme["PronunciationAssessment"].get(
-                    "AccuracyScore", 0
-                )
-                phoneme_color = get_color(phoneme_score)
-
-                # 绘制音节的垂直线
-                # ax.axvline(x=phoneme_start, color='black', linestyle='--', alpha=0.5)
-                # ax.axvline(x=phoneme_end, color='black', linestyle='--', alpha=0.5)
-
-                # 添加音节 Phoneme 标签
-                ax.text(
-                    phoneme_start,
-                    ax.get_ylim()[1],
-                    phoneme["Phoneme"],
-                    ha="left",
-                    va="top",
-                    fontsize=6,
-                    color=phoneme_color,
-                )
-        ax.axvline(x=end_time, color="gray", linestyle="--", alpha=0.5)
+    # 添加音节 Phoneme 标签
+    phonemes = np.isin(frame.phoneme_word_index, spoken)
+    for phoneme, phoneme_start, phoneme_color in zip(
+        frame.phoneme[phonemes], frame.phoneme_offset[phonemes], score_colors(frame.phoneme_accuracy[phonemes])
+    ):
+        ax.text(
+            phoneme_start,
+            y_top,
+            phoneme,
+            ha="left",
+            va="top",
+            fontsize=6,
+            color=phoneme_color,
+        )
+    ax.set_ylim(y_bottom, y_top)
 
     ax.set_xlabel("Time (seconds)")
     ax.set_ylabel("Amplitude")
@@ -195,57 +209,179 @@ def create_waveform_plot(audio_file, pronunciation_result):
 
     return fig
 
-def pronunciation_assessment(audio_file, reference_text):
-    print("進入 pronunciation_assessment 関数")
-
-    # Be Aware!!! We are using free keys here but nonfree keys in Avatar
-    speech_key, service_region = (
-        st.secrets["Azure_Speech"]["SPEECH_KEY"],
-        st.secrets["Azure_Speech"]["SPEECH_REGION"],
+# same colors and thresholds as get_color
+SCORE_SCALE = alt.Scale(type="threshold", domain=[60, 70, 90], range=["#ff0000", "#ff4b4b", "#ffc000", "#00ff00"])
+
+def create_waveform_chart(data):
+    """Altair version of create_waveform_plot, rendered (and zoomable) in the browser."""
+    envelope = pd.DataFrame({"lo": data["lo"], "hi": data["hi"]})
+    words = pd.DataFrame(data["words"], columns=["word", "start", "end", "score", "error"])
+    phonemes = pd.DataFrame(data["phonemes"], columns=["phoneme", "word", "start", "end", "score"])
+    y_min = float(envelope["lo"].min()) if len(envelope) else -1.0
+    y_max = float(envelope["hi"].max()) if len(envelope) else 1.0
+    # labels sit on the bottom (words) and top (phonemes) edges of the plot
+    words["y"] = y_min
+    phonemes["y"] = y_max
+    x = alt.X("t:Q", title="Time (seconds)", scale=alt.Scale(domain=[0, data["duration"]]))
+
+    # the times of the envelope bins are computed in the browser, row_number() starts at 1
+    wave = alt.Chart(envelope).mark_area(color="gray", opacity=0.5).encode(
+        x=x,
+        y=alt.Y("lo:Q", title="Amplitude", scale=alt.Scale(domain=[y_min, y_max])),
+        y2="hi:Q",
+    ).transform_window(i="row_number()").transform_calculate(t=f"(datum.i - 0.5) * {data['step']}")
+    spans = alt.Chart(words).mark_rect(opacity=0.3).encode(
+        x=alt.X("start:Q"),
+        x2="end:Q",
+        color=alt.Color("score:Q", scale=SCORE_SCALE, legend=None),
+        tooltip=[alt.Tooltip("word:N", title="単語"), alt.Tooltip("score:Q", title="スコア"),
+                 alt.Tooltip("error:N", title="エラー")],
     )
-    print(f"SPEECH_KEY: {speech_key}, SPEECH_REGION: {service_region}")
-
-    speech_config = speechsdk.SpeechConfig(
-        subscription=speech_key, region=service_region
+    word_labels = alt.Chart(words).mark_text(baseline="bottom", angle=315, fontSize=11).encode(
+        x=alt.X("mid:Q"),
+        y="y:Q",
+        text="word:N",
+    ).transform_calculate(mid="(datum.start + datum.end) / 2")
+    phoneme_labels = alt.Chart(phonemes).mark_text(align="left", baseline="top", fontSize=10).encode(
+        x=alt.X("start:Q"),
+        y="y:Q",
+        text="phoneme:N",
+        color=alt.Color("score:Q", scale=SCORE_SCALE, legend=None),
+        tooltip=[alt.Tooltip("phoneme:N", title="音素"), alt.Tooltip("word:N", title="単語"),
+                 alt.Tooltip("score:Q", title="スコア")],
     )
-    print("SpeechConfig 作成成功")
-
-    audio_config = speechsdk.audio.AudioConfig(filename=audio_file)
-    print("AudioConfig 作成成功")
-
-    pronunciation_config = speechsdk.PronunciationAssessmentConfig(
-        reference_text=reference_text,
-        grading_system=speechsdk.PronunciationAssessmentGradingSystem.HundredMark,
-        granularity=speechsdk.PronunciationAssessmentGranularity.Phoneme,
-        enable_miscue=True,
-    )
-    pronunciation_config.enable_prosody_assessment()
-    pronunciation_config.phoneme_alphabet = "IPA"
-    print("PronunciationAssessmentConfig 作成成功")
+    return alt.layer(wave, spans, word_labels, phoneme_labels).properties(
+        title="音声の波形と発音評価",
+        width="container",
+        height=350,
+    ).interactive(bind_y=False)
 
+def figure_to_png(fig, dpi=100):
+    """Rasterize a figure once and close it, session state keeps only the PNG bytes."""
+    buffer = io.BytesIO()
     try:
-        speech_recognizer = speechsdk.SpeechRecognizer(
-            speech_config=speech_config, audio_config=audio_config
+        fig.savefig(buffer, format="png", dpi=dpi)
+    finally:
+        plt.close(fig)
+    return buffer.getvalue()
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def render_radar_chart(attempt_id, _pronunciation_result):
+    # arguments starting with "_" are not hashed, the attempt id is the key
+    return figure_to_png(create_radar_chart(_pronunciation_result))
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def render_waveform_plot(attempt_id, _audio_bytes, _pronunciation_result):
+    return figure_to_png(create_waveform_plot(io.BytesIO(_audio_bytes), _pronunciation_result))
+
+def pronunciation_assessment(audio_file, reference_text, with_cache_status=False, user_key=""):
+    # the service (and its warmed recognizer pool) is shared by all sessions of this process;
+    # this also runs on the assessment worker pool, so errors are raised rather than shown.
+    # with_cache_status=True returns (result, from_cache) for recordings this user resubmitted
+    try:
+        pronunciation_result, from_cache = get_assessment_service().assess_cached(
+            audio_file, reference_text, user_key=user_key
         )
-        print("SpeechRecognizer 作成成功")
-
-        pronunciation_config.apply_to(speech_recognizer)
-        print("PronunciationConfig 適用成功")
+        print("JSON 結果解析成功")
+        if with_cache_status:
+            return pronunciation_result, from_cache
+        return pronunciation_result
+    except Exception:
+        print("pronunciation_assessment 関数で例外をキャッチしました")
+        print(traceback.format_exc())
+        raise
 
-        result = speech_recognizer.recognize_once_async().get()
-        print(f"識別結果: {result}")
+def run_assessment_job(job, audio_bytes, reference_text, user_name):
+    """Runs on the assessment worker pool: no st.* calls here, only pure work."""
+    job.stage = "発音を評価しています..."
+    pronunciation_result, from_cache = pronunciation_assessment(
+        io.BytesIO(audio_bytes), reference_text, with_cache_status=True, user_key=user_name
+    )
+    # the overall scores are shown while the detailed analysis is built
+    job.partial = {"scores": pronunciation_result["NBest"][0]["PronunciationAssessment"]}
+    job.stage = "結果を分析しています..."
+    # flattened once, every table and chart below reads the same arrays
+    frame = ResultFrame.from_result(pronunciation_result)
+    return {
+        "pronunciation_result": pronunciation_result,
+        "frame": frame,
+        "from_cache": from_cache,
+        "error_data": collect_errors(frame),
+        "syllable_table": create_syllable_table(frame),
+    }
 
-        pronunciation_result = json.loads(
-            result.properties.get(speechsdk.PropertyId.SpeechServiceResponse_JsonResult)
+@st.fragment(run_every=1)
+def render_assessment_progress(job):
+    """Poll the background job; rerun the whole page once the result is ready."""
+    if job.done:
+        st.rerun()
+    st.status(job.stage, state="running")
+    if job.partial is not None:
+        scores = job.partial["scores"]
+        labels = {"総合": "PronScore", "正確性": "AccuracyScore", "流暢性": "FluencyScore"}
+        for col, (label, key) in zip(st.columns(len(labels)), labels.items()):
+            col.metric(label, scores.get(key, 0))
+
+def apply_assessment_job(user, job):
+    """Store a finished job's result and build the visualizations (script thread only)."""
+    if job.status == "failed":
+        st.error(f"エラーが発生しました: {str(job.error)}")
+        st.error(
+            "音声ファイルの処理中に問題が発生した可能性があります。もう一度試すか、別の音声ファイルを使用してください。"
         )
-        print("JSON 結果解析成功")
+        print(job.traceback)
+        return None
+    meta = job.meta
+    pronunciation_result = job.result["pronunciation_result"]
+    try:
+        overall_score = pronunciation_result["NBest"][0]["PronunciationAssessment"]
 
-        return pronunciation_result
+        if job.result["from_cache"]:
+            # same recording as before: show it again but don't count or save it twice
+            st.info("前回と同じ録音のため、保存済みの評価結果を表示しています。")
+            if 'learning_state' in st.session_state:
+                st.session_state.learning_state['current_errors'] = job.result["error_data"]
+        else:
+            # only a new recording is written to disk, in the background
+            save_audio_bytes_to_wav_async(user, meta["audio_bytes"], meta["selection"])
+            # save the pronunciation_result to disk
+            user.save_pron_history(meta["selection"], pronunciation_result)
+            # store the pronunciation results into session_state
+            store_scores(user, meta["lesson_index"], pronunciation_result, job.result["error_data"])
+
+        # Create visualizations and analysis, rendered once to PNG per attempt; the same
+        # recording can be assessed differently (another text, new service settings)
+        attempt_id = hashlib.sha1(meta["audio_bytes"] + meta["selection"].encode())
+        attempt_id.update(json.dumps(pronunciation_result, sort_keys=True).encode())
+        attempt_id = attempt_id.hexdigest()
+        radar_chart = render_radar_chart(attempt_id, pronunciation_result)
+        # the waveform is drawn in the browser from a few KB of JSON unless matplotlib is configured
+        waveform_plot, waveform_chart = None, None
+        if st.secrets.get("Display", {}).get("WAVEFORM", "altair") == "matplotlib":
+            waveform_plot = render_waveform_plot(attempt_id, meta["audio_bytes"], job.result["frame"])
+        else:
+            y, sr = load_audio(io.BytesIO(meta["audio_bytes"]))
+            waveform_chart = waveform_data(y, sr, job.result["frame"])
+
+        # Process errors - moved collect_errors before create_error_table
+        st.session_state.current_errors = job.result["error_data"]
+        error_table = create_error_table()
+
+        # Store results in session state
+        st.session_state['learning_data']['overall_score'] = overall_score
+        st.session_state['learning_data']['radar_chart'] = radar_chart
+        st.session_state['learning_data']['waveform_plot'] = waveform_plot
+        st.session_state['learning_data']['waveform_chart'] = waveform_chart
+        st.session_state['learning_data']['error_table'] = error_table
+        st.session_state['learning_data']['syllable_table'] = job.result["syllable_table"]
+
+        # Data for AI
+        st.session_state['ai_initial_input'] = error_table
+        return overall_score
     except Exception as e:
-        st.error(f"pronunciation_assessment 関数で例外をキャッチしました: {str(e)}")
-        import traceback
-        st.error(traceback.format_exc())
-        raise
+        st.error(f"エラーが発生しました: {str(e)}")
+        print(traceback.format_exc())
+        return None
 
 def collect_errors(pronunciation_result):
     """Base function to collect error statistics and words"""
@@ -267,14 +403,10 @@ def collect_errors(pronunciation_result):
         "Monotone": "単調 (Monotone)"
     }
     
-    words = pronunciation_result["NBest"][0]["Words"]
-    for word in words:
-        if "PronunciationAssessment" in word and "ErrorType" in word["PronunciationAssessment"]:
-            error_type = word["PronunciationAssessment"]["ErrorType"]
-            if error_type and error_type in error_mapping:
-                jp_error = error_mapping[error_type]
-                error_data[jp_error]['count'] += 1
-                error_data[jp_error]['words'].append(word["Word"])
+    frame = as_frame(pronunciation_result)
+    for error_type, jp_error in error_mapping.items():
+        words = frame.text[frame.error_type == error_type].tolist()
+        error_data[jp_error] = {'count': len(words), 'words': words}
     
     return error_data
 
@@ -338,20 +470,15 @@ def create_syllable_table(pronunciation_result):
     <table>
         <tr><th>Word</th><th>Pronunciation</th><th>Score</th></tr>
     """
-    for word in pronunciation_result["NBest"][0]["Words"]:
-        word_text = word["Word"]
-        accuracy_score = word.get("PronunciationAssessment", {}).get("AccuracyScore", 0)
-        color = get_color(accuracy_score)
-
+    frame = as_frame(pronunciation_result)
+    colors = score_colors(frame.accuracy)
+    phoneme_colors = score_colors(frame.phoneme_accuracy)
+    for i, (word_text, accuracy_score, color) in enumerate(zip(frame.text, frame.accuracy, colors)):
         output += f"<tr><td>{word_text}</td><td>"
 
-        if "Phonemes" in word:
-            for phoneme in word["Phonemes"]:
-                phoneme_text = phoneme["Phoneme"]
-                phoneme_score = phoneme.get("PronunciationAssessment", {}).get(
-                    "AccuracyScore", 0
-                )
-                phoneme_color = get_color(phoneme_score)
+        if frame.has_phonemes[i]:
+            rows = frame.phonemes_of(i)
+            for phoneme_text, phoneme_color in zip(frame.phoneme[rows], phoneme_colors[rows]):
                 output += f"<span style='color: {phoneme_color};'>{phoneme_text}</span>"
         else:
             output += word_text
@@ -393,14 +520,31 @@ def get_audio_from_mic(user, selection) -> str:
         
         return file_name
 
-def save_audio_bytes_to_wav(user, audio_bytes, selection, sample_rate=48000, channels=1):
+def save_audio_bytes_to_wav(user, audio_bytes, selection, sample_rate=48000, channels=1, output_filename=None):
     audio_data, sr = sf.read(audio_bytes, dtype="int16")
-    current_time = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
-    output_filename = f"{user.today_path}/{selection}-{current_time}.wav"
+    if output_filename is None:
+        current_time = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+        output_filename = f"{user.today_path}/{selection}-{current_time}.wav"
     sf.write(output_filename, audio_data, sample_rate, format="WAV", subtype="PCM_16")
     print("Audio saved!")
     return output_filename
 
+def save_audio_bytes_to_wav_async(user, audio_bytes, selection, sample_rate=48000, channels=1):
+    """Persist the recording on a background thread; returns (file name, thread)."""
+    current_time = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+    output_filename = f"{user.today_path}/{selection}-{current_time}.wav"
+
+    def save():
+        try:
+            save_audio_bytes_to_wav(user, io.BytesIO(audio_bytes), selection, sample_rate, channels,
+                                    output_filename=output_filename)
+        except Exception:
+            print(traceback.format_exc())
+
+    thread = threading.Thread(target=save, name="save-recording")
+    thread.start()
+    return output_filename, thread
+
 def get_audio_from_mic_v2(user, selection):
     # Collect voice bytes data from audio_recorder
     audio_bytes_io = st.audio_input("マイクのアイコンをクリックして、録音しましょう！", key='audio_input')
@@ -445,71 +589,19 @@ def course_navigation(my_grid, courses):
 
     return current_course
 
-def save_scores_to_json(user, lesson_index, scores_history):
-    scores_dir = os.path.join(user.today_path, "scores")
-    if not os.path.exists(scores_dir):
-        os.makedirs(scores_dir)
-    
-    json_file = os.path.join(scores_dir, "lesson_scores.json")
-    
-    # Load existing data
-    if os.path.exists(json_file):
-        with open(json_file, 'r', encoding='utf-8') as f:
-            all_scores = json.load(f)
-    else:
-        all_scores = {}
-    
-    lesson_key = f"lesson_{lesson_index}"
-    
-    # Create new entry for lesson (overwrite instead of append)
-    all_scores[lesson_key] = {
-        'AccuracyScore': scores_history['AccuracyScore'],
-        'FluencyScore': scores_history['FluencyScore'],
-        'CompletenessScore': scores_history['CompletenessScore'],
-        'ProsodyScore': scores_history['ProsodyScore'],
-        'PronScore': scores_history['PronScore']
-    }
-    
-    # Save updated data
-    with open(json_file, 'w', encoding='utf-8') as f:
-        json.dump(all_scores, f, indent=4)
-
-def save_error_history(user, lesson_index, error_data):
-    """Save error history to JSON file"""
-    # Create scores directory if not exists
-    scores_dir = os.path.join(user.today_path, "scores")
-    if not os.path.exists(scores_dir):
-        os.makedirs(scores_dir)
-    
-    error_file = os.path.join(scores_dir, "error_history.json")
-    
-    try:
-        # Load existing data if file exists
-        if os.path.exists(error_file):
-            with open(error_file, 'r', encoding='utf-8') as f:
-                all_errors = json.load(f)
-        else:
-            all_errors = {}
-        
-        # Update with new error data
-        lesson_key = f"lesson_{lesson_index}"
-        all_errors[lesson_key] = {
-            'current': error_data['current'],
-            'total': error_data['total']
-        }
-        
-        # Save updated data
-        with open(error_file, 'w', encoding='utf-8') as f:
-            json.dump(all_errors, f, indent=4, ensure_ascii=False)
-            
-    except Exception as e:
-        st.error(f"Error saving error history: {str(e)}")
-
-def store_scores(user, lesson_index, pronunciation_result):
+def store_scores(user, lesson_index, pronunciation_result, error_data=None):
     """Store scores and update session state"""
     # Get scores
     scores = pronunciation_result["NBest"][0]["PronunciationAssessment"]
-    error_data = collect_errors(pronunciation_result)
+    if error_data is None:
+        error_data = collect_errors(pronunciation_result)
+    
+    # one record per attempt; the lesson's history is rebuilt from the log, so
+    # attempts made in other tabs are included as well
+    score_log = get_score_log(user)
+    score_log.append(lesson_index, scores, error_data)
+    lessons = score_log.state()
+    lesson = lessons.get(lesson_index, empty_lesson())
     
     # Initialize session state
     if 'learning_state' not in st.session_state:
@@ -519,44 +611,12 @@ def store_scores(user, lesson_index, pronunciation_result):
             'total_errors': {}
         }
     
-    # Initialize lesson data if needed
-    if lesson_index not in st.session_state.learning_state['scores_history']:
-        st.session_state.learning_state['scores_history'][lesson_index] = {
-            'AccuracyScore': [],
-            'FluencyScore': [],
-            'CompletenessScore': [],
-            'ProsodyScore': [],
-            'PronScore': []
-        }
-        st.session_state.learning_state['total_errors'][lesson_index] = {}
-    
-    # Update scores
-    for score_type in ['AccuracyScore', 'FluencyScore', 'CompletenessScore', 'ProsodyScore', 'PronScore']:
-        st.session_state.learning_state['scores_history'][lesson_index][score_type].append(
-            scores[score_type]
-        )
-    
-    # Update current errors
+    st.session_state.learning_state['scores_history'][lesson_index] = lesson['scores']
     st.session_state.learning_state['current_errors'] = error_data
-    
-    # Update total errors
-    for error_type, data in error_data.items():
-        if error_type not in st.session_state.learning_state['total_errors'][lesson_index]:
-            st.session_state.learning_state['total_errors'][lesson_index][error_type] = {
-                'count': 0, 'words': []
-            }
-        st.session_state.learning_state['total_errors'][lesson_index][error_type]['count'] += data['count']
-        st.session_state.learning_state['total_errors'][lesson_index][error_type]['words'].extend(data['words'])
-    
-    # Save to files
-    save_scores_to_json(user, lesson_index, st.session_state.learning_state['scores_history'][lesson_index])
-    save_error_history(user, lesson_index, {
-        'current': error_data,
-        'total': st.session_state.learning_state['total_errors'][lesson_index]
-    })
+    st.session_state.learning_state['total_errors'][lesson_index] = lesson['total']
     
     # Add this line to force reload the scores
-    user.load_scores_history(lesson_index)
+    user.load_scores_history(lesson_index, lessons)
 
 def plot_error_charts():
     """Plot both current and total error charts"""
@@ -704,26 +764,10 @@ def initialize_lesson_state(user, lesson_index):
             'total_errors': {}
         }
         
-        # Load saved data from files
-        scores_dir = os.path.join(user.today_path, "scores")
-        if os.path.exists(scores_dir):
-            # Load scores
-            scores_file = os.path.join(scores_dir, "lesson_scores.json")
-            if os.path.exists(scores_file):
-                with open(scores_file, 'r', encoding='utf-8') as f:
-                    all_scores = json.load(f)
-                    for lesson_key, scores in all_scores.items():
-                        lesson_idx = int(lesson_key.split('_')[1])
-                        st.session_state.learning_state['scores_history'][lesson_idx] = scores
-            
-            # Load errors
-            error_file = os.path.join(scores_dir, "error_history.json")
-            if os.path.exists(error_file):
-                with open(error_file, 'r', encoding='utf-8') as f:
-                    all_errors = json.load(f)
-                    for lesson_key, errors in all_errors.items():
-                        lesson_idx = int(lesson_key.split('_')[1])
-                        st.session_state.learning_state['total_errors'][lesson_idx] = errors['total']
+        # Load saved data from the score log
+        for lesson_idx, lesson in get_score_log(user).state().items():
+            st.session_state.learning_state['scores_history'][lesson_idx] = lesson['scores']
+            st.session_state.learning_state['total_errors'][lesson_idx] = lesson['total']
     
     # Initialize current lesson structures if not exist
     if lesson_index not in st.session_state.learning_state['total_errors']:
@@ -756,12 +800,14 @@ def main():
         dataset.load_data()
         st.session_state.dataset = dataset
     dataset = st.session_state.dataset
-    lessons = [f'レッスン{i}' for i in range(1, len(dataset.text_data) + 1)]
+    lessons = [f'レッスン{i}' for i in range(1, len(dataset.catalog) + 1)]
     
     # preload the scores history
     if 'scores_history' not in st.session_state:
+        # one replay of the score log for all lessons
+        lesson_states = get_score_log(user).state()
         for i in range(len(lessons)):
-            user.load_scores_history(i)
+            user.load_scores_history(i, lesson_states)
 
     st.title("フォノエコー英語発音トレーニングシステム😆")
     
@@ -777,15 +823,14 @@ def main():
         selection = course_navigation(my_grid, lessons)
 
         lesson_idx = int(selection.replace("レッスン", "")) - 1
-        selected_lessons = {
-        "text": dataset.text_data[lesson_idx],
-        "video": dataset.video_data[lesson_idx]
-        }
+        selected_lessons = dataset.catalog[lesson_idx]
 
         # row2: video, text
-        my_grid.video(dataset.path + selected_lessons["video"])
-        with open(dataset.path + selected_lessons["text"], "r", encoding='utf-8') as f:
-            text_content = f.read()
+        if selected_lessons["video"]:
+            my_grid.video(media_source(dataset.path + selected_lessons["video"]), format="video/mp4")
+        else:
+            my_grid.warning("このレッスンの動画が見つかりません。")
+        text_content = read_lesson_text(dataset.path + selected_lessons["text"])
         # TODO: how to set the font and size?
         my_grid.markdown(
             f"""
@@ -799,61 +844,49 @@ def main():
         # row3: mic and learning button
         # main work will be done here
         # initialize all the elements with None for convenience
-        overall_score = radar_chart = waveform_plot = error_table = syllable_table = None
+        overall_score = None
+        just_assessed = False
         
         # using form here!
         with my_grid.form(key='learning_phase'):
             audio_file_io = get_audio_from_mic_v2(user, selection)
             if_started = st.form_submit_button('学習開始！')
-        if if_started:
-            # if overall_score and all the other are all None, don't run this
-            # save the audio when the submit button is clicked
-            audio_file_name = save_audio_bytes_to_wav(user, audio_file_io, selection)
-            if audio_file_name and not overall_score:
-                try:
-                    pronunciation_result = pronunciation_assessment(
-                        audio_file=audio_file_name, reference_text=text_content
-                    )
-                    # save the pronunciation_result to disk
-                    user.save_pron_history(selection, pronunciation_result)
-
-                    overall_score = pronunciation_result["NBest"][0]["PronunciationAssessment"]
-
-                    # store the pronunciation results into session_state
-                    store_scores(user, st.session_state.lesson_index, pronunciation_result)
-
-                    # Create visualizations and analysis
-                    radar_chart = create_radar_chart(pronunciation_result)
-                    waveform_plot = create_waveform_plot(audio_file_name, pronunciation_result)
-
-                    # Process errors - moved collect_errors before create_error_table
-                    error_data = collect_errors(pronunciation_result)
-                    st.session_state.current_errors = error_data
-                    error_table = create_error_table()
-
-                    syllable_table = create_syllable_table(pronunciation_result)
-
-                    # Store results in session state
-                    st.session_state['learning_data']['overall_score'] = overall_score
-                    st.session_state['learning_data']['radar_chart'] = radar_chart
-                    st.session_state['learning_data']['waveform_plot'] = waveform_plot
-                    st.session_state['learning_data']['error_table'] = error_table
-                    st.session_state['learning_data']['syllable_table'] = syllable_table
-
-                    # Data for AI
-                    st.session_state['ai_initial_input'] = error_table
-                except Exception as e:
-                    st.error(f"エラーが発生しました: {str(e)}")
-                    st.error(
-                        "音声ファイルの処理中に問題が発生した可能性があります。もう一度試すか、別の音声ファイルを使用してください。"
-                    )
-                    print(traceback.format_exc())
+        if if_started and audio_file_io is not None:
+            # Azure reads the recording from memory; it is saved once the result shows it is new
+            audio_bytes = audio_file_io.getvalue()
+            try:
+                # assessment runs on the shared worker pool, this script thread stays free
+                st.session_state['assessment_job'] = get_job_queue().submit(
+                    run_assessment_job, audio_bytes, text_content, user.name,
+                    meta={
+                        "selection": selection,
+                        "lesson_index": st.session_state.lesson_index,
+                        "audio_bytes": audio_bytes,
+                    },
+                )
+            except JobQueueFull:
+                st.warning("ただいま混み合っています。少し待ってからもう一度お試しください。")
+
+        # poll the running job, or apply its result once when it has finished
+        assessment_job = st.session_state.get('assessment_job')
+        if assessment_job is not None:
+            if assessment_job.done:
+                del st.session_state['assessment_job']
+                overall_score = apply_assessment_job(user, assessment_job)
+                # a resubmitted recording already got its advice
+                just_assessed = overall_score is not None and not assessment_job.result["from_cache"]
+            else:
+                with my_grid.container():
+                    render_assessment_progress(assessment_job)
         # row4: waveform
-        if st.session_state['learning_data']['waveform_plot']:
-            my_grid.pyplot(st.session_state['learning_data']['waveform_plot'])
+        if st.session_state['learning_data'].get('waveform_chart'):
+            my_grid.altair_chart(create_waveform_chart(st.session_state['learning_data']['waveform_chart']),
+                                 use_container_width=True)
+        elif st.session_state['learning_data']['waveform_plot']:
+            my_grid.image(st.session_state['learning_data']['waveform_plot'], use_column_width=True)
         # row5: radar chart and errors' type
         if st.session_state['learning_data']['radar_chart']:
-            my_grid.pyplot(st.session_state['learning_data']['radar_chart'])
+            my_grid.image(st.session_state['learning_data']['radar_chart'], use_column_width=True)
         if st.session_state['learning_data']['error_table'] is not None:
             my_grid.dataframe(st.session_state['learning_data']['error_table'], use_container_width=True)
         
@@ -882,7 +915,7 @@ def main():
         with st.chat_message('AI'):
             if 'learning_state' not in st.session_state or not st.session_state.learning_state['current_errors']:
                 st.write("練習を始めましょう！")
-            elif if_started:
+            elif just_assessed:
                 st.write("GPTによる発音のアドバイス:")
                 feedback = ai_chat.get_chat_response(st.session_state.learning_state['current_errors'])
                 if feedback:
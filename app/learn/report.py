@@ -1,9 +1,14 @@
 import os
-import json
 import pandas as pd
 import matplotlib.pyplot as plt
 import streamlit as st
-from collections import defaultdict
+from datetime import date, timedelta
+from report_index import load_index, merge_counts, scan_error_counts
+from history_store import get_history_store
+from user_store import get_user_store
+
+# days shown in the trend section of the report
+TREND_DAYS = 30
 
 def get_sorted_json_files(folder_path):
     """Get all JSON files in the folder, return their names sorted in ascending order."""
@@ -16,38 +21,43 @@ def get_sorted_json_files(folder_path):
         st.error(f"Error reading directory: {str(e)}")
         return []
 
-def load_json_files(folder_path, json_files):
-    """Load all JSON files and return their content."""
-    json_contents = []
-    for file_name in json_files:
-        try:
-            file_path = os.path.join(folder_path, file_name)
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = json.load(f)
-                json_contents.append(content)
-        except Exception as e:
-            st.warning(f"Error loading {file_name}: {str(e)}")
-    return json_contents
+def load_error_summary(folder_path, json_files):
+    """
+    Error counts and total words from the folder's aggregate index.
 
-def analyze_pronunciation_errors(json_contents):
-    """Analyze pronunciation errors from all JSON files."""
-    error_counts = defaultdict(int)
-    total_words = 0
-    
-    for content in json_contents:
-        try:
-            words = content['NBest'][0]['Words']
-            total_words += len(words)
-            
-            for word in words:
-                if 'PronunciationAssessment' in word:
-                    error_type = word['PronunciationAssessment'].get('ErrorType', 'None')
-                    if error_type != 'None':
-                        error_counts[error_type] += 1
-        except Exception as e:
-            st.warning(f"Error analyzing content: {str(e)}")
-    
-    return dict(error_counts), total_words
+    Only files the index has not seen yet (e.g. written before the index existed)
+    are loaded and folded in; the updated index is saved for the next rerun.
+    """
+    index = load_index(folder_path)
+    known = set(index["files"])
+    missing = [f for f in json_files if f not in known]
+    counted = []
+    for file_name, counts, total, error in scan_error_counts(folder_path, missing):
+        if error is not None:
+            st.warning(f"Error loading {file_name}: {str(error)}")
+            continue
+        counted.append((file_name, counts, total))
+    if counted:
+        index = merge_counts(folder_path, counted)
+    return index["error_counts"], index["total_words"]
+
+def load_history_trend(user_path, start_date=None, end_date=None):
+    """
+    Per-day attempts, average PronScore and share of words with an error (%),
+    read from a few typed columns of the user's history store instead of the JSON results.
+    """
+    store = get_history_store(user_path)
+    utterances = store.read("utterances", columns=["recorded_at", "pron_score"],
+                            start_date=start_date, end_date=end_date)
+    if utterances.empty:
+        return pd.DataFrame(columns=["attempts", "pron_score", "error_rate"])
+    words = store.read("words", columns=["recorded_at", "error_type"], start_date=start_date, end_date=end_date)
+    trend = utterances.groupby(utterances["recorded_at"].dt.date).agg(
+        attempts=("pron_score", "size"), pron_score=("pron_score", "mean"))
+    has_error = words["error_type"] != "None"
+    trend["error_rate"] = has_error.groupby(words["recorded_at"].dt.date).mean() * 100
+    trend.index.name = "date"
+    return trend
 
 def create_error_pie_chart(error_counts, total_words):
     """Create a pie chart showing error distribution."""
@@ -82,14 +92,12 @@ def show_pronunciation_analysis(folder_path):
         st.error("JSONファイルが見つかりません。")
         return
     
-    json_contents = load_json_files(folder_path, json_files)
-    if not json_contents:
+    # Analyze errors (precomputed per day, only new files are read)
+    error_counts, total_words = load_error_summary(folder_path, json_files)
+    if not total_words:
         st.error("JSONファイルを読み込めません。")
         return
     
-    # Analyze errors
-    error_counts, total_words = analyze_pronunciation_errors(json_contents)
-    
     # Show statistics
     st.write("### 基本統計")
     st.write(f"- 分析した単語数: {total_words}")
@@ -109,6 +117,32 @@ def show_pronunciation_analysis(folder_path):
     )
     st.dataframe(error_df)
 
+    # folder_path is <user>/practice_history/<YYYY-MM-DD>
+    folder_path = os.path.normpath(folder_path)
+    user_path = os.path.dirname(os.path.dirname(folder_path))
+    try:
+        end_date = date.fromisoformat(os.path.basename(folder_path))
+    except ValueError:
+        end_date = date.today()
+    trend = load_history_trend(user_path, end_date - timedelta(days=TREND_DAYS - 1), end_date)
+    if not trend.empty:
+        st.write(f"### 直近{TREND_DAYS}日間の推移")
+        st.line_chart(trend[["pron_score", "error_rate"]])
+        st.dataframe(trend)
+    show_attempt_history(os.path.basename(user_path), end_date - timedelta(days=TREND_DAYS - 1), end_date)
+
+def show_attempt_history(name, start_date, end_date):
+    """Attempts and error totals of a period, answered by the user store's indexes."""
+    store = get_user_store()
+    attempts = store.attempts(name, start_date=start_date, end_date=end_date)
+    if not attempts:
+        return
+    st.write("### 練習の記録")
+    st.dataframe(pd.DataFrame(attempts).drop(columns=["result_path"]), use_container_width=True)
+    error_counts = store.error_counts(name, start_date=start_date, end_date=end_date)
+    if error_counts:
+        st.bar_chart(pd.Series(error_counts, name="回数"))
+
 # Example usage
 if __name__ == "__main__":
     folder_path = r"E:\Code\EchoLearn\database\qi\practice_history\2024-10-31"
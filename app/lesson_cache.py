@@ -0,0 +1,52 @@
+import os
+import streamlit as st
+
+# Lesson files are shared by every learner, so their contents are cached per
+# server process (not per session). Keys include the mtime, an edited file is
+# simply a new entry and the stale one ages out of the LRU.
+
+# media larger than this (videos) goes to a smaller cache of its own, so a few
+# videos cannot push all reference audio out
+MAX_CACHED_MEDIA_BYTES = 4 * 1024 * 1024
+
+
+@st.cache_data(max_entries=1024, show_spinner=False)
+def _read_text(path, mtime_ns):
+    with open(path, "r", encoding='utf-8') as f:
+        return f.read()
+
+
+def _read_file(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+@st.cache_resource(max_entries=16, ttl=600, show_spinner=False)
+def _read_media(path, mtime_ns, size):
+    # cache_resource hands out the same bytes object to every session, no copies
+    return _read_file(path)
+
+
+@st.cache_resource(max_entries=4, ttl=600, show_spinner=False)
+def _read_large_media(path, mtime_ns, size):
+    return _read_file(path)
+
+
+def read_lesson_text(path):
+    return _read_text(path, os.stat(path).st_mtime_ns)
+
+
+def read_lesson_media(path):
+    """
+    What to give st.video/st.audio for a lesson file without the media server: its
+    bytes, read once per process and version of the file. A path would be read from
+    disk again on every rerun; Streamlit's media storage keeps the very bytes object
+    it is given, so the cached copy is the one it serves and costs no extra memory.
+    Streamlit still hashes the bytes per rerun (about 1 ms per MB), which only the
+    media server avoids. At most 16 small files and 4 large ones (videos) are kept,
+    each for at most 10 minutes.
+    """
+    stat = os.stat(path)
+    if stat.st_size > MAX_CACHED_MEDIA_BYTES:
+        return _read_large_media(path, stat.st_mtime_ns, stat.st_size)
+    return _read_media(path, stat.st_mtime_ns, stat.st_size)
@@ -0,0 +1,220 @@
+import re
+import numpy as np
+from assessment_core import AssessmentService, ASSESSMENT_SAMPLE_RATE
+from segment_merge import split_reference
+
+# Azure reports offsets and durations in 100 ns ticks
+TICKS_PER_SECOND = 10000000
+FRAME_SECONDS = 0.01
+WINDOW_SECONDS = 0.025
+
+# multi-character IPA symbols that count as a single phoneme
+_IPA_UNITS = ["tʃ", "dʒ", "aɪ", "aʊ", "eɪ", "oʊ", "ɔɪ"]
+
+# rough letter-to-sound rules for words the dictionary does not know (names, made-up
+# words), longest spelling first; letters not listed keep their own sound and
+# spaces separate phonemes
+_SPELLING_TO_IPA = [
+    ("tch", "tʃ"), ("igh", "aɪ"),
+    ("th", "θ"), ("sh", "ʃ"), ("ch", "tʃ"), ("ng", "ŋ"), ("ph", "f"), ("ck", "k"), ("qu", "k w"),
+    ("wh", "w"), ("ee", "i"), ("ea", "i"), ("oo", "u"), ("ai", "eɪ"), ("ay", "eɪ"), ("ou", "aʊ"),
+    ("ow", "oʊ"), ("oi", "ɔɪ"), ("oy", "ɔɪ"),
+    ("a", "æ"), ("e", "ɛ"), ("i", "ɪ"), ("o", "ɑ"), ("u", "ʌ"), ("y", "i"),
+    ("c", "k"), ("g", "g"), ("j", "dʒ"), ("q", "k"), ("r", "ɹ"), ("x", "k s"),
+]
+
+
+def split_ipa(ipa):
+    """Split an IPA word into phoneme units, dropping stress marks, punctuation and unknown-word marks."""
+    ipa = re.sub(r"[ˈˌ.,!?;:\"'()\-…*]", "", ipa)
+    units, i = [], 0
+    while i < len(ipa):
+        for unit in _IPA_UNITS:
+            if ipa.startswith(unit, i):
+                units.append(unit)
+                i += len(unit)
+                break
+        else:
+            if not ipa[i].isspace():
+                units.append(ipa[i])
+            i += 1
+    return units
+
+
+def spelling_to_ipa(word):
+    """Approximate phonemes of a word from its spelling, for words without a dictionary entry."""
+    word = re.sub(r"[^a-z]", "", word.lower())
+    units, i = [], 0
+    while i < len(word):
+        for spelling, sound in _SPELLING_TO_IPA:
+            if word.startswith(spelling, i):
+                units += sound.split()
+                i += len(spelling)
+                break
+        else:
+            units.append(word[i])
+            i += 1
+    return units
+
+
+def _word_phonemes(word, to_ipa, normalize_numbers):
+    units = []
+    # "well-known", "42" -> "forty-two": every part is looked up on its own
+    for part in re.split(r"[\s\-]+", normalize_numbers(word)):
+        if not part:
+            continue
+        ipa = to_ipa(part)
+        # eng_to_ipa marks words missing from its dictionary with a trailing "*"
+        units += spelling_to_ipa(part) if "*" in ipa else split_ipa(ipa)
+    return units
+
+
+def phonemize_words(reference_text):
+    """Reference words (tokenized like Azure) with their IPA phonemes, via the openvoice English phonemizer."""
+    words = split_reference(reference_text)
+    try:
+        from openvoice.text.english import english_to_ipa2, normalize_numbers
+    except ImportError:
+        # without the phonemizer spell the words out, durations are still roughly right
+        return [(w, spelling_to_ipa(w) or list(w.lower())) for w in words]
+    return [(w, _word_phonemes(w, english_to_ipa2, normalize_numbers) or list(w.lower())) for w in words]
+
+
+def frame_log_energy(samples, sample_rate=ASSESSMENT_SAMPLE_RATE):
+    hop = int(FRAME_SECONDS * sample_rate)
+    win = int(WINDOW_SECONDS * sample_rate)
+    if len(samples) < win:
+        samples = np.pad(samples, (0, win - len(samples)))
+    frames = np.lib.stride_tricks.sliding_window_view(samples, win)[::hop]
+    return np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+
+
+def _score(value, low, high):
+    return float(np.clip((value - low) / (high - low), 0.0, 1.0) * 100.0)
+
+
+class LocalAssessmentService(AssessmentService):
+    """
+    Offline stand-in for Azure pronunciation assessment.
+
+    The reference text is phonemized and force-aligned to the recording with an
+    energy-based voice activity detector: word boundaries start from durations
+    proportional to phoneme counts and are snapped to the quietest nearby frame,
+    and phonemes split their word evenly. Scores are simple acoustic proxies
+    (voicing coverage, pauses, energy variation), so the numbers are only useful
+    for load tests, benchmarks and offline practice, but the JSON has the same
+    shape as Azure's (NBest[0].PronunciationAssessment, Words, Phonemes, Offset,
+    Duration) and works with every consumer on the learning page.
+    """
+
+    config_signature = "local|v1"
+
+    def __init__(self, snap_ratio=0.15, pause_seconds=0.3):
+        self.snap_ratio = snap_ratio
+        self.pause_frames = int(pause_seconds / FRAME_SECONDS)
+
+    def _align(self, energy, voiced, start, end, weights):
+        # spread the words over the voiced frames only, so pauses fall between words
+        cumulative = np.cumsum(voiced[start:end])
+        targets = np.cumsum(weights)[:-1] / np.sum(weights) * cumulative[-1]
+        inner = start + np.searchsorted(cumulative, targets, side="left")
+        bounds = np.concatenate([[start], inner, [end]]).astype(int)
+        # move inner boundaries to the quietest frame nearby
+        for k in range(1, len(bounds) - 1):
+            radius = max(1, int((bounds[k + 1] - bounds[k - 1]) * self.snap_ratio / 2))
+            lo = max(bounds[k - 1] + 1, bounds[k] - radius)
+            hi = min(bounds[k + 1] - 1, bounds[k] + radius)
+            if hi > lo:
+                bounds[k] = lo + int(np.argmin(energy[lo:hi]))
+        return bounds
+
+    def assess_pcm(self, pcm, reference_text):
+        samples = np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+        energy = frame_log_energy(samples)
+        floor, peak = np.percentile(energy, 10), np.percentile(energy, 95)
+        voiced = energy > floor + 0.3 * max(peak - floor, 1e-3)
+        words = phonemize_words(reference_text)
+
+        voiced_idx = np.flatnonzero(voiced)
+        if len(words) == 0 or len(voiced_idx) == 0:
+            return self._result(reference_text, [
+                {"Word": w, "PronunciationAssessment": {"AccuracyScore": 0, "ErrorType": "Omission"}}
+                for w, _ in words
+            ], dict(AccuracyScore=0, FluencyScore=0, CompletenessScore=0, ProsodyScore=0, PronScore=0), 0, 0)
+
+        start, end = int(voiced_idx[0]), int(voiced_idx[-1]) + 1
+        bounds = self._align(energy, voiced, start, end, np.array([len(p) + 1 for _, p in words], dtype=float))
+
+        # pauses: runs of unvoiced frames inside the spoken region
+        inner = ~voiced[start:end]
+        edges = np.diff(np.concatenate([[0], inner.astype(int), [0]]))
+        pause_lengths = np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+        long_pauses = pause_lengths[pause_lengths >= self.pause_frames]
+
+        result_words, accuracies, error_types = [], [], []
+        for (word, phonemes), w_start, w_end in zip(words, bounds[:-1], bounds[1:]):
+            w_end = max(w_end, w_start + 1)
+            coverage = float(voiced[w_start:w_end].mean())
+            # trim the pause that may trail or lead the word
+            span = np.flatnonzero(voiced[w_start:w_end])
+            if len(span):
+                w_start, w_end = w_start + int(span[0]), w_start + int(span[-1]) + 1
+            accuracy = round(_score(coverage, 0.2, 0.9), 1)
+            if coverage < 0.1:
+                error_type = "Omission"
+            elif accuracy < 60:
+                error_type = "Mispronunciation"
+            else:
+                error_type = "None"
+            p_bounds = np.linspace(w_start, w_end, len(phonemes) + 1).round().astype(int)
+            result_phonemes = []
+            for phoneme, p_start, p_end in zip(phonemes, p_bounds[:-1], p_bounds[1:]):
+                p_end = max(p_end, p_start + 1)
+                p_coverage = float(voiced[p_start:p_end].mean()) if p_end <= len(voiced) else coverage
+                result_phonemes.append({
+                    "Phoneme": phoneme,
+                    "Offset": int(p_start * FRAME_SECONDS * TICKS_PER_SECOND),
+                    "Duration": int((p_end - p_start) * FRAME_SECONDS * TICKS_PER_SECOND),
+                    "PronunciationAssessment": {"AccuracyScore": round(0.5 * accuracy + 0.5 * _score(p_coverage, 0.2, 0.9), 1)},
+                })
+            result_words.append({
+                "Word": word,
+                "Offset": int(w_start * FRAME_SECONDS * TICKS_PER_SECOND),
+                "Duration": int((w_end - w_start) * FRAME_SECONDS * TICKS_PER_SECOND),
+                "PronunciationAssessment": {"AccuracyScore": accuracy, "ErrorType": error_type},
+                "Phonemes": result_phonemes,
+            })
+            accuracies.append(accuracy)
+            error_types.append(error_type)
+
+        spoken = [a for a, e in zip(accuracies, error_types) if e != "Omission"]
+        accuracy = float(np.mean(spoken)) if spoken else 0.0
+        completeness = 100.0 * len(spoken) / len(words)
+        fluency = 100.0 - _score(long_pauses.sum() / max(end - start, 1), 0.0, 0.5)
+        prosody = _score(float(np.std(energy[voiced])), 0.1, 0.6)
+        ordered = sorted([accuracy, prosody, completeness, fluency])
+        scores = {
+            "AccuracyScore": round(accuracy, 1),
+            "FluencyScore": round(fluency, 1),
+            "CompletenessScore": round(completeness, 1),
+            "ProsodyScore": round(prosody, 1),
+            "PronScore": round(ordered[0] * 0.4 + (ordered[1] + ordered[2] + ordered[3]) * 0.2, 1),
+        }
+        offset = int(start * FRAME_SECONDS * TICKS_PER_SECOND)
+        duration = int((end - start) * FRAME_SECONDS * TICKS_PER_SECOND)
+        return self._result(reference_text, result_words, scores, offset, duration)
+
+    @staticmethod
+    def _result(reference_text, words, scores, offset, duration):
+        return {
+            "RecognitionStatus": "Success",
+            "Offset": offset,
+            "Duration": duration,
+            "DisplayText": reference_text,
+            "NBest": [{
+                "Display": reference_text,
+                "Lexical": " ".join(w["Word"].lower() for w in words),
+                "PronunciationAssessment": scores,
+                "Words": words,
+            }],
+        }
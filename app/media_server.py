@@ -0,0 +1,115 @@
+import os
+import asyncio
+import threading
+from urllib.parse import quote
+import streamlit as st
+import tornado.web
+from lesson_cache import read_lesson_media
+from settings import as_flag
+
+LESSON_ROOT = "database/learning_database/"
+
+
+class MediaHandler(tornado.web.StaticFileHandler):
+    """StaticFileHandler already answers Range requests and sets ETag/Last-Modified."""
+
+    max_age = 24 * 3600
+
+    def compute_etag(self):
+        # the default hashes the whole file once and never notices later edits
+        stat = os.stat(self.absolute_path)
+        return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+    def set_extra_headers(self, path):
+        # <video>/<audio> elements load cross-origin media without CORS headers
+        self.set_header("Cache-Control", f"public, max-age={self.max_age}")
+
+
+class MediaServer:
+    """
+    Small HTTP server for lesson videos and reference audio, beside the Streamlit server.
+
+    Pages pass URLs from url() to st.video/st.audio, so the browser streams the
+    files with range requests (seeking, partial downloads, HTTP caching) instead
+    of Streamlit reading every file into memory and pushing it through its media
+    manager. roots maps a URL prefix to a directory; only files under these
+    directories are served. base_url is the address browsers use to reach the
+    server, so it has to be given explicitly.
+    """
+
+    def __init__(self, roots, base_url, host="127.0.0.1", port=8502):
+        self.roots = {name: os.path.abspath(path) for name, path in roots.items()}
+        self.host = host
+        self.port = port
+        self.base_url = base_url.rstrip("/")
+        self._thread = None
+
+    def start(self):
+        started = threading.Event()
+        errors = []
+
+        def serve():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            app = tornado.web.Application([
+                (rf"/media/{name}/(.*)", MediaHandler, {"path": path}) for name, path in self.roots.items()
+            ])
+            try:
+                app.listen(self.port, address=self.host)
+            except OSError as e:
+                errors.append(e)
+                started.set()
+                return
+            started.set()
+            loop.run_forever()
+
+        self._thread = threading.Thread(target=serve, name="media-server", daemon=True)
+        self._thread.start()
+        started.wait()
+        if errors:
+            # typically another server worker on this machine already listens on the port
+            print(f"Media server not started on port {self.port}: {errors[0]}")
+            return False
+        print(f"Media server listening on {self.host}:{self.port}")
+        return True
+
+    def url(self, path):
+        """URL of a file under one of the roots, None if it is outside all of them."""
+        path = os.path.abspath(path)
+        for name, root in self.roots.items():
+            if os.path.commonpath([root, path]) == root:
+                rel = os.path.relpath(path, root).replace(os.sep, "/")
+                return f"{self.base_url}/media/{name}/{quote(rel)}"
+        return None
+
+
+@st.cache_resource
+def get_media_server():
+    """
+    Opt-in: [Media] ENABLED = true and BASE_URL, the address browsers use to reach
+    the server (e.g. the public URL of a reverse proxy in front of it), are both
+    required. HOST defaults to 127.0.0.1 (PORT 8502); bind to a public interface
+    only when browsers connect to the server directly. Returns None when the
+    server is disabled or cannot listen, and pages fall back to in-memory media.
+    """
+    settings = st.secrets.get("Media", {})
+    if not as_flag(settings.get("ENABLED"), default=False):
+        return None
+    if not settings.get("BASE_URL"):
+        print("Media server not started: [Media] BASE_URL is not set")
+        return None
+    server = MediaServer(
+        {"lessons": settings.get("LESSON_ROOT", LESSON_ROOT)},
+        settings["BASE_URL"],
+        host=settings.get("HOST", "127.0.0.1"),
+        port=int(settings.get("PORT", 8502)),
+    )
+    # if the port is taken, URLs would point at whatever else listens there
+    return server if server.start() else None
+
+
+def media_source(path):
+    """What to give st.video/st.audio for a lesson file: its URL, or read_lesson_media without the server."""
+    server = get_media_server()
+    url = server.url(path) if server is not None else None
+    return url if url is not None else read_lesson_media(path)
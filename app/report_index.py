@@ -0,0 +1,150 @@
+import os
+import json
+import threading
+from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from result_frame import as_frame
+from file_lock import FileLock
+
+# fast parsers are optional, the stdlib json is always there
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# kept next to the day's result files; no .json suffix so it is never listed as a result
+INDEX_FILE = ".report_index"
+
+# threads of this process; the FileLock beside the index covers other server processes
+_lock = threading.Lock()
+
+
+def empty_index():
+    return {"error_counts": {}, "total_words": 0, "files": []}
+
+
+if msgspec is not None:
+    # only the fields the report needs; msgspec skips everything else while decoding
+    class _Assessment(msgspec.Struct):
+        ErrorType: str = "None"
+
+    class _Word(msgspec.Struct):
+        PronunciationAssessment: Optional[_Assessment] = None
+
+    class _NBest(msgspec.Struct):
+        Words: List[_Word] = []
+
+    class _Result(msgspec.Struct):
+        NBest: List[_NBest]
+
+    _error_decoder = msgspec.json.Decoder(_Result)
+
+
+def loads(data):
+    """Parse a JSON document with the fastest parser available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    if msgspec is not None:
+        return msgspec.json.decode(data)
+    return json.loads(data)
+
+
+def read_json(path):
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+def read_error_counts(path):
+    """Error counts and number of words of a result file, without building the full document."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if msgspec is None:
+        return count_errors(loads(data))
+    words = _error_decoder.decode(data).NBest[0].Words
+    error_counts = {}
+    for word in words:
+        if word.PronunciationAssessment is not None:
+            error_type = word.PronunciationAssessment.ErrorType
+            if error_type != 'None':
+                error_counts[error_type] = error_counts.get(error_type, 0) + 1
+    return error_counts, len(words)
+
+
+def scan_error_counts(folder_path, file_names, max_workers=8):
+    """
+    Yield (file_name, error_counts, total_words, error) for each file, in order.
+
+    Files are read and decoded on a thread pool; a file that cannot be read yields
+    its exception instead of counts.
+    """
+    def scan(file_name):
+        try:
+            counts, total = read_error_counts(os.path.join(folder_path, file_name))
+            return file_name, counts, total, None
+        except Exception as e:
+            return file_name, None, 0, e
+
+    if len(file_names) <= 1:
+        yield from map(scan, file_names)
+        return
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(file_names))) as executor:
+        yield from executor.map(scan, file_names)
+
+
+def count_errors(pronunciation_result):
+    """Error counts and number of words of one result (what the report aggregates)."""
+    frame = as_frame(pronunciation_result)
+    return frame.error_counts(), len(frame)
+
+
+def add_counts(index, file_name, error_counts, total_words):
+    """Fold already counted errors of one file into the index."""
+    if file_name in index["files"]:
+        return index
+    for error_type, count in error_counts.items():
+        index["error_counts"][error_type] = index["error_counts"].get(error_type, 0) + count
+    index["total_words"] += total_words
+    index["files"].append(file_name)
+    return index
+
+
+def load_index(folder_path):
+    path = os.path.join(folder_path, INDEX_FILE)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return empty_index()
+
+
+def save_index(folder_path, index):
+    path = os.path.join(folder_path, INDEX_FILE)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def merge_counts(folder_path, counted):
+    """
+    Fold [(file_name, error_counts, total_words), ...] into the saved index and return it.
+
+    The index is re-read under the lock, so concurrent writers (sessions, server
+    processes) never drop each other's files.
+    """
+    with _lock, FileLock(os.path.join(folder_path, f"{INDEX_FILE}.lock")):
+        index = load_index(folder_path)
+        for file_name, error_counts, total_words in counted:
+            add_counts(index, file_name, error_counts, total_words)
+        save_index(folder_path, index)
+        return index
+
+
+def update_index(folder_path, file_name, pronunciation_result):
+    """Called right after a result file is written, so reports never rescan it."""
+    error_counts, total_words = count_errors(pronunciation_result)
+    merge_counts(folder_path, [(file_name, error_counts, total_words)])
@@ -0,0 +1,93 @@
+import numpy as np
+
+# Azure reports offsets and durations in 100 ns ticks
+TICKS_PER_SECOND = 10000000
+SCORE_TYPES = ['AccuracyScore', 'FluencyScore', 'CompletenessScore', 'ProsodyScore', 'PronScore']
+
+
+class ResultFrame:
+    """
+    An Azure pronunciation result flattened once into column arrays.
+
+    Word columns (one row per NBest[0].Words entry): text, error_type ("None" when
+    absent), has_error_type, accuracy (0 when absent), offset/duration in seconds
+    (nan when absent), has_phonemes. Phoneme columns (one row per phoneme, words in
+    order): word_index, phoneme, accuracy, offset/duration in seconds. scores holds
+    the overall PronunciationAssessment. Every page consumer reads these arrays
+    instead of walking the nested JSON again.
+    """
+
+    def __init__(self, scores, words, phonemes):
+        self.scores = scores
+        self.text = np.asarray(words["text"], dtype=object)
+        self.error_type = np.asarray(words["error_type"], dtype=object)
+        self.has_error_type = np.asarray(words["has_error_type"], dtype=bool)
+        self.accuracy = np.asarray(words["accuracy"], dtype=float)
+        self.offset = np.asarray(words["offset"], dtype=float)
+        self.duration = np.asarray(words["duration"], dtype=float)
+        self.has_phonemes = np.asarray(words["has_phonemes"], dtype=bool)
+        self.phoneme_word_index = np.asarray(phonemes["word_index"], dtype=int)
+        self.phoneme = np.asarray(phonemes["phoneme"], dtype=object)
+        self.phoneme_accuracy = np.asarray(phonemes["accuracy"], dtype=float)
+        self.phoneme_offset = np.asarray(phonemes["offset"], dtype=float)
+        self.phoneme_duration = np.asarray(phonemes["duration"], dtype=float)
+        # phonemes of word i are phoneme rows [bounds[i], bounds[i + 1])
+        self.phoneme_bounds = np.searchsorted(self.phoneme_word_index, np.arange(len(self.text) + 1))
+
+    @classmethod
+    def from_result(cls, pronunciation_result):
+        nbest = pronunciation_result["NBest"][0]
+        overall = nbest.get("PronunciationAssessment", {})
+        words = {key: [] for key in ("text", "error_type", "has_error_type", "accuracy",
+                                     "offset", "duration", "has_phonemes")}
+        phonemes = {key: [] for key in ("word_index", "phoneme", "accuracy", "offset", "duration")}
+        for i, word in enumerate(nbest.get("Words", [])):
+            assessment = word.get("PronunciationAssessment", {})
+            words["text"].append(word.get("Word"))
+            words["error_type"].append(assessment.get("ErrorType") or "None")
+            words["has_error_type"].append("ErrorType" in assessment)
+            words["accuracy"].append(assessment.get("AccuracyScore", 0))
+            words["offset"].append(word.get("Offset", np.nan))
+            words["duration"].append(word.get("Duration", np.nan))
+            words["has_phonemes"].append("Phonemes" in word)
+            for phoneme in word.get("Phonemes", []):
+                phonemes["word_index"].append(i)
+                phonemes["phoneme"].append(phoneme.get("Phoneme"))
+                phonemes["accuracy"].append(phoneme.get("PronunciationAssessment", {}).get("AccuracyScore", 0))
+                phonemes["offset"].append(phoneme.get("Offset", np.nan))
+                phonemes["duration"].append(phoneme.get("Duration", np.nan))
+        for columns in (words, phonemes):
+            for key in ("offset", "duration"):
+                columns[key] = np.asarray(columns[key], dtype=float) / TICKS_PER_SECOND
+        scores = {score_type: overall.get(score_type) for score_type in SCORE_TYPES}
+        return cls(scores, words, phonemes)
+
+    def __len__(self):
+        return len(self.text)
+
+    @property
+    def end(self):
+        return self.offset + self.duration
+
+    @property
+    def phoneme_end(self):
+        return self.phoneme_offset + self.phoneme_duration
+
+    def error_counts(self):
+        """{error type: number of words}, words without errors left out."""
+        errors = self.error_type[self.error_type != "None"]
+        types, counts = np.unique(errors.astype(str), return_counts=True)
+        return dict(zip(types.tolist(), counts.tolist()))
+
+    def spoken(self):
+        """Mask of the assessed words that were actually said (what the waveform draws)."""
+        return self.has_error_type & (self.error_type != "Omission")
+
+    def phonemes_of(self, i):
+        """Slice of the phoneme rows of word i."""
+        return slice(self.phoneme_bounds[i], self.phoneme_bounds[i + 1])
+
+
+def as_frame(result):
+    """Accept either a ResultFrame or a raw Azure result."""
+    return result if isinstance(result, ResultFrame) else ResultFrame.from_result(result)
@@ -0,0 +1,212 @@
+import os
+import json
+import atexit
+import threading
+from collections import OrderedDict
+
+SCORE_TYPES = ['AccuracyScore', 'FluencyScore', 'CompletenessScore', 'ProsodyScore', 'PronScore']
+ERROR_TYPES = [
+    "省略 (Omission)",
+    "挿入 (Insertion)",
+    "発音ミス (Mispronunciation)",
+    "不適切な間 (UnexpectedBreak)",
+    "間の欠如 (MissingBreak)",
+    "単調 (Monotone)",
+]
+# only the counts are shown, the word lists in the totals are kept for reference
+MAX_TOTAL_WORDS = 100
+
+LOG_FILE = "events.jsonl"
+SNAPSHOT_FILE = "state.json"
+# legacy read-modify-write files, only read to seed the state of older days
+LEGACY_SCORES_FILE = "lesson_scores.json"
+LEGACY_ERRORS_FILE = "error_history.json"
+
+
+def empty_errors():
+    return {error_type: {'count': 0, 'words': []} for error_type in ERROR_TYPES}
+
+
+def empty_lesson():
+    return {
+        'scores': {score_type: [] for score_type in SCORE_TYPES},
+        'current': {},
+        'total': {},
+    }
+
+
+def apply_event(lessons, event):
+    """Fold one attempt record into the per-lesson state."""
+    lesson = lessons.setdefault(event['lesson'], empty_lesson())
+    for score_type in SCORE_TYPES:
+        lesson['scores'].setdefault(score_type, []).append(event['scores'].get(score_type))
+    current = empty_errors()
+    for error_type, words in event['errors'].items():
+        current[error_type] = {'count': len(words), 'words': list(words)}
+    lesson['current'] = current
+    for error_type, data in current.items():
+        total = lesson['total'].setdefault(error_type, {'count': 0, 'words': []})
+        total['count'] += data['count']
+        total['words'] = (total['words'] + data['words'])[-MAX_TOTAL_WORDS:]
+    return lessons
+
+
+class ScoreLog:
+    """
+    Append-only log of the scores and errors of one day's attempts.
+
+    Every attempt is one compact JSON line appended with a single O_APPEND write,
+    so concurrent tabs (or server processes) never lose each other's records and
+    an attempt costs O(1) I/O. Writes are fsynced in batches of sync_every. The
+    current per-lesson state is a snapshot plus the log tail after the snapshot's
+    offset; once the tail grows past compact_bytes the snapshot is rewritten
+    (temp file + atomic rename).
+    """
+
+    def __init__(self, scores_dir, sync_every=8, compact_bytes=64 * 1024):
+        self.scores_dir = scores_dir
+        self.log_path = os.path.join(scores_dir, LOG_FILE)
+        self.snapshot_path = os.path.join(scores_dir, SNAPSHOT_FILE)
+        self.sync_every = sync_every
+        self.compact_bytes = compact_bytes
+        self._unsynced = 0
+        self._fd = None
+        self._lock = threading.Lock()
+
+    def append(self, lesson_index, scores, error_data):
+        event = {
+            'lesson': int(lesson_index),
+            'scores': {score_type: scores.get(score_type) for score_type in SCORE_TYPES},
+            # counts are the lengths of the word lists, empty error types are left out
+            'errors': {error_type: data['words'] for error_type, data in error_data.items() if data['words']},
+        }
+        line = (json.dumps(event, ensure_ascii=False, separators=(',', ':')) + "\n").encode('utf-8')
+        with self._lock:
+            if self._fd is None:
+                os.makedirs(self.scores_dir, exist_ok=True)
+                self._fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            os.write(self._fd, line)
+            self._unsynced += 1
+            if self._unsynced >= self.sync_every:
+                self._sync_locked()
+
+    def flush(self):
+        with self._lock:
+            self._sync_locked()
+
+    def _sync_locked(self):
+        if self._fd is not None and self._unsynced:
+            os.fsync(self._fd)
+            self._unsynced = 0
+
+    def state(self, compact=False):
+        """
+        Per-lesson state {lesson_index: {'scores', 'current', 'total'}}.
+
+        With compact=True the snapshot is rewritten whatever the size of the tail.
+        """
+        snapshot = self._load_snapshot()
+        lessons = snapshot['lessons']
+        offset = snapshot['offset']
+        try:
+            with open(self.log_path, 'rb') as f:
+                f.seek(offset)
+                tail = f.read()
+        except FileNotFoundError:
+            tail = b""
+        # a line still being written by another process has no newline yet
+        complete = tail[:tail.rfind(b"\n") + 1]
+        for line in complete.splitlines():
+            if line.strip():
+                apply_event(lessons, json.loads(line))
+        if complete and (compact or len(complete) >= self.compact_bytes):
+            self._write_snapshot(lessons, offset + len(complete))
+        return lessons
+
+    def _load_snapshot(self):
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            snapshot['lessons'] = {int(k): v for k, v in snapshot['lessons'].items()}
+            return snapshot
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {'offset': 0, 'lessons': self._load_legacy()}
+
+    def _write_snapshot(self, lessons, offset):
+        tmp_path = f"{self.snapshot_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'offset': offset, 'lessons': lessons}, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+    def _load_legacy(self):
+        lessons = {}
+        scores_file = os.path.join(self.scores_dir, LEGACY_SCORES_FILE)
+        errors_file = os.path.join(self.scores_dir, LEGACY_ERRORS_FILE)
+        if os.path.exists(scores_file):
+            with open(scores_file, 'r', encoding='utf-8') as f:
+                for lesson_key, scores in json.load(f).items():
+                    lesson = lessons.setdefault(int(lesson_key.split('_')[1]), empty_lesson())
+                    lesson['scores'].update(scores)
+        if os.path.exists(errors_file):
+            with open(errors_file, 'r', encoding='utf-8') as f:
+                for lesson_key, errors in json.load(f).items():
+                    lesson = lessons.setdefault(int(lesson_key.split('_')[1]), empty_lesson())
+                    lesson['current'] = errors.get('current', {})
+                    lesson['total'] = errors.get('total', {})
+        return lessons
+
+    def close(self):
+        with self._lock:
+            self._sync_locked()
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+
+# open logs, least recently used first; each holds at most one file descriptor
+MAX_OPEN_LOGS = 64
+_logs = OrderedDict()
+_logs_lock = threading.Lock()
+
+
+def _close_log(log):
+    try:
+        log.close()
+    except Exception as e:
+        print(f"Failed to close the score log {log.log_path}: {e}")
+
+
+def _close_all():
+    with _logs_lock:
+        logs = list(_logs.values())
+        _logs.clear()
+    for log in logs:
+        _close_log(log)
+
+
+def get_score_log(user):
+    """
+    The user's log for today, shared by all of the user's sessions in this process.
+
+    One log is kept per user: the previous day's log is closed when the day changes,
+    and the least recently used logs are closed beyond MAX_OPEN_LOGS users.
+    """
+    scores_dir = os.path.join(user.today_path, "scores")
+    stale = []
+    with _logs_lock:
+        if not _logs:
+            atexit.register(_close_all)
+        log = _logs.get(user.user_path)
+        if log is None or log.scores_dir != scores_dir:
+            if log is not None:
+                stale.append(log)
+            log = ScoreLog(scores_dir)
+            _logs[user.user_path] = log
+        _logs.move_to_end(user.user_path)
+        while len(_logs) > MAX_OPEN_LOGS:
+            stale.append(_logs.popitem(last=False)[1])
+    for old_log in stale:
+        _close_log(old_log)
+    return log
@@ -0,0 +1,113 @@
+import re
+import difflib
+
+# punctuation around a word, hyphens and apostrophes inside it are kept
+_WORD_EDGES = r"^[^\w]+|[^\w]+$"
+
+
+def _normalize_word(word):
+    return re.sub(_WORD_EDGES, "", word.lower())
+
+
+def split_reference(reference_text):
+    """Words of a reference text as Azure counts them: split on whitespace, punctuation around them stripped."""
+    words = (re.sub(_WORD_EDGES, "", w) for w in reference_text.split())
+    return [w for w in words if w]
+
+
+def _reference_words(reference_text):
+    return [w.lower() for w in split_reference(reference_text)]
+
+
+def _weighted_mean(values, weights):
+    pairs = [(v, w) for v, w in zip(values, weights) if v is not None]
+    total = sum(w for _, w in pairs)
+    if not pairs or total <= 0:
+        return sum(v for v, _ in pairs) / len(pairs) if pairs else 0.0
+    return sum(v * w for v, w in pairs) / total
+
+
+def merge_segment_results(segments, reference_text):
+    """
+    Merge the per-segment results of continuous recognition into one result shaped
+    like a recognize_once result (NBest[0].PronunciationAssessment, Words, Offset,
+    Duration), so collect_errors, store_scores and create_waveform_plot work unchanged.
+
+    Segment omissions are recomputed against the whole reference text, word and
+    phoneme offsets are made monotonic across segments and the overall scores are
+    aggregated the way Azure's continuous-mode sample does.
+    """
+    if len(segments) == 1:
+        return segments[0]
+    if not segments:
+        raise RuntimeError("Speech could not be recognized")
+
+    words, durations, fluency, prosody = [], [], [], []
+    shift, last_end = 0, 0
+    for segment in segments:
+        offset = segment.get("Offset", 0)
+        # offsets are relative to the stream start; re-base a segment if they restarted
+        if offset + shift < last_end:
+            shift = last_end - offset
+        nbest = segment["NBest"][0]
+        for word in nbest.get("Words", []):
+            if word.get("PronunciationAssessment", {}).get("ErrorType") == "Omission":
+                continue
+            word = dict(word)
+            if "Offset" in word:
+                word["Offset"] += shift
+            if "Phonemes" in word:
+                word["Phonemes"] = [dict(p, Offset=p["Offset"] + shift) if "Offset" in p else p
+                                    for p in word["Phonemes"]]
+            words.append(word)
+        last_end = max(last_end, offset + shift + segment.get("Duration", 0))
+        assessment = nbest.get("PronunciationAssessment", {})
+        durations.append(segment.get("Duration", 0))
+        fluency.append(assessment.get("FluencyScore"))
+        prosody.append(assessment.get("ProsodyScore"))
+
+    # align recognized words against the full reference text to find misses
+    reference = _reference_words(reference_text)
+    recognized = [_normalize_word(w["Word"]) for w in words]
+    merged_words = []
+    matcher = difflib.SequenceMatcher(None, reference, recognized, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag in ("delete", "replace"):
+            merged_words += [{"Word": w, "PronunciationAssessment": {"AccuracyScore": 0, "ErrorType": "Omission"}}
+                             for w in reference[i1:i2]]
+        if tag in ("insert", "replace"):
+            for word in words[j1:j2]:
+                word["PronunciationAssessment"] = dict(word.get("PronunciationAssessment", {}), ErrorType="Insertion")
+                merged_words.append(word)
+        if tag == "equal":
+            merged_words += words[j1:j2]
+
+    errors = [w.get("PronunciationAssessment", {}).get("ErrorType", "None") for w in merged_words]
+    accuracy_scores = [w.get("PronunciationAssessment", {}).get("AccuracyScore", 0)
+                       for w, e in zip(merged_words, errors) if e != "Insertion"]
+    accuracy = sum(accuracy_scores) / len(accuracy_scores) if accuracy_scores else 0.0
+    completeness = 100.0 * sum(e not in ("Omission", "Insertion") for e in errors) / max(len(reference), 1)
+    fluency_score = _weighted_mean(fluency, durations)
+    prosody_score = _weighted_mean(prosody, durations)
+    ordered = sorted([accuracy, prosody_score, min(completeness, 100.0), fluency_score])
+    pron_score = ordered[0] * 0.4 + ordered[1] * 0.2 + ordered[2] * 0.2 + ordered[3] * 0.2
+
+    display = " ".join(s.get("DisplayText", "") for s in segments).strip()
+    first_offset = segments[0].get("Offset", 0)
+    return {
+        "RecognitionStatus": "Success",
+        "Offset": first_offset,
+        "Duration": last_end - first_offset,
+        "DisplayText": display,
+        "NBest": [{
+            "Display": display,
+            "PronunciationAssessment": {
+                "AccuracyScore": round(accuracy, 1),
+                "FluencyScore": round(fluency_score, 1),
+                "CompletenessScore": round(min(completeness, 100.0), 1),
+                "ProsodyScore": round(prosody_score, 1),
+                "PronScore": round(pron_score, 1),
+            },
+            "Words": merged_words,
+        }],
+    }
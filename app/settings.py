@@ -0,0 +1,18 @@
+def as_flag(value, default=False):
+    """
+    Boolean value of a st.secrets setting. TOML booleans pass through; strings such as
+    "false", "0", "no" or "off" (e.g. from environment overrides) are parsed instead of
+    being truthy.
+    """
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return value != 0
+    text = str(value).strip().lower()
+    if text in ("1", "true", "yes", "on"):
+        return True
+    if text in ("0", "false", "no", "off", ""):
+        return False
+    raise ValueError(f"Not a boolean setting: {value!r}")
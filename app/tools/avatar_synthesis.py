@@ -80,11 +80,12 @@ def get_synthesis(job_id):
         logger.error(f'Failed to get batch synthesis job: {response.text}')
         return None
 
-def download_video(url):
+def download_video(url, filename=None):
     logger.info(f'Attempting to download video from {url}')
     response = requests.get(url)
     if response.status_code == 200:
-        filename = f"avatar_video_{uuid.uuid4()}.mp4"
+        if filename is None:
+            filename = f"avatar_video_{uuid.uuid4()}.mp4"
         with open(filename, "wb") as f:
             f.write(response.content)
         logger.info(f'Video downloaded successfully to {filename}')
@@ -93,7 +94,8 @@ def download_video(url):
         logger.error(f"Failed to download video: {response.status_code}")
         return None
 
-def generate_avatar_video(text_input):
+def generate_avatar_video(text_input, output_path=None):
+    # save lesson videos as <lesson id>.mp4 so LessonCatalog pairs them with <lesson id>.txt
     logger.info(f'Generating avatar video for text: "{text_input}"')
     job_id = submit_synthesis(text_input)
     if job_id is None:
@@ -103,7 +105,7 @@ def generate_avatar_video(text_input):
         status = get_synthesis(job_id)
         if isinstance(status, str) and status.startswith('http'):  # It's the download URL
             logger.info('Batch avatar synthesis job succeeded')
-            video_path = download_video(status)
+            video_path = download_video(status, output_path)
             if video_path:
                 logger.info(f'Video generated and downloaded: {video_path}')
                 return video_path
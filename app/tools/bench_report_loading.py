@@ -0,0 +1,146 @@
+"""
+Benchmark of the report's result loading over a synthetic folder of results.
+
+Compares the old sequential stdlib json loading with the threaded loader using
+the fast parser, both as full documents and as error counts only.
+
+    python app/tools/bench_report_loading.py --files 10000
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+from collections import defaultdict
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import report_index
+from report_index import count_errors, read_json, scan_error_counts
+
+ERROR_TYPES = ["None"] * 6 + ["Mispronunciation", "Omission", "Insertion", "UnexpectedBreak", "MissingBreak", "Monotone"]
+PHONEMES = ["h", "ə", "l", "oʊ", "w", "ɝ", "d", "k", "æ", "t", "s", "ɪ", "n"]
+
+
+def synthetic_result(rng, n_words):
+    words, offset = [], 0
+    for i in range(n_words):
+        phonemes = []
+        for _ in range(rng.randint(2, 6)):
+            phonemes.append({
+                "Phoneme": rng.choice(PHONEMES),
+                "PronunciationAssessment": {"AccuracyScore": rng.randint(0, 100)},
+                "Offset": offset,
+                "Duration": 700000,
+            })
+            offset += 700000
+        words.append({
+            "Word": f"word{i}",
+            "Offset": phonemes[0]["Offset"],
+            "Duration": len(phonemes) * 700000,
+            "PronunciationAssessment": {
+                "AccuracyScore": rng.randint(0, 100),
+                "ErrorType": rng.choice(ERROR_TYPES),
+                "Feedback": {"Prosody": {"Break": {"ErrorTypes": ["None"], "BreakLength": 0}}},
+            },
+            "Syllables": [{"Syllable": "wɝd", "Offset": phonemes[0]["Offset"], "Duration": 1400000}],
+            "Phonemes": phonemes,
+        })
+    return {
+        "Id": "synthetic",
+        "RecognitionStatus": "Success",
+        "Offset": 0,
+        "Duration": offset,
+        "DisplayText": " ".join(w["Word"] for w in words),
+        "NBest": [{
+            "Confidence": 0.9,
+            "Lexical": " ".join(w["Word"] for w in words),
+            "PronunciationAssessment": {"AccuracyScore": 80, "FluencyScore": 80, "CompletenessScore": 90,
+                                        "ProsodyScore": 75, "PronScore": 80},
+            "Words": words,
+        }],
+    }
+
+
+def make_folder(folder_path, n_files, seed=0):
+    rng = random.Random(seed)
+    for i in range(n_files):
+        with open(os.path.join(folder_path, f"{i:06d}.json"), "w", encoding="utf-8") as f:
+            json.dump(synthetic_result(rng, rng.randint(5, 40)), f, ensure_ascii=False, indent=4)
+
+
+def sequential_stdlib(folder_path, files):
+    error_counts, total_words = defaultdict(int), 0
+    for file_name in files:
+        with open(os.path.join(folder_path, file_name), "r", encoding="utf-8") as f:
+            counts, words = count_errors(json.load(f))
+        total_words += words
+        for error_type, count in counts.items():
+            error_counts[error_type] += count
+    return dict(error_counts), total_words
+
+
+def threaded_full(folder_path, files, workers):
+    from concurrent.futures import ThreadPoolExecutor
+    error_counts, total_words = defaultdict(int), 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for content in executor.map(lambda name: read_json(os.path.join(folder_path, name)), files):
+            counts, words = count_errors(content)
+            total_words += words
+            for error_type, count in counts.items():
+                error_counts[error_type] += count
+    return dict(error_counts), total_words
+
+
+def threaded_counts(folder_path, files, workers):
+    error_counts, total_words = defaultdict(int), 0
+    for _, counts, words, error in scan_error_counts(folder_path, files, max_workers=workers):
+        if error is not None:
+            raise error
+        total_words += words
+        for error_type, count in counts.items():
+            error_counts[error_type] += count
+    return dict(error_counts), total_words
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--folder", default=None, help="reuse an existing folder of results")
+    args = parser.parse_args()
+
+    tmp = None
+    folder_path = args.folder
+    if folder_path is None:
+        tmp = tempfile.TemporaryDirectory()
+        folder_path = tmp.name
+        start = time.perf_counter()
+        make_folder(folder_path, args.files)
+        print(f"generated {args.files} results in {time.perf_counter() - start:.1f}s")
+    files = sorted(f for f in os.listdir(folder_path) if f.endswith(".json"))
+    parsers = [name for name, mod in (("orjson", report_index.orjson), ("msgspec", report_index.msgspec)) if mod]
+    print(f"{len(files)} files, fast parsers available: {', '.join(parsers) or 'none'}")
+
+    runs = [
+        ("sequential json.load", lambda: sequential_stdlib(folder_path, files)),
+        (f"threaded full documents ({args.workers} workers)", lambda: threaded_full(folder_path, files, args.workers)),
+        (f"threaded error fields only ({args.workers} workers)", lambda: threaded_counts(folder_path, files, args.workers)),
+    ]
+    expected = None
+    for name, run in runs:
+        start = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - start
+        if expected is None:
+            expected = result
+        status = "ok" if result == expected else "MISMATCH"
+        print(f"{name:45s} {elapsed:7.2f}s  {len(files) / elapsed:9.0f} files/s  {status}")
+
+    if tmp is not None:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Import users_info.json and the practice history folders into the SQLite user store.
+
+Run from the repository root; running it again only adds what is missing.
+
+    python app/tools/migrate_users.py
+    python app/tools/migrate_users.py --users-only --db database/all_users/users.db
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from user_store import SqliteUserStore, migrate_json_to_sqlite, USERS_INFO_PATH, SQLITE_PATH, DATABASE_ROOT
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users-info", default=USERS_INFO_PATH)
+    parser.add_argument("--database-root", default=DATABASE_ROOT)
+    parser.add_argument("--db", default=SQLITE_PATH)
+    parser.add_argument("--users-only", action="store_true", help="do not import the practice history")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    store = SqliteUserStore(args.db)
+    users_added, attempts_added = migrate_json_to_sqlite(
+        store, args.users_info, args.database_root, with_history=not args.users_only)
+    print(f"Added {users_added} users and {attempts_added} attempts to {args.db} "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,26 @@
 import json
 import os
 import streamlit as st
-import bcrypt
 from datetime import datetime
 from datetime import date
+from history_store import get_history_store
+from report_index import update_index
+from score_log import get_score_log
+from user_store import get_user_store
+from credentials import get_credential_service, CredentialsBusy
 
 class User:
-    user_info_path = "database/all_users/users_info.json"
     info_folder = "database/all_users/"
-    user_info = {}
 
-    # load user_info from json file
-    with open(user_info_path, "r") as f:
-        user_info = json.load(f)
+    @staticmethod
+    def store():
+        # accounts and the history index live in the configured storage backend
+        return get_user_store()
     
-    def __init__(self, name:str, password:str) -> None:
+    def __init__(self, name:str, password_hash:str) -> None:
         self.name = name
-        # hash the password to ensure the cybersecurity
-        self.password = User.hash_password(password)
+        # only the bcrypt hash is kept, hashing happens once at registration
+        self.password = password_hash
         self.user_path = f"database/{name}/"
         # every practice history will be stored 
         self.practice_history_path = self.user_path + "practice_history/"
@@ -32,31 +35,40 @@ class User:
         # suppose user's name is unique
         return hash(self.name)
 
-    def save_to_user_info(self) -> None:
-        # update the user_info like registering a new user
-        User.user_info[self.name] = {
-            "password": self.password,
-            "history": []
-        }
-        with open(User.user_info_path, 'w') as f:
-            json.dump(User.user_info, f, indent=4)
+    def save_to_user_info(self) -> bool:
+        # register the user in the store, False if the name was taken meanwhile
+        return User.store().add_user(self.name, self.password)
 
     def save_pron_history(self, selection:str, pronunciation_result:str):
         # save all the user's practice history
         # if the folder already exists, don't rewrite it 
         # create the history folder of today within the folder of self.practice_history
-        result_file_path = f"{self.today_path}{selection}-{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json"
-        with open(result_file_path, 'w') as f:
-            json.dump(pronunciation_result, f, indent=4)
+        recorded_at = datetime.now()
+        result_file_path = f"{self.today_path}{selection}-{recorded_at.strftime('%Y-%m-%d_%H-%M-%S')}.json"
+        # compact: the file is read back by programs, analytics use the history store
+        with open(result_file_path, 'w', encoding='utf-8') as f:
+            json.dump(pronunciation_result, f, ensure_ascii=False, separators=(',', ':'))
+        # index the attempt so history queries do not have to walk the folders
+        User.store().record_attempt(self.name, selection, recorded_at.replace(microsecond=0),
+                                    result_file_path, pronunciation_result)
+        # keep the day's report aggregates current instead of rescanning every file
+        update_index(self.today_path, os.path.basename(result_file_path), pronunciation_result)
+        # typed word/phoneme/utterance rows for analytics across days
+        get_history_store(self.user_path).append(selection, pronunciation_result, recorded_at,
+                                                 attempt_id=os.path.basename(result_file_path)[:-len(".json")])
     
     @classmethod
     def register(cls, name:str, password:str):
         # check if the user already existed 
-        if name in cls.user_info:
+        if cls.store().get_user(name) is not None:
             st.warning("ユーザーは既に存在しています!")
             return None
         # create directories of new user (big directory)
-        new_user = cls(name, password)
+        try:
+            new_user = cls(name, User.hash_password(password))
+        except CredentialsBusy:
+            st.warning("混み合っています。しばらくしてからもう一度お試しください。")
+            return None
         try:
             os.makedirs(new_user.user_path, exist_ok=False)
         except FileExistsError:
@@ -64,32 +76,21 @@ class User:
         except Exception as e:
             st.warning("エラーが生じました！実験実施者にご連絡してください！")
             print(f"An error occurred while creating the directory: {e}")
-        new_user.save_to_user_info()
+        if not new_user.save_to_user_info():
+            st.warning("ユーザーは既に存在しています!")
+            return None
         return new_user
     
-    def load_scores_history(self, lesson_index: int):
-        scores_dir = os.path.join(self.today_path, "scores")
-        json_file = os.path.join(scores_dir, "lesson_scores.json")
-        
-        # Initialize or reset scores history for current lesson
+    def load_scores_history(self, lesson_index: int, lessons=None):
+        # Initialize or reset scores history for current lesson;
+        # pass the score log's state() in to reuse one replay for several lessons
         if 'scores_history' not in st.session_state:
             st.session_state.scores_history = {}
         
-        # Load saved scores if file exists
-        if os.path.exists(json_file):
-            with open(json_file, 'r', encoding='utf-8') as f:
-                all_scores = json.load(f)
-                lesson_key = f"lesson_{lesson_index}"
-                
-                if lesson_key in all_scores:
-                    st.session_state.scores_history[lesson_index] = all_scores[lesson_key]
-                else:
-                    st.session_state.scores_history[lesson_index] = {
-                        'AccuracyScore': [],
-                        'FluencyScore': [],
-                        'CompletenessScore': [],
-                        'PronScore': []
-                    }
+        if lessons is None:
+            lessons = get_score_log(self).state()
+        if lesson_index in lessons:
+            st.session_state.scores_history[lesson_index] = lessons[lesson_index]['scores']
         else:
             st.session_state.scores_history[lesson_index] = {
                 'AccuracyScore': [],
@@ -98,11 +99,8 @@ class User:
                 'PronScore': []
             }
             
-    def load_errors_history(self, lesson_index: int):
+    def load_errors_history(self, lesson_index: int, lessons=None):
         """Load error history for specified lesson"""
-        scores_dir = os.path.join(self.today_path, "scores")
-        error_file = os.path.join(scores_dir, "error_history.json")
-        
         # Initialize error history if not exists
         if 'error_history' not in st.session_state:
             st.session_state.error_history = {
@@ -110,33 +108,41 @@ class User:
                 'total_errors': {}
             }
         
-        # Load saved errors if file exists
-        if os.path.exists(error_file):
-            with open(error_file, 'r', encoding='utf-8') as f:
-                all_errors = json.load(f)
-                lesson_key = f"lesson_{lesson_index}"
-                
-                if lesson_key in all_errors:
-                    st.session_state.error_history['current_errors'] = all_errors[lesson_key]['current']
-                    st.session_state.error_history['total_errors'][lesson_index] = all_errors[lesson_key]['total']
-                else:
-                    st.session_state.error_history['current_errors'] = {}
-                    st.session_state.error_history['total_errors'][lesson_index] = {}
+        if lessons is None:
+            lessons = get_score_log(self).state()
+        if lesson_index in lessons:
+            st.session_state.error_history['current_errors'] = lessons[lesson_index]['current']
+            st.session_state.error_history['total_errors'][lesson_index] = lessons[lesson_index]['total']
+        else:
+            st.session_state.error_history['current_errors'] = {}
+            st.session_state.error_history['total_errors'][lesson_index] = {}
 
     @classmethod
     def login(cls, name:str, password:str):
-        if name in User.user_info:
-            if User.check_password(User.user_info[name]['password'], password):
+        record = User.store().get_user(name)
+        if record is not None:
+            credentials = get_credential_service()
+            # only a session that submits the login form again with credentials it has
+            # already verified skips bcrypt; every first login still pays for it
+            try:
+                verified = (credentials.check_session_token(st.session_state.get('auth_token'), name, password,
+                                                            record['password'])
+                            or User.check_password(record['password'], password))
+            except CredentialsBusy:
+                st.warning("混み合っています。しばらくしてからもう一度お試しください。")
+                return None
+            if verified:
+                st.session_state.auth_token = credentials.session_token(name, password, record['password'])
                 # user's folder has been already created when in registration
-                return cls(name, password)
+                return cls(name, record['password'])
         st.warning('入力されたパスワードが間違っています！')
         
     @staticmethod
-    def hash_password(password, rounds=12):
-        return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds)).decode()
+    def hash_password(password):
+        return get_credential_service().hash_password(password)
     
     @staticmethod
     def check_password(hashed_password, user_password):
-        return bcrypt.checkpw(user_password.encode(), hashed_password.encode())
+        return get_credential_service().check_password(hashed_password, user_password)
     
 
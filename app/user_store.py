@@ -0,0 +1,385 @@
+import os
+import abc
+import json
+import sqlite3
+import threading
+from datetime import datetime
+import streamlit as st
+from file_lock import FileLock
+
+USERS_INFO_PATH = "database/all_users/users_info.json"
+SQLITE_PATH = "database/all_users/users.db"
+DATABASE_ROOT = "database/"
+SCORE_COLUMNS = {
+    "accuracy": "AccuracyScore",
+    "fluency": "FluencyScore",
+    "completeness": "CompletenessScore",
+    "prosody": "ProsodyScore",
+    "pron_score": "PronScore",
+}
+# result files are saved as <lesson>-<%Y-%m-%d_%H-%M-%S>.json
+TIMESTAMP_FORMAT = "%Y-%m-%d_%H-%M-%S"
+TIMESTAMP_LENGTH = 19
+
+
+def parse_result_file_name(file_name):
+    """(lesson, recorded_at) of a saved result file, None if it is not one."""
+    stem = os.path.splitext(file_name)[0]
+    try:
+        recorded_at = datetime.strptime(stem[-TIMESTAMP_LENGTH:], TIMESTAMP_FORMAT)
+    except ValueError:
+        return None
+    return stem[:-TIMESTAMP_LENGTH - 1], recorded_at
+
+
+def attempt_from_result(pronunciation_result):
+    """Scores and (word index, word, error type) of the erroneous words of one result."""
+    nbest = pronunciation_result["NBest"][0]
+    overall = nbest.get("PronunciationAssessment", {})
+    scores = {column: overall.get(key) for column, key in SCORE_COLUMNS.items()}
+    errors = []
+    for i, word in enumerate(nbest.get("Words", [])):
+        error_type = word.get("PronunciationAssessment", {}).get("ErrorType", "None")
+        if error_type and error_type != "None":
+            errors.append((i, word.get("Word"), error_type))
+    return scores, errors
+
+
+def iter_practice_history(name, database_root=DATABASE_ROOT):
+    """Yield (lesson, recorded_at, result_path, result) of every result file of a user."""
+    history_path = os.path.join(database_root, name, "practice_history")
+    if not os.path.isdir(history_path):
+        return
+    for day in sorted(os.listdir(history_path)):
+        day_path = os.path.join(history_path, day)
+        if not os.path.isdir(day_path):
+            continue
+        for file_name in sorted(os.listdir(day_path)):
+            if not file_name.endswith(".json"):
+                continue
+            parsed = parse_result_file_name(file_name)
+            if parsed is None:
+                continue
+            result_path = os.path.join(day_path, file_name)
+            try:
+                with open(result_path, "r", encoding="utf-8") as f:
+                    result = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"Skipping unreadable result {result_path}: {e}")
+                continue
+            yield parsed[0], parsed[1], result_path, result
+
+
+class UserStore(abc.ABC):
+    """
+    Where user accounts and the practice history index are kept.
+
+    get_user returns {"name", "password"} or None; add_user returns False when the
+    name is taken. attempts/error_counts answer history queries for a user,
+    optionally limited to a date range (inclusive, datetime.date) or a lesson.
+    """
+
+    @abc.abstractmethod
+    def get_user(self, name):
+        pass
+
+    @abc.abstractmethod
+    def add_user(self, name, password_hash):
+        pass
+
+    @abc.abstractmethod
+    def record_attempt(self, name, lesson, recorded_at, result_path, pronunciation_result):
+        pass
+
+    @abc.abstractmethod
+    def attempts(self, name, start_date=None, end_date=None, lesson=None):
+        pass
+
+    @abc.abstractmethod
+    def error_counts(self, name, start_date=None, end_date=None):
+        pass
+
+
+class JsonUserStore(UserStore):
+    """
+    The original layout: users_info.json plus the result files under each user's folder.
+
+    Several server processes may share the file: the parsed users are cached per
+    process and reloaded whenever the file's inode/mtime/size change, and registrations
+    re-read the file under an exclusive lock before writing it back atomically,
+    so no process overwrites users added by another one.
+    """
+
+    def __init__(self, users_info_path=USERS_INFO_PATH, database_root=DATABASE_ROOT):
+        self.users_info_path = users_info_path
+        self.database_root = database_root
+        self._lock = threading.Lock()
+        self._signature = None
+        self._user_info = {}
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.users_info_path)
+        except FileNotFoundError:
+            return None
+        # a rewrite replaces the file, so the inode changes even within one mtime tick
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _reload_locked(self):
+        signature = self._file_signature()
+        if signature == self._signature:
+            return
+        try:
+            with open(self.users_info_path, "r") as f:
+                self._user_info = json.load(f)
+        except FileNotFoundError:
+            self._user_info = {}
+        self._signature = signature
+
+    @property
+    def user_info(self):
+        with self._lock:
+            self._reload_locked()
+            return self._user_info
+
+    def get_user(self, name):
+        info = self.user_info.get(name)
+        return None if info is None else {"name": name, "password": info["password"]}
+
+    def add_user(self, name, password_hash):
+        with self._lock, FileLock(f"{self.users_info_path}.lock"):
+            # another process may have registered users since the last read
+            self._reload_locked()
+            if name in self._user_info:
+                return False
+            user_info = dict(self._user_info)
+            user_info[name] = {
+                "password": password_hash,
+                "history": []
+            }
+            tmp_path = f"{self.users_info_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(user_info, f, indent=4)
+            os.replace(tmp_path, self.users_info_path)
+            self._user_info = user_info
+            self._signature = self._file_signature()
+        return True
+
+    def record_attempt(self, name, lesson, recorded_at, result_path, pronunciation_result):
+        # the result file itself is the record
+        pass
+
+    def _filtered(self, name, start_date, end_date, lesson):
+        for attempt_lesson, recorded_at, result_path, result in iter_practice_history(name, self.database_root):
+            if start_date is not None and recorded_at.date() < start_date:
+                continue
+            if end_date is not None and recorded_at.date() > end_date:
+                continue
+            if lesson is not None and attempt_lesson != lesson:
+                continue
+            yield attempt_lesson, recorded_at, result_path, result
+
+    def attempts(self, name, start_date=None, end_date=None, lesson=None):
+        rows = []
+        for attempt_lesson, recorded_at, result_path, result in self._filtered(name, start_date, end_date, lesson):
+            scores, _ = attempt_from_result(result)
+            rows.append(dict(lesson=attempt_lesson, recorded_at=recorded_at, result_path=result_path, **scores))
+        return rows
+
+    def error_counts(self, name, start_date=None, end_date=None):
+        counts = {}
+        for _, _, _, result in self._filtered(name, start_date, end_date, None):
+            for _, _, error_type in attempt_from_result(result)[1]:
+                counts[error_type] = counts.get(error_type, 0) + 1
+        return counts
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    name TEXT PRIMARY KEY,
+    password TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS attempts (
+    id INTEGER PRIMARY KEY,
+    user_name TEXT NOT NULL REFERENCES users(name),
+    lesson TEXT,
+    recorded_at TEXT NOT NULL,
+    result_path TEXT UNIQUE,
+    accuracy REAL,
+    fluency REAL,
+    completeness REAL,
+    prosody REAL,
+    pron_score REAL
+);
+CREATE INDEX IF NOT EXISTS attempts_user_time ON attempts(user_name, recorded_at);
+CREATE INDEX IF NOT EXISTS attempts_user_lesson ON attempts(user_name, lesson, recorded_at);
+CREATE TABLE IF NOT EXISTS errors (
+    attempt_id INTEGER NOT NULL REFERENCES attempts(id) ON DELETE CASCADE,
+    word_index INTEGER NOT NULL,
+    word TEXT,
+    error_type TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS errors_attempt ON errors(attempt_id);
+CREATE INDEX IF NOT EXISTS errors_type ON errors(error_type);
+"""
+
+
+class SqliteUserStore(UserStore):
+    """
+    Users, attempts, scores and per-word errors in one SQLite database (WAL mode).
+
+    One connection is opened per store and shared by all threads (Streamlit runs
+    every script rerun on a new thread), serialized by a lock; the queries are
+    short, so sessions barely wait for each other. WAL lets other server
+    processes read while this one writes.
+    """
+
+    def __init__(self, db_path=SQLITE_PATH, timeout=10):
+        self.db_path = db_path
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=timeout, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SQLITE_SCHEMA)
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def has_users(self):
+        return bool(self._query("SELECT 1 FROM users LIMIT 1"))
+
+    def users(self):
+        """Every account as {"name", "password"}, for exporting back to users_info.json."""
+        return [dict(row) for row in self._query("SELECT name, password FROM users ORDER BY created_at, name")]
+
+    def get_user(self, name):
+        rows = self._query("SELECT name, password FROM users WHERE name = ?", (name,))
+        return dict(rows[0]) if rows else None
+
+    def add_user(self, name, password_hash, created_at=None):
+        created_at = (created_at or datetime.now()).isoformat(timespec="seconds")
+        with self._lock, self._conn as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO users (name, password, created_at) VALUES (?, ?, ?)",
+                (name, password_hash, created_at))
+        return cursor.rowcount == 1
+
+    def record_attempt(self, name, lesson, recorded_at, result_path, pronunciation_result):
+        scores, errors = attempt_from_result(pronunciation_result)
+        with self._lock, self._conn as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO attempts (user_name, lesson, recorded_at, result_path, "
+                "accuracy, fluency, completeness, prosody, pron_score) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (name, lesson, recorded_at.isoformat(timespec="seconds"), result_path,
+                 *[scores[column] for column in SCORE_COLUMNS]))
+            if cursor.rowcount != 1:
+                # already recorded (e.g. by the migration tool)
+                return None
+            attempt_id = cursor.lastrowid
+            conn.executemany(
+                "INSERT INTO errors (attempt_id, word_index, word, error_type) VALUES (?, ?, ?, ?)",
+                [(attempt_id, i, word, error_type) for i, word, error_type in errors])
+        return attempt_id
+
+    @staticmethod
+    def _range(start_date, end_date):
+        conditions, params = [], []
+        if start_date is not None:
+            conditions.append("a.recorded_at >= ?")
+            params.append(start_date.isoformat())
+        if end_date is not None:
+            # dates compare as prefixes of the ISO timestamps
+            conditions.append("a.recorded_at < ?")
+            params.append(f"{end_date.isoformat()}~")
+        return conditions, params
+
+    def attempts(self, name, start_date=None, end_date=None, lesson=None):
+        conditions, params = self._range(start_date, end_date)
+        if lesson is not None:
+            conditions.append("a.lesson = ?")
+            params.append(lesson)
+        where = "".join(f" AND {c}" for c in conditions)
+        rows = self._query(
+            f"SELECT a.lesson, a.recorded_at, a.result_path, {', '.join(SCORE_COLUMNS)} "
+            f"FROM attempts a WHERE a.user_name = ?{where} ORDER BY a.recorded_at",
+            (name, *params))
+        return [dict(row, recorded_at=datetime.fromisoformat(row["recorded_at"])) for row in rows]
+
+    def error_counts(self, name, start_date=None, end_date=None):
+        conditions, params = self._range(start_date, end_date)
+        where = "".join(f" AND {c}" for c in conditions)
+        rows = self._query(
+            f"SELECT e.error_type, COUNT(*) FROM errors e JOIN attempts a ON a.id = e.attempt_id "
+            f"WHERE a.user_name = ?{where} GROUP BY e.error_type",
+            (name, *params))
+        return {error_type: count for error_type, count in rows}
+
+
+def migrate_json_to_sqlite(store, users_info_path=USERS_INFO_PATH, database_root=DATABASE_ROOT, with_history=True):
+    """
+    Copy users (and optionally every saved result) from the JSON layout into a SqliteUserStore.
+
+    Safe to run again: existing users and already recorded result files are skipped.
+    Returns (users added, attempts added).
+    """
+    with open(users_info_path, "r") as f:
+        user_info = json.load(f)
+    users_added = attempts_added = 0
+    for name, info in user_info.items():
+        users_added += store.add_user(name, info["password"])
+        if not with_history:
+            continue
+        for lesson, recorded_at, result_path, result in iter_practice_history(name, database_root):
+            try:
+                if store.record_attempt(name, lesson, recorded_at, result_path, result) is not None:
+                    attempts_added += 1
+            except (KeyError, IndexError, TypeError) as e:
+                print(f"Skipping malformed result {result_path}: {e}")
+    return users_added, attempts_added
+
+
+def export_sqlite_to_json(store, json_store):
+    """
+    Add the accounts of a SqliteUserStore that users_info.json does not have yet, so
+    switching back to the JSON backend keeps users registered since the switch.
+    Returns the number of users added.
+    """
+    return sum(json_store.add_user(user["name"], user["password"])
+               for user in store.users() if json_store.get_user(user["name"]) is None)
+
+
+@st.cache_resource
+def get_user_store():
+    """
+    The configured store, shared by all sessions of the server process.
+
+    [Storage] BACKEND = "sqlite" (default) or "json" selects the backend. A new
+    SQLite database is seeded with the accounts of users_info.json; use
+    app/tools/migrate_users.py to import the practice history as well. The SQLite
+    backend does not write users_info.json, so falling back to "json" first copies
+    the accounts registered in the database since then back into the file.
+    """
+    settings = st.secrets.get("Storage", {})
+    users_info_path = settings.get("USERS_INFO_PATH", USERS_INFO_PATH)
+    db_path = settings.get("DB_PATH", SQLITE_PATH)
+    if settings.get("BACKEND", "sqlite") == "json":
+        store = JsonUserStore(users_info_path)
+        if os.path.exists(db_path):
+            users_added = export_sqlite_to_json(SqliteUserStore(db_path), store)
+            print(f"Exported {users_added} users from {db_path} to {users_info_path}")
+        return store
+    store = SqliteUserStore(db_path)
+    if not store.has_users() and os.path.exists(users_info_path):
+        users_added, _ = migrate_json_to_sqlite(store, users_info_path, with_history=False)
+        print(f"Imported {users_added} users from {users_info_path}")
+    return store
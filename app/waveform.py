@@ -0,0 +1,48 @@
+import numpy as np
+
+
+def min_max_envelope(y, n_bins):
+    """
+    Per-bin minimum and maximum of a signal, so a plot of n_bins columns looks like the full one.
+
+    Returns (lows, highs, bin_size); the last bin is padded with the last sample.
+    """
+    bin_size = max(1, int(np.ceil(len(y) / n_bins)))
+    n = int(np.ceil(len(y) / bin_size))
+    frames = np.pad(y, (0, n * bin_size - len(y)), mode="edge").reshape(n, bin_size)
+    return frames.min(axis=1), frames.max(axis=1), bin_size
+
+
+def waveform_data(y, sr, frame, n_points=400):
+    """
+    Compact input of the browser-side waveform chart, small enough to keep in the session.
+
+    The envelope is two arrays of n_points amplitudes (2 decimals) spaced step seconds
+    apart, the chart derives the times; words and phonemes of a ResultFrame are
+    column arrays with times in seconds (3 decimals).
+    """
+    lows, highs, bin_size = min_max_envelope(y, n_points)
+    # rounded float32 values still print with 8 digits or more once they are Python floats
+    lows, highs = lows.astype(np.float64), highs.astype(np.float64)
+    spoken = np.flatnonzero(frame.spoken() & ~np.isnan(frame.offset))
+    phonemes = np.isin(frame.phoneme_word_index, spoken)
+    return {
+        "duration": round(len(y) / sr, 3),
+        "step": bin_size / sr,
+        "lo": np.round(lows, 2).tolist(),
+        "hi": np.round(highs, 2).tolist(),
+        "words": {
+            "word": frame.text[spoken].tolist(),
+            "start": np.round(frame.offset[spoken], 3).tolist(),
+            "end": np.round(frame.end[spoken], 3).tolist(),
+            "score": frame.accuracy[spoken].tolist(),
+            "error": frame.error_type[spoken].tolist(),
+        },
+        "phonemes": {
+            "phoneme": frame.phoneme[phonemes].tolist(),
+            "word": frame.text[frame.phoneme_word_index[phonemes]].tolist(),
+            "start": np.round(frame.phoneme_offset[phonemes], 3).tolist(),
+            "end": np.round(frame.phoneme_end[phonemes], 3).tolist(),
+            "score": frame.phoneme_accuracy[phonemes].tolist(),
+        },
+    }
@@ -5,10 +5,15 @@ import soundfile
 from openvoice import utils
 from openvoice import commons
 import os
-import librosa
+import queue
+import threading
+from openvoice.audio import load_audio
+from concurrent.futures import ThreadPoolExecutor
 from openvoice.text import text_to_sequence
-from openvoice.mel_processing import spectrogram_torch
+from openvoice.mel_processing import spectrogram_torch, StreamingSpectrogram
 from openvoice.models import SynthesizerTrn
+from openvoice.pipeline import AudioPipeline
+from openvoice.cache import ConversionCache
 
 
 class OpenVoiceBaseClass(object):
@@ -108,28 +113,38 @@ class ToneColorConverter(OpenVoiceBaseClass):
         else:
             self.watermark_model = None
         self.version = getattr(self.hps, '_version_', "v1")
+        self.output_cache = None
 
+    def enable_output_cache(self, cache_dir, max_bytes=1 << 30, max_memory_items=32):
+        # repeated convert() calls with identical inputs are served from this cache
+        self.output_cache = ConversionCache(cache_dir, max_bytes=max_bytes, max_memory_items=max_memory_items)
+        return self.output_cache
 
 
-    def extract_se(self, ref_wav_list, se_save_path=None):
+
+    def extract_se(self, ref_wav_list, se_save_path=None, num_workers=4):
         if isinstance(ref_wav_list, str):
             ref_wav_list = [ref_wav_list]
         
         device = self.device
         hps = self.hps
-        gs = []
-        
-        for fname in ref_wav_list:
-            audio_ref, sr = librosa.load(fname, sr=hps.data.sampling_rate)
-            y = torch.FloatTensor(audio_ref)
+
+        def load(fname):
+            audio_ref, sr = load_audio(fname, sr=hps.data.sampling_rate)
+            return audio_ref
+
+        def infer(audio_ref):
+            y = torch.from_numpy(audio_ref)
             y = y.to(device)
             y = y.unsqueeze(0)
             y = spectrogram_torch(y, hps.data.filter_length,
                                         hps.data.sampling_rate, hps.data.hop_length, hps.data.win_length,
                                         center=False).to(device)
-            with torch.no_grad():
-                g = self.model.ref_enc(y.transpose(1, 2)).unsqueeze(-1)
-                gs.append(g.detach())
+            return self.se_from_spec(y)
+
+        # decoding of the next segment overlaps the reference encoder on the current one
+        pipeline = AudioPipeline(load, infer, num_workers=num_workers)
+        gs = list(pipeline.run(ref_wav_list))
         gs = torch.stack(gs).mean(0)
 
         if se_save_path is not None:
@@ -138,27 +153,203 @@ class ToneColorConverter(OpenVoiceBaseClass):
 
         return gs
 
-    def convert(self, audio_src_path, src_se, tgt_se, output_path=None, tau=0.3, message="default"):
+    def streaming_spectrogram(self):
         hps = self.hps
-        # load audio
-        audio, sample_rate = librosa.load(audio_src_path, sr=hps.data.sampling_rate)
-        audio = torch.tensor(audio).float()
-        
+        return StreamingSpectrogram(hps.data.filter_length, hps.data.sampling_rate,
+                                    hps.data.hop_length, hps.data.win_length, device=self.device)
+
+    def se_from_spec(self, spec):
+        # spec is [1, freq, T], e.g. the concatenated frames of streaming_spectrogram()
         with torch.no_grad():
-            y = torch.FloatTensor(audio).to(self.device)
-            y = y.unsqueeze(0)
-            spec = spectrogram_torch(y, hps.data.filter_length,
-                                    hps.data.sampling_rate, hps.data.hop_length, hps.data.win_length,
-                                    center=False).to(self.device)
-            spec_lengths = torch.LongTensor([spec.size(-1)]).to(self.device)
-            audio = self.model.voice_conversion(spec, spec_lengths, sid_src=src_se, sid_tgt=tgt_se, tau=tau)[0][
-                        0, 0].data.cpu().float().numpy()
-            audio = self.add_watermark(audio, message)
-            if output_path is None:
+            g = self.model.ref_enc(spec.transpose(1, 2)).unsqueeze(-1)
+        return g.detach()
+
+    def convert(self, audio_src_path, src_se, tgt_se, output_path=None, tau=0.3, message="default"):
+        hps = self.hps
+        cache_key = None
+        audio = None
+        if self.output_cache is not None:
+            cache_key = self.output_cache.key(audio_src_path, src_se, tgt_se, tau, message, self.version)
+            audio = self.output_cache.get(cache_key)
+
+        if audio is None:
+            # load audio
+            audio, sample_rate = load_audio(audio_src_path, sr=hps.data.sampling_rate)
+
+            with torch.no_grad():
+                # load_audio already returns contiguous float32, share its memory
+                y = torch.from_numpy(audio).to(self.device)
+                y = y.unsqueeze(0)
+                spec = spectrogram_torch(y, hps.data.filter_length,
+                                        hps.data.sampling_rate, hps.data.hop_length, hps.data.win_length,
+                                        center=False).to(self.device)
+                spec_lengths = torch.LongTensor([spec.size(-1)]).to(self.device)
+                audio = self.model.voice_conversion(spec, spec_lengths, sid_src=src_se, sid_tgt=tgt_se, tau=tau)[0][
+                            0, 0].data.cpu().float().numpy()
+                audio = self.add_watermark(audio, message)
+            if cache_key is not None:
+                self.output_cache.put(cache_key, audio)
+
+        if output_path is None:
+            return audio
+        else:
+            soundfile.write(output_path, audio, hps.data.sampling_rate)
+    
+    def convert_pipelined(self, audio_src_paths, src_se, tgt_se, output_paths=None, tau=0.3, message="default",
+                          num_workers=4, max_in_flight=4):
+        """
+        Convert sources one by one while decoding and writing run on a thread pool.
+
+        Unlike convert_many this keeps batch size 1 (lowest per-item latency). Sources
+        found in output_cache skip the model and new outputs are stored in it, like
+        convert. Returns a list in input order of the output paths when output_paths is
+        given, otherwise of the converted audios; all files are written when it returns.
+        """
+        hps = self.hps
+        if output_paths is not None:
+            assert len(output_paths) == len(audio_src_paths), "one output path per source is required"
+        jobs = list(zip(audio_src_paths, output_paths if output_paths is not None else [None] * len(audio_src_paths)))
+
+        def load(job):
+            # runs on the pool, so hashing the source for the cache key overlaps the model too
+            cache_key = None
+            if self.output_cache is not None:
+                cache_key = self.output_cache.key(job[0], src_se, tgt_se, tau, message, self.version)
+                audio = self.output_cache.get(cache_key)
+                if audio is not None:
+                    return audio, cache_key, True
+            audio, _ = load_audio(job[0], sr=hps.data.sampling_rate)
+            return audio, cache_key, False
+
+        def infer(loaded):
+            audio, cache_key, cached = loaded
+            if cached:
                 return audio
+            with torch.no_grad():
+                y = torch.from_numpy(audio).to(self.device).unsqueeze(0)
+                spec = spectrogram_torch(y, hps.data.filter_length,
+                                         hps.data.sampling_rate, hps.data.hop_length, hps.data.win_length,
+                                         center=False).to(self.device)
+                spec_lengths = torch.LongTensor([spec.size(-1)]).to(self.device)
+                audio = self.model.voice_conversion(spec, spec_lengths, sid_src=src_se, sid_tgt=tgt_se, tau=tau)[0][
+                            0, 0].data.cpu().float().numpy()
+            audio = self.add_watermark(audio, message)
+            if cache_key is not None:
+                self.output_cache.put(cache_key, audio)
+            return audio
+
+        write = None
+        if output_paths is not None:
+            def write(job, audio):
+                soundfile.write(job[1], audio, hps.data.sampling_rate)
+                return job[1]
+
+        pipeline = AudioPipeline(load, infer, write, num_workers=num_workers, max_in_flight=max_in_flight)
+        return list(pipeline.run(jobs))
+
+    def convert_many(self, audio_src_paths, src_se, tgt_se, output_paths=None, tau=0.3, message="default",
+                     batch_size=8, num_workers=4):
+        """
+        Batched version of convert for many sources and one target speaker.
+
+        Sources are decoded on a thread pool (the next micro-batch is loaded while the
+        current one runs), spectrograms are padded into one batch with spec_lengths and
+        voice_conversion runs once per micro-batch. Each output is trimmed by y_mask.
+        src_se is either one embedding shared by all sources or a list with one per source.
+        Sources found in output_cache are not loaded or converted again and new outputs
+        are stored in it, like convert. If output_paths is given, files are written by a
+        background thread; otherwise the converted audios are returned in input order.
+        """
+        hps = self.hps
+        hop_length = hps.data.hop_length
+        if output_paths is not None:
+            assert len(output_paths) == len(audio_src_paths), "one output path per source is required"
+        src_ses = src_se if isinstance(src_se, (list, tuple)) else [src_se] * len(audio_src_paths)
+        assert len(src_ses) == len(audio_src_paths), "one source embedding per source is required"
+
+        def load(path):
+            audio, _ = load_audio(path, sr=hps.data.sampling_rate)
+            return audio
+
+        results = [None] * len(audio_src_paths)
+        write_queue = queue.Queue(maxsize=2 * batch_size)
+        write_errors = []
+
+        def writer():
+            while True:
+                item = write_queue.get()
+                if item is None:
+                    break
+                path, audio = item
+                try:
+                    soundfile.write(path, audio, hps.data.sampling_rate)
+                except Exception as e:
+                    write_errors.append((path, e))
+
+        writer_thread = None
+        if output_paths is not None:
+            writer_thread = threading.Thread(target=writer, name="convert_many-writer", daemon=True)
+            writer_thread.start()
+
+        def emit(i, audio):
+            if writer_thread is None:
+                results[i] = audio
             else:
-                soundfile.write(output_path, audio, hps.data.sampling_rate)
-    
+                write_queue.put((output_paths[i], audio))
+
+        cache_keys = [None] * len(audio_src_paths)
+        cached, todo = {}, []
+        for i, path in enumerate(audio_src_paths):
+            if self.output_cache is not None:
+                cache_keys[i] = self.output_cache.key(path, src_ses[i], tgt_se, tau, message, self.version)
+                audio = self.output_cache.get(cache_keys[i])
+                if audio is not None:
+                    cached[i] = audio
+                    continue
+            todo.append(i)
+
+        batches = [todo[i:i + batch_size] for i in range(0, len(todo), batch_size)]
+        try:
+            for i, audio in cached.items():
+                emit(i, audio)
+            with ThreadPoolExecutor(max_workers=num_workers) as executor:
+                pending = [executor.submit(load, audio_src_paths[i]) for i in batches[0]] if batches else []
+                for b, indices in enumerate(batches):
+                    audios = [f.result() for f in pending]
+                    if b + 1 < len(batches):
+                        pending = [executor.submit(load, audio_src_paths[i]) for i in batches[b + 1]]
+
+                    with torch.no_grad():
+                        specs = [spectrogram_torch(torch.from_numpy(a).to(self.device).unsqueeze(0),
+                                                   hps.data.filter_length, hps.data.sampling_rate,
+                                                   hop_length, hps.data.win_length, center=False)
+                                 for a in audios]
+                        spec_lengths = torch.LongTensor([s.size(-1) for s in specs]).to(self.device)
+                        max_len = int(spec_lengths.max())
+                        spec = torch.cat([torch.nn.functional.pad(s, (0, max_len - s.size(-1))) for s in specs])
+                        g_src = torch.cat([src_ses[i] for i in indices]).to(self.device)
+                        g_tgt = tgt_se.expand(len(indices), -1, -1)
+                        o_hat, y_mask, _ = self.model.voice_conversion(spec, spec_lengths, sid_src=g_src,
+                                                                       sid_tgt=g_tgt, tau=tau)
+                        n_samples = (y_mask.sum(dim=(1, 2)).long() * hop_length).tolist()
+                        o_hat = o_hat[:, 0].data.cpu().float().numpy()
+
+                    for j, i in enumerate(indices):
+                        audio = self.add_watermark(o_hat[j, :n_samples[j]].copy(), message)
+                        if cache_keys[i] is not None:
+                            self.output_cache.put(cache_keys[i], audio)
+                        emit(i, audio)
+        finally:
+            if writer_thread is not None:
+                write_queue.put(None)
+                writer_thread.join()
+
+        if write_errors:
+            path, e = write_errors[0]
+            raise RuntimeError(f"failed to write {len(write_errors)} file(s), first: {path}") from e
+        if writer_thread is None:
+            return results
+
     def add_watermark(self, audio, message):
         if self.watermark_model is None:
             return audio
@@ -0,0 +1,58 @@
+import math
+import numpy as np
+import soundfile
+
+try:
+    import soxr
+except ImportError:
+    soxr = None
+
+# load_audio's output only feeds the models and the analysis plots, where soxr's
+# medium preset is good enough and somewhat cheaper than librosa's default soxr_hq
+MODEL_QUALITY = "MQ"
+
+
+def resample(y, orig_sr, target_sr, quality="HQ"):
+    """
+    Polyphase resampling along the last axis.
+
+    quality is a soxr preset ("QQ", "LQ", "MQ", "HQ", "VHQ"); it is ignored when
+    soxr is missing and scipy's resample_poly is used instead.
+    """
+    if orig_sr == target_sr:
+        return y
+    if soxr is not None:
+        # soxr expects (frames, channels)
+        return soxr.resample(y.T, orig_sr, target_sr, quality=quality).T.astype(np.float32, copy=False)
+    from scipy.signal import resample_poly
+    g = math.gcd(int(orig_sr), int(target_sr))
+    return resample_poly(y, int(target_sr) // g, int(orig_sr) // g, axis=-1).astype(np.float32, copy=False)
+
+
+def load_audio(path, sr=None, mono=True, quality=MODEL_QUALITY):
+    """
+    Drop-in replacement for librosa.load on the hot paths.
+
+    Decodes with soundfile (file paths or file-like objects) and only falls back to
+    librosa/audioread for formats libsndfile cannot read (e.g. m4a). Resampling is
+    skipped when the native rate already matches sr (sr=None keeps the native rate);
+    pass quality="HQ" to match librosa's resampling when the audio is played back.
+    Returns (float32 array, sample rate) with channels first when mono=False, like librosa.
+    """
+    try:
+        y, native_sr = soundfile.read(path, dtype="float32")
+        # soundfile gives (frames, channels); librosa's layout is channels first
+        y = y.T
+    except (RuntimeError, TypeError, soundfile.LibsndfileError):
+        import librosa
+        if hasattr(path, "seek"):
+            path.seek(0)
+        y, native_sr = librosa.load(path, sr=None, mono=False)
+
+    if mono and y.ndim > 1:
+        y = y.mean(axis=0)
+
+    if sr is not None and sr != native_sr:
+        y = resample(y, native_sr, sr, quality=quality)
+        native_sr = sr
+    return np.ascontiguousarray(y, dtype=np.float32), native_sr
@@ -0,0 +1,139 @@
+import os
+import hashlib
+import threading
+import collections
+import numpy as np
+
+
+def hash_file(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def hash_tensor(t):
+    return hashlib.sha256(t.detach().cpu().float().numpy().tobytes()).hexdigest()
+
+
+class ConversionCache(object):
+    """
+    Two-tier cache of converted audio keyed by a hash of the conversion inputs.
+
+    The in-memory tier is a small LRU of float32 arrays; the on-disk tier is a
+    content-addressed directory of .npy files (cache_dir/ab/abcdef....npy) whose
+    total size is kept under max_bytes by evicting the least recently used files.
+    The directory is scanned once at start-up; afterwards an in-memory LRU index
+    of the files and a running size total are kept, so a store never rescans it.
+    """
+
+    def __init__(self, cache_dir, max_bytes=1 << 30, max_memory_items=32, max_source_hashes=4096):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_memory_items = max_memory_items
+        self.max_source_hashes = max_source_hashes
+        self._memory = collections.OrderedDict()
+        self._file_hashes = collections.OrderedDict()
+        # path -> size, least recently used first
+        self._disk = collections.OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        for path, _, size in sorted(self._entries(), key=lambda e: e[1]):
+            self._disk[path] = size
+        self._disk_bytes = sum(self._disk.values())
+
+    def source_hash(self, path):
+        # avoid re-reading unchanged source files
+        st = os.stat(path)
+        stamp = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+        with self._lock:
+            digest = self._file_hashes.get(stamp)
+            if digest is not None:
+                self._file_hashes.move_to_end(stamp)
+                return digest
+        digest = hash_file(path)
+        with self._lock:
+            self._file_hashes[stamp] = digest
+            while len(self._file_hashes) > self.max_source_hashes:
+                self._file_hashes.popitem(last=False)
+        return digest
+
+    def key(self, audio_src_path, src_se, tgt_se, tau, message, version=""):
+        parts = [self.source_hash(audio_src_path), hash_tensor(src_se), hash_tensor(tgt_se),
+                 repr(float(tau)), str(message), str(version)]
+        return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".npy")
+
+    def _entries(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for f in files:
+                if f.endswith(".npy"):
+                    path = os.path.join(root, f)
+                    st = os.stat(path)
+                    yield path, st.st_mtime, st.st_size
+
+    def _remember(self, key, audio):
+        self._memory[key] = audio
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                return audio.copy()
+            path = self._path(key)
+            if not os.path.exists(path):
+                return None
+            try:
+                audio = np.load(path)
+                os.utime(path)
+            except (OSError, ValueError):
+                return None
+            self._touch(path)
+            self._remember(key, audio)
+            return audio.copy()
+
+    def put(self, key, audio):
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+        with self._lock:
+            self._remember(key, audio.copy())
+            path = self._path(key)
+            if os.path.exists(path):
+                os.utime(path)
+                self._touch(path)
+                return
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, audio)
+            os.replace(tmp_path, path)
+            self._touch(path)
+            if self._disk_bytes > self.max_bytes:
+                self._evict()
+
+    def _touch(self, path):
+        # mark as most recently used, picking up files written by other processes
+        if path in self._disk:
+            self._disk.move_to_end(path)
+            return
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        self._disk[path] = size
+        self._disk_bytes += size
+
+    def _evict(self):
+        while self._disk_bytes > self.max_bytes and self._disk:
+            path, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            try:
+                os.remove(path)
+            except OSError:
+                pass
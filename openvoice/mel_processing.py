@@ -75,6 +75,110 @@ def spectrogram_torch(y, n_fft, sampling_rate, hop_size, win_size, center=False)
     return spec
 
 
+class StreamingSpectrogram(object):
+    """
+    Incremental version of spectrogram_torch for live input.
+
+    Chunks of any size are pushed as they arrive; frames are emitted as soon as
+    a full window is available. The left reflect padding is rebuilt once the
+    first pad + 1 samples are known and the right padding is applied by flush(),
+    so the concatenated output matches spectrogram_torch on the full waveform.
+    """
+
+    def __init__(self, n_fft, sampling_rate, hop_size, win_size, device="cpu"):
+        self.n_fft = n_fft
+        self.sampling_rate = sampling_rate
+        self.hop_size = hop_size
+        self.win_size = win_size
+        self.device = device
+        self.pad = int((n_fft - hop_size) / 2)
+        self.reset()
+
+    def reset(self):
+        self._head = []
+        self._head_len = 0
+        self._buffer = None
+        # last pad + 1 samples of the raw signal, needed for the right padding
+        self._tail = torch.zeros(0, device=self.device)
+        self.num_samples = 0
+        self.num_frames = 0
+
+    def _to_tensor(self, chunk):
+        if isinstance(chunk, torch.Tensor):
+            y = chunk.detach()
+        else:
+            y = torch.as_tensor(chunk)
+        if not torch.is_floating_point(y):
+            y = y.float() / MAX_WAV_VALUE
+        return y.reshape(-1).to(dtype=torch.float32, device=self.device)
+
+    def _empty(self):
+        return torch.zeros(1, self.n_fft // 2 + 1, 0, device=self.device)
+
+    def _emit(self):
+        n_fft, hop_size = self.n_fft, self.hop_size
+        if self._buffer is None or self._buffer.size(0) < n_fft:
+            return self._empty()
+        n_frames = 1 + (self._buffer.size(0) - n_fft) // hop_size
+        y = self._buffer[: (n_frames - 1) * hop_size + n_fft].unsqueeze(0)
+        # keep the n_fft - hop (+ remainder) tail for the next frame
+        self._buffer = self._buffer[n_frames * hop_size:]
+
+        wnsize_dtype_device = str(self.win_size) + "_" + str(y.dtype) + "_" + str(y.device)
+        if wnsize_dtype_device not in hann_window:
+            hann_window[wnsize_dtype_device] = torch.hann_window(self.win_size).to(
+                dtype=y.dtype, device=y.device
+            )
+        spec = torch.stft(
+            y,
+            n_fft,
+            hop_length=hop_size,
+            win_length=self.win_size,
+            window=hann_window[wnsize_dtype_device],
+            center=False,
+            normalized=False,
+            onesided=True,
+            return_complex=True,
+        )
+        spec = torch.sqrt(spec.real.pow(2) + spec.imag.pow(2) + 1e-6)
+        self.num_frames += spec.size(-1)
+        return spec
+
+    def push(self, chunk):
+        """Feed a chunk of PCM (float in [-1, 1] or int16) and return new frames [1, freq, T]."""
+        y = self._to_tensor(chunk)
+        if y.numel() == 0:
+            return self._empty()
+        self.num_samples += y.numel()
+        self._tail = torch.cat([self._tail, y])[-(self.pad + 1):]
+
+        if self._buffer is None:
+            self._head.append(y)
+            self._head_len += y.numel()
+            if self._head_len <= self.pad:
+                return self._empty()
+            head = torch.cat(self._head)
+            self._head = []
+            # same as F.pad(..., mode="reflect") on the left edge
+            left = torch.flip(head[1: self.pad + 1], dims=[0])
+            self._buffer = torch.cat([left, head])
+        else:
+            self._buffer = torch.cat([self._buffer, y])
+        return self._emit()
+
+    def flush(self):
+        """Apply the right reflect padding, return the remaining frames and reset."""
+        if self._buffer is None:
+            # fewer than pad + 1 samples: spectrogram_torch cannot pad this either
+            self.reset()
+            return self._empty()
+        right = torch.flip(self._tail[:-1], dims=[0])
+        self._buffer = torch.cat([self._buffer, right])
+        spec = self._emit()
+        self.reset()
+        return spec
+
+
 def spectrogram_torch_conv(y, n_fft, sampling_rate, hop_size, win_size, center=False):
     # if torch.min(y) < -1.:
     #     print('min value is ', torch.min(y))
@@ -0,0 +1,57 @@
+import collections
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AudioPipeline(object):
+    """
+    Overlaps decoding, model inference and writing of a sequence of items.
+
+    load_fn(item) and write_fn(item, output) run on a bounded thread pool while
+    infer_fn(loaded) runs on the calling thread, so the model works on item i while
+    item i + 1 is being decoded and item i - 1 is being encoded/written. At most
+    max_in_flight loads and max_in_flight writes are outstanding at any time, which
+    bounds memory when the producer is faster than the model. Results are yielded
+    in input order: the return value of write_fn, or the inference output when no
+    write_fn is given.
+    """
+
+    def __init__(self, load_fn, infer_fn, write_fn=None, num_workers=4, max_in_flight=4):
+        assert max_in_flight >= 1, "max_in_flight must be positive"
+        self.load_fn = load_fn
+        self.infer_fn = infer_fn
+        self.write_fn = write_fn
+        self.num_workers = num_workers
+        self.max_in_flight = max_in_flight
+
+    def run(self, items):
+        items = iter(items)
+        with ThreadPoolExecutor(max_workers=self.num_workers, thread_name_prefix="audio-pipeline") as executor:
+            loads = collections.deque()
+            writes = collections.deque()
+
+            def fill_loads():
+                while len(loads) < self.max_in_flight:
+                    try:
+                        item = next(items)
+                    except StopIteration:
+                        return
+                    loads.append((item, executor.submit(self.load_fn, item)))
+
+            fill_loads()
+            while loads:
+                item, future = loads.popleft()
+                loaded = future.result()
+                # keep the decoders busy while the model runs
+                fill_loads()
+                output = self.infer_fn(loaded)
+
+                if self.write_fn is None:
+                    yield output
+                    continue
+                writes.append(executor.submit(self.write_fn, item, output))
+                # back-pressure: wait for the oldest write before running ahead
+                while len(writes) > self.max_in_flight:
+                    yield writes.popleft().result()
+
+            while writes:
+                yield writes.popleft().result()
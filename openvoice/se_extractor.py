@@ -10,7 +10,7 @@ from pydub import AudioSegment
 from faster_whisper import WhisperModel
 import hashlib
 import base64
-import librosa
+from openvoice.audio import load_audio
 from whisper_timestamped.transcribe import get_audio_tensor, get_vad_segments
 
 model_size = "medium"
@@ -116,7 +116,7 @@ def split_audio_vad(audio_path, audio_name, target_dir, split_seconds=10.0):
     return wavs_folder
 
 def hash_numpy_array(audio_path):
-    array, _ = librosa.load(audio_path, sr=None, mono=True)
+    array, _ = load_audio(audio_path, sr=None, mono=True)
     # Convert the array to bytes
     array_bytes = array.tobytes()
     # Calculate the hash of the array bytes
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# the app modules import each other by bare name (streamlit runs app/ as the script folder)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, "app")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
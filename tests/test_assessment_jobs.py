@@ -0,0 +1,78 @@
+import threading
+
+import pytest
+
+from assessment_jobs import AssessmentJobQueue, JobQueueFull
+
+
+def blocked(release):
+    def fn(job):
+        release.wait(5)
+        return "ok"
+    return fn
+
+
+def test_result_and_status_propagate():
+    queue = AssessmentJobQueue(max_workers=1, max_pending=2)
+    job = queue.submit(lambda job, a, b=0: a + b, 1, b=2, meta={"lesson_index": 3})
+    assert job.wait(5)
+    assert job.done and job.status == "done"
+    assert job.result == 3 and job.error is None
+    assert job.meta == {"lesson_index": 3}
+
+
+def test_errors_propagate():
+    def fail(job):
+        job.stage = "failing"
+        raise ValueError("bad audio")
+
+    job = AssessmentJobQueue(max_workers=1).submit(fail)
+    assert job.wait(5)
+    assert job.status == "failed"
+    assert isinstance(job.error, ValueError)
+    assert "bad audio" in job.traceback
+    assert job.result is None and job.stage == "failing"
+
+
+def test_worker_progress_is_visible_before_done():
+    started, release = threading.Event(), threading.Event()
+
+    def fn(job):
+        job.partial = {"scores": {"PronScore": 80}}
+        started.set()
+        release.wait(5)
+        return "ok"
+
+    job = AssessmentJobQueue(max_workers=1).submit(fn)
+    assert started.wait(5)
+    assert job.status == "running" and not job.done
+    assert job.partial == {"scores": {"PronScore": 80}}
+    release.set()
+    assert job.wait(5) and job.result == "ok"
+
+
+def test_submit_beyond_max_pending_raises():
+    release = threading.Event()
+    queue = AssessmentJobQueue(max_workers=1, max_pending=2)
+    # one running, one waiting
+    jobs = [queue.submit(blocked(release)) for _ in range(2)]
+    with pytest.raises(JobQueueFull):
+        queue.submit(blocked(release))
+    assert jobs[1].status == "queued"
+    release.set()
+    for job in jobs:
+        assert job.wait(5)
+    # finished jobs free their slots
+    assert queue.submit(lambda job: "again").wait(5)
+
+
+def test_failed_jobs_release_their_slot():
+    queue = AssessmentJobQueue(max_workers=1, max_pending=1)
+
+    def fail(job):
+        raise RuntimeError("boom")
+
+    for _ in range(3):
+        job = queue.submit(fail)
+        assert job.wait(5) and job.status == "failed"
+    assert queue.submit(lambda job: "ok").wait(5)
@@ -0,0 +1,69 @@
+import io
+
+import numpy as np
+import pytest
+import soundfile
+
+from openvoice import audio
+from openvoice.audio import load_audio, resample
+
+
+def tone(freq, sr, seconds=1.0, channels=1):
+    t = np.arange(int(sr * seconds)) / sr
+    y = 0.5 * np.sin(2 * np.pi * freq * t).astype(np.float32)
+    return np.stack([y] * channels, axis=1) if channels > 1 else y
+
+
+def dominant_frequency(y, sr):
+    spectrum = np.abs(np.fft.rfft(y))
+    return np.fft.rfftfreq(len(y), 1 / sr)[np.argmax(spectrum)]
+
+
+@pytest.mark.parametrize("quality", ["MQ", "HQ"])
+def test_resample_keeps_length_and_pitch(quality):
+    y = tone(440, 44100)
+    out = resample(y, 44100, 16000, quality=quality)
+    assert out.dtype == np.float32
+    assert abs(len(out) - 16000) <= 1
+    assert abs(dominant_frequency(out, 16000) - 440) <= 2
+
+
+def test_resample_scipy_fallback(monkeypatch):
+    monkeypatch.setattr(audio, "soxr", None)
+    out = resample(tone(440, 48000), 48000, 22050)
+    assert out.dtype == np.float32
+    assert len(out) == 22050
+    assert abs(dominant_frequency(out, 22050) - 440) <= 2
+
+
+def test_resample_same_rate_is_a_no_op():
+    y = tone(440, 16000)
+    assert resample(y, 16000, 16000) is y
+
+
+def test_load_audio_mixes_down_to_contiguous_float32(tmp_path):
+    path = tmp_path / "stereo.wav"
+    soundfile.write(path, tone(440, 22050, channels=2), 22050, subtype="PCM_16")
+    y, sr = load_audio(str(path))
+    assert sr == 22050
+    assert y.ndim == 1 and y.dtype == np.float32 and y.flags.c_contiguous
+    assert len(y) == 22050
+
+
+def test_load_audio_channels_first_without_mono(tmp_path):
+    path = tmp_path / "stereo.wav"
+    soundfile.write(path, tone(440, 22050, channels=2), 22050)
+    y, _ = load_audio(str(path), mono=False)
+    assert y.shape == (2, 22050)
+    assert y.dtype == np.float32 and y.flags.c_contiguous
+
+
+def test_load_audio_resamples_file_like_objects():
+    buffer = io.BytesIO()
+    soundfile.write(buffer, tone(440, 44100), 44100, format="WAV")
+    buffer.seek(0)
+    y, sr = load_audio(buffer, sr=16000)
+    assert sr == 16000
+    assert y.dtype == np.float32
+    assert abs(len(y) - 16000) <= 1
+    assert abs(dominant_frequency(y, 16000) - 440) <= 2
@@ -0,0 +1,56 @@
+import os
+import numpy as np
+import torch
+from openvoice.cache import ConversionCache
+
+ENTRY = np.zeros(1000, dtype=np.float32)
+
+
+def npy_files(cache_dir):
+    return [f for _, _, files in os.walk(cache_dir) for f in files if f.endswith(".npy")]
+
+
+def entry_size(tmp_path):
+    path = tmp_path / "entry.npy"
+    np.save(path, ENTRY)
+    return path.stat().st_size
+
+
+def test_round_trip_and_key(tmp_path):
+    source = tmp_path / "a.wav"
+    source.write_bytes(b"audio")
+    cache = ConversionCache(str(tmp_path / "cache"))
+    se = torch.ones(1, 256, 1)
+    key = cache.key(str(source), se, se * 2, 0.3, "default")
+    assert key == cache.key(str(source), se, se * 2, 0.3, "default")
+    assert key != cache.key(str(source), se, se * 2, 0.5, "default")
+    assert cache.get(key) is None
+    cache.put(key, np.arange(4))
+    np.testing.assert_array_equal(cache.get(key), np.arange(4, dtype=np.float32))
+
+
+def test_evicts_least_recently_used_files(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    cache = ConversionCache(cache_dir, max_bytes=3 * entry_size(tmp_path), max_memory_items=1)
+    keys = [f"{i:064x}" for i in range(5)]
+    for key in keys[:3]:
+        cache.put(key, ENTRY)
+    cache._memory.clear()
+    assert cache.get(keys[0]) is not None  # now the most recently used file
+    for key in keys[3:]:
+        cache.put(key, ENTRY)
+    assert len(npy_files(cache_dir)) == 3
+    cache._memory.clear()
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[1]) is None and cache.get(keys[2]) is None
+    # the running total matches the directory, also for a cache opened on it later
+    assert cache._disk_bytes == ConversionCache(cache_dir)._disk_bytes == 3 * entry_size(tmp_path)
+
+
+def test_source_hashes_are_bounded(tmp_path):
+    cache = ConversionCache(str(tmp_path / "cache"), max_source_hashes=2)
+    for i in range(4):
+        source = tmp_path / f"{i}.wav"
+        source.write_bytes(bytes([i]))
+        cache.source_hash(str(source))
+    assert len(cache._file_hashes) == 2
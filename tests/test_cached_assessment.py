@@ -0,0 +1,99 @@
+import io
+from types import SimpleNamespace
+
+import numpy as np
+import soundfile
+
+import assessment_core
+from assessment_core import ASSESSMENT_SAMPLE_RATE, AssessmentService, CachedAssessmentService
+
+
+class CountingService(AssessmentService):
+    config_signature = "fake-v1"
+
+    def __init__(self):
+        self.calls = 0
+
+    def assess_pcm(self, pcm, reference_text):
+        self.calls += 1
+        return {"NBest": [{"PronunciationAssessment": {"PronScore": len(pcm)}, "Words": []}],
+                "call": self.calls}
+
+
+def wav(seed):
+    buffer = io.BytesIO()
+    samples = np.random.default_rng(seed).uniform(-0.5, 0.5, ASSESSMENT_SAMPLE_RATE // 10)
+    soundfile.write(buffer, samples, ASSESSMENT_SAMPLE_RATE, format="WAV", subtype="PCM_16")
+    buffer.seek(0)
+    return buffer
+
+
+def test_same_recording_is_served_from_cache():
+    service = CountingService()
+    cached = CachedAssessmentService(service)
+    first, from_cache = cached.assess_cached(wav(0), "hello", user_key="alice")
+    assert not from_cache
+    second, from_cache = cached.assess_cached(wav(0), "hello", user_key="alice")
+    assert from_cache and second == first
+    assert service.calls == 1
+    # another text or recording is a new assessment
+    cached.assess_cached(wav(0), "goodbye", user_key="alice")
+    cached.assess_cached(wav(1), "hello", user_key="alice")
+    assert service.calls == 3
+
+
+def test_entries_are_scoped_to_the_user():
+    service = CountingService()
+    cached = CachedAssessmentService(service)
+    cached.assess_cached(wav(0), "hello", user_key="alice")
+    _, from_cache = cached.assess_cached(wav(0), "hello", user_key="bob")
+    assert not from_cache
+    assert service.calls == 2
+
+
+def test_config_signature_is_part_of_the_key():
+    pcm = b"\x01\x00" * 100
+    cached = CachedAssessmentService(CountingService())
+    other = CountingService()
+    other.config_signature = "fake-v2"
+    assert cached.key(pcm, "hello") != CachedAssessmentService(other).key(pcm, "hello")
+    assert cached.config_signature == "fake-v1"
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(assessment_core, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    service = CountingService()
+    cached = CachedAssessmentService(service, ttl=60)
+    cached.assess_pcm(b"\x00\x01", "hello")
+    now[0] += 59
+    cached.assess_pcm(b"\x00\x01", "hello")
+    assert service.calls == 1
+    now[0] += 2
+    cached.assess_pcm(b"\x00\x01", "hello")
+    assert service.calls == 2
+
+
+def test_least_recently_used_entries_are_evicted():
+    service = CountingService()
+    cached = CachedAssessmentService(service, max_entries=2)
+    for pcm in (b"a", b"b"):
+        cached.assess_pcm(pcm, "hello")
+    # touch a, so b is the oldest when c comes in
+    cached.assess_pcm(b"a", "hello")
+    cached.assess_pcm(b"c", "hello")
+    assert service.calls == 3
+    cached.assess_pcm(b"a", "hello")
+    assert service.calls == 3
+    cached.assess_pcm(b"b", "hello")
+    assert service.calls == 4
+
+
+def test_cached_results_are_isolated_copies():
+    cached = CachedAssessmentService(CountingService())
+    first = cached.assess_pcm(b"a", "hello")
+    first["NBest"][0]["PronunciationAssessment"]["PronScore"] = -1
+    second = cached.assess_pcm(b"a", "hello")
+    assert second["NBest"][0]["PronunciationAssessment"]["PronScore"] == 1
+    second["NBest"][0]["Words"].append("mutated")
+    assert cached.assess_pcm(b"a", "hello")["NBest"][0]["Words"] == []
@@ -0,0 +1,70 @@
+import threading
+import time
+
+import pytest
+
+from credentials import CredentialService, CredentialsBusy
+
+
+def test_hash_and_check_password():
+    service = CredentialService(rounds=4)
+    hashed = service.hash_password("secret")
+    assert hashed.startswith("$2")
+    assert service.check_password(hashed, "secret")
+    assert not service.check_password(hashed, "Secret")
+
+
+def test_at_most_max_workers_hashes_run_at_once():
+    service = CredentialService(max_workers=2, max_pending=8)
+    lock = threading.Lock()
+    state = {'running': 0, 'max_running': 0}
+
+    def work():
+        with lock:
+            state['running'] += 1
+            state['max_running'] = max(state['max_running'], state['running'])
+        time.sleep(0.02)
+        with lock:
+            state['running'] -= 1
+
+    threads = [threading.Thread(target=service._run, args=(work,)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert state['max_running'] == 2
+
+
+def test_callers_beyond_max_pending_get_credentials_busy():
+    service = CredentialService(max_workers=1, max_pending=1, wait_timeout=0.05)
+    started, release = threading.Event(), threading.Event()
+
+    def hold():
+        started.set()
+        release.wait(5)
+        return "done"
+
+    thread = threading.Thread(target=service._run, args=(hold,))
+    thread.start()
+    assert started.wait(5)
+    with pytest.raises(CredentialsBusy):
+        service._run(lambda: "never runs")
+    release.set()
+    thread.join()
+    # the slot is free again once the first call returned
+    assert service._run(lambda: "ok") == "ok"
+
+
+def test_session_token():
+    service = CredentialService(rounds=4)
+    hashed = service.hash_password("secret")
+    token = service.session_token("alice", "secret", hashed)
+    assert token == service.session_token("alice", "secret", hashed)
+    assert service.check_session_token(token, "alice", "secret", hashed)
+    assert not service.check_session_token(token, "alice", "wrong", hashed)
+    assert not service.check_session_token(token, "bob", "secret", hashed)
+    # a changed password hash (reset) invalidates old tokens
+    assert not service.check_session_token(token, "alice", "secret", service.hash_password("secret"))
+    assert not service.check_session_token(None, "alice", "secret", hashed)
+    # tokens are only valid in the process (service) that issued them
+    assert not CredentialService().check_session_token(token, "alice", "secret", hashed)
@@ -0,0 +1,72 @@
+import os
+import numpy as np
+import soundfile as sf
+from dataset import LessonCatalog, natural_key
+
+
+def make_folder(root, files):
+    for rel_path in files:
+        path = root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if rel_path.endswith(".wav"):
+            sf.write(path, np.zeros(8000, dtype=np.float32), 16000)
+        else:
+            path.write_text(rel_path, encoding="utf-8")
+
+
+def catalog(tmp_path):
+    return LessonCatalog(str(tmp_path / "lessons") + "/", str(tmp_path / "catalog" / "lessons.json")).load()
+
+
+def pairs(lessons):
+    return [(lesson["id"], lesson["text"], lesson["video"]) for lesson in lessons]
+
+
+def test_natural_key_orders_numbers():
+    assert sorted(["10", "2", "1"], key=natural_key) == ["1", "2", "10"]
+
+
+def test_lessons_are_paired_by_stem(tmp_path):
+    make_folder(tmp_path / "lessons", ["text/10.txt", "text/2.txt", "text/1.txt", "video/2.mp4",
+                                       "video/1.mp4", "video/10.mp4", "audio/2_stranger.wav"])
+    lessons = catalog(tmp_path)
+    assert pairs(lessons) == [("1", "text/1.txt", "video/1.mp4"), ("2", "text/2.txt", "video/2.mp4"),
+                              ("10", "text/10.txt", "video/10.mp4")]
+    assert lessons.get("2")["audio"] == "audio/2_stranger.wav"
+    assert lessons.get("2")["duration"] == 0.5
+    assert lessons.get("1")["audio"] is None
+
+
+def test_unmatched_videos_are_paired_by_order(tmp_path, capsys):
+    # videos downloaded by avatar_synthesis before they were named after their lesson
+    make_folder(tmp_path / "lessons", ["text/1.txt", "text/2.txt", "text/3.txt", "video/1.mp4",
+                                       "video/avatar_video_b.mp4", "video/avatar_video_a.mp4"])
+    assert pairs(catalog(tmp_path)) == [("1", "text/1.txt", "video/1.mp4"),
+                                        ("2", "text/2.txt", "video/avatar_video_a.mp4"),
+                                        ("3", "text/3.txt", "video/avatar_video_b.mp4")]
+    assert "pairing text/2.txt with video/avatar_video_a.mp4" in capsys.readouterr().out
+
+
+def test_unpaired_files_are_reported(tmp_path, capsys):
+    make_folder(tmp_path / "lessons", ["1.txt", "2.txt", "1.mp4"])
+    assert pairs(catalog(tmp_path)) == [("1", "1.txt", "1.mp4"), ("2", "2.txt", None)]
+    assert "no video for 2.txt" in capsys.readouterr().out
+
+
+def test_same_names_in_subfolders_do_not_overwrite_each_other(tmp_path, capsys):
+    make_folder(tmp_path / "lessons", ["a/1.txt", "a/1.mp4", "b/1.txt", "b/1.mp4"])
+    assert pairs(catalog(tmp_path)) == [("a/1", "a/1.txt", "a/1.mp4"), ("b/1", "b/1.txt", "b/1.mp4")]
+    assert "1.txt found 2 times" in capsys.readouterr().out
+
+
+def test_manifest_is_rebuilt_only_when_the_folder_changes(tmp_path):
+    make_folder(tmp_path / "lessons", ["text/1.txt", "video/1.mp4"])
+    catalog(tmp_path)
+    manifest = tmp_path / "catalog" / "lessons.json"
+    first = manifest.stat().st_mtime_ns
+    assert len(catalog(tmp_path)) == 1
+    assert manifest.stat().st_mtime_ns == first
+    make_folder(tmp_path / "lessons", ["text/2.txt"])
+    # force a visible directory mtime change on coarse-grained filesystems
+    os.utime(tmp_path / "lessons" / "text", ns=(first + 10 ** 9, first + 10 ** 9))
+    assert pairs(catalog(tmp_path)) == [("1", "text/1.txt", "video/1.mp4"), ("2", "text/2.txt", None)]
@@ -0,0 +1,91 @@
+import os
+import subprocess
+import sys
+import textwrap
+from datetime import date, datetime
+import pytest
+import history_store
+from history_store import PronunciationHistoryStore, get_history_store
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def result(pron_score, error_types):
+    words = [{
+        "Word": f"w{i}", "Offset": i * 10000000, "Duration": 5000000,
+        "PronunciationAssessment": {"AccuracyScore": 80, "ErrorType": error_type},
+        "Phonemes": [{"Phoneme": "a", "Offset": i * 10000000, "Duration": 5000000,
+                      "PronunciationAssessment": {"AccuracyScore": 70}}],
+    } for i, error_type in enumerate(error_types)]
+    return {"Duration": 30000000, "DisplayText": "w0 w1", "NBest": [{
+        "PronunciationAssessment": {"AccuracyScore": 80, "FluencyScore": 70, "CompletenessScore": 100,
+                                    "ProsodyScore": 60, "PronScore": pron_score},
+        "Words": words,
+    }]}
+
+
+def parquet_parts(root):
+    return sorted(os.path.relpath(os.path.join(folder, f), root)
+                  for folder, _, files in os.walk(root) for f in files if f.endswith(".parquet"))
+
+
+def test_append_is_buffered_until_the_batch_is_full(tmp_path):
+    store = PronunciationHistoryStore(str(tmp_path), batch_size=2)
+    store.append("1", result(70, ["None", "Omission"]), datetime(2024, 5, 1, 10))
+    assert parquet_parts(tmp_path) == []
+    store.append("1", result(80, ["None"]), datetime(2024, 5, 2, 10))
+    parts = parquet_parts(tmp_path)
+    # one part per table and day
+    assert len(parts) == 6 and any(p.startswith(os.path.join("words", "date=2024-05-02")) for p in parts)
+
+
+def test_read_includes_buffered_rows_and_filters_by_day(tmp_path):
+    store = PronunciationHistoryStore(str(tmp_path))
+    store.append("1", result(70, ["None", "Mispronunciation"]), datetime(2024, 5, 1, 10), attempt_id="1-a")
+    store.append("2", result(80, ["None"]), datetime(2024, 5, 3, 9), attempt_id="2-b")
+    store.flush()
+    store.append("1", result(90, ["Omission"]), datetime(2024, 5, 3, 18), attempt_id="1-c")
+
+    utterances = store.read("utterances")
+    assert sorted(utterances["attempt_id"]) == ["1-a", "1-c", "2-b"]
+    assert list(utterances.columns) == list(history_store.SCHEMAS["utterances"].names)
+    may_3 = store.read("utterances", columns=["attempt_id", "pron_score"], start_date=date(2024, 5, 2))
+    assert sorted(may_3["attempt_id"]) == ["1-c", "2-b"]
+    assert list(may_3.columns) == ["attempt_id", "pron_score"]
+    words = store.read("words", end_date="2024-05-01")
+    assert list(words["error_type"]) == ["None", "Mispronunciation"]
+    assert list(words["offset_s"]) == [0.0, 1.0]
+    assert len(store.read("phonemes", start_date="2024-05-03", end_date="2024-05-03")) == 2
+    assert store.read("words", start_date="2025-01-01").empty
+
+
+def test_read_of_an_empty_store(tmp_path):
+    frame = PronunciationHistoryStore(str(tmp_path)).read("words", columns=["error_type"])
+    assert frame.empty and list(frame.columns) == ["error_type"]
+
+
+def test_buffered_rows_are_flushed_at_exit(tmp_path):
+    script = textwrap.dedent(f"""
+        import sys
+        sys.path.insert(0, {os.path.join(ROOT, "app")!r})
+        from datetime import datetime
+        from history_store import get_history_store
+        result = {result(75, ["None"])!r}
+        get_history_store({str(tmp_path)!r}).append("1", result, datetime(2024, 5, 1))
+    """)
+    subprocess.run([sys.executable, "-c", script], check=True)
+    store = PronunciationHistoryStore(os.path.join(str(tmp_path), "history_store"))
+    assert list(store.read("utterances")["pron_score"]) == [75]
+
+
+def test_history_trend(tmp_path):
+    report = pytest.importorskip("learn.report")
+    store = get_history_store(str(tmp_path))
+    store.append("1", result(70, ["None", "Mispronunciation"]), datetime(2024, 5, 1, 10))
+    store.append("1", result(90, ["None", "None"]), datetime(2024, 5, 1, 11))
+    store.append("2", result(50, ["Omission"]), datetime(2024, 5, 2, 10))
+    trend = report.load_history_trend(str(tmp_path), date(2024, 5, 1), date(2024, 5, 31))
+    assert list(trend["attempts"]) == [2, 1]
+    assert list(trend["pron_score"]) == [80, 50]
+    assert list(trend["error_rate"]) == [25, 100]
+    assert report.load_history_trend(str(tmp_path), date(2025, 1, 1)).empty
@@ -0,0 +1,32 @@
+import os
+
+import lesson_cache
+from lesson_cache import read_lesson_media, read_lesson_text
+
+
+def test_small_and_large_media_are_read_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(lesson_cache, "MAX_CACHED_MEDIA_BYTES", 8)
+    small, large = tmp_path / "ref.wav", tmp_path / "lesson.mp4"
+    small.write_bytes(b"wav")
+    large.write_bytes(b"mp4" * 100)
+    for path, content in ((small, b"wav"), (large, b"mp4" * 100)):
+        data = read_lesson_media(str(path))
+        assert data == content
+        # the same object every rerun, so Streamlit stores no second copy
+        assert read_lesson_media(str(path)) is data
+
+
+def test_edited_media_is_read_again(tmp_path):
+    path = tmp_path / "lesson.mp4"
+    path.write_bytes(b"old")
+    assert read_lesson_media(str(path)) == b"old"
+    path.write_bytes(b"new!")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert read_lesson_media(str(path)) == b"new!"
+
+
+def test_read_lesson_text(tmp_path):
+    path = tmp_path / "lesson.txt"
+    path.write_text("こんにちは", encoding="utf-8")
+    assert read_lesson_text(str(path)) == "こんにちは"
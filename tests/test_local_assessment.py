@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+from local_assessment import LocalAssessmentService, phonemize_words, split_ipa, spelling_to_ipa
+from segment_merge import split_reference
+
+SR = 16000
+
+
+def pcm_of(*parts):
+    """PCM16 bytes of alternating tone bursts and silences, given as (seconds, voiced) pairs."""
+    rng = np.random.default_rng(0)
+    chunks = []
+    for seconds, voiced in parts:
+        n = int(seconds * SR)
+        t = np.arange(n) / SR
+        chunk = 0.3 * np.sin(2 * np.pi * 220 * t) if voiced else np.zeros(n)
+        chunks.append(chunk + 1e-4 * rng.standard_normal(n))
+    return (np.concatenate(chunks) * 32767).astype("<i2").tobytes()
+
+
+def test_split_ipa():
+    assert split_ipa("hɛˈloʊ") == ["h", "ɛ", "l", "oʊ"]
+    assert split_ipa("ˈtʃɪɹz!") == ["tʃ", "ɪ", "ɹ", "z"]
+    assert split_ipa("qisiɹ's*") == ["q", "i", "s", "i", "ɹ", "s"]
+
+
+def test_spelling_fallback_gives_sounds_not_letters():
+    assert spelling_to_ipa("xyzzyq") == ["k", "s", "i", "z", "z", "i", "k"]
+    assert spelling_to_ipa("Shin") == ["ʃ", "ɪ", "n"]
+
+
+def test_phonemize_words_uses_the_azure_tokenizer():
+    pytest.importorskip("eng_to_ipa")
+    words = phonemize_words("Qisir's well-known xyzzyq, 42!")
+    assert [w for w, _ in words] == split_reference("Qisir's well-known xyzzyq, 42!") == [
+        "Qisir's", "well-known", "xyzzyq", "42"]
+    for _, phonemes in words:
+        assert phonemes and "*" not in phonemes
+        assert all("*" not in p and "-" not in p for p in phonemes)
+    phonemes = dict(words)
+    assert phonemes["xyzzyq"] == spelling_to_ipa("xyzzyq")
+    assert phonemes["well-known"][-2:] == ["oʊ", "n"]
+    assert "f" in phonemes["42"]
+
+
+def test_result_has_the_azure_shape():
+    text = "Hello big world"
+    result = LocalAssessmentService().assess_pcm(
+        pcm_of((0.3, False), (0.5, True), (0.1, False), (0.4, True), (0.1, False), (0.5, True), (0.3, False)), text)
+    nbest = result["NBest"][0]
+    assert [w["Word"] for w in nbest["Words"]] == ["Hello", "big", "world"]
+    scores = nbest["PronunciationAssessment"]
+    assert set(scores) == {"AccuracyScore", "FluencyScore", "CompletenessScore", "ProsodyScore", "PronScore"}
+    assert all(0 <= value <= 100 for value in scores.values())
+    offsets = [w["Offset"] for w in nbest["Words"]]
+    assert offsets == sorted(offsets) and offsets[0] >= 2500000  # speech starts after 0.3 s
+    for word in nbest["Words"]:
+        assert word["Phonemes"] and word["Duration"] > 0
+        assert word["PronunciationAssessment"]["ErrorType"] in ("None", "Mispronunciation", "Omission")
+
+
+def test_silence_is_all_omissions():
+    result = LocalAssessmentService().assess_pcm(bytes(2 * SR), "one two")
+    nbest = result["NBest"][0]
+    assert [w["PronunciationAssessment"]["ErrorType"] for w in nbest["Words"]] == ["Omission", "Omission"]
+    assert nbest["PronunciationAssessment"]["PronScore"] == 0
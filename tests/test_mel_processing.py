@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+import torch
+from openvoice.mel_processing import spectrogram_torch, StreamingSpectrogram
+
+N_FFT, SR, HOP, WIN = 1024, 22050, 256, 1024
+
+
+def full_spectrogram(y):
+    return spectrogram_torch(torch.from_numpy(y).unsqueeze(0), N_FFT, SR, HOP, WIN, center=False)
+
+
+def streamed_spectrogram(y, chunk_sizes):
+    stream = StreamingSpectrogram(N_FFT, SR, HOP, WIN)
+    frames, start = [], 0
+    for size in chunk_sizes:
+        frames.append(stream.push(y[start:start + size]))
+        start += size
+    frames.append(stream.push(y[start:]))
+    frames.append(stream.flush())
+    return torch.cat(frames, dim=-1), stream
+
+
+@pytest.mark.parametrize("chunk_sizes", [
+    [],                     # everything in one push
+    [100] * 50,             # chunks smaller than the padding
+    [384, 1, 4096, 7, 999],  # odd sizes around the window
+])
+def test_streaming_matches_full_spectrogram(chunk_sizes):
+    y = np.random.default_rng(0).uniform(-0.5, 0.5, 12345).astype(np.float32)
+    expected = full_spectrogram(y)
+    streamed, stream = streamed_spectrogram(y, chunk_sizes)
+    assert streamed.shape == expected.shape
+    # flush() leaves the stream ready for the next utterance
+    assert stream.num_samples == 0 and stream.num_frames == 0
+    torch.testing.assert_close(streamed, expected, rtol=1e-4, atol=1e-4)
+
+
+def test_int16_chunks_are_scaled():
+    y = np.random.default_rng(1).uniform(-0.5, 0.5, 4000).astype(np.float32)
+    pcm = (y * 32768).astype(np.int16)
+    streamed, _ = streamed_spectrogram(pcm, [1000, 1000])
+    expected = full_spectrogram(pcm.astype(np.float32) / 32768)
+    torch.testing.assert_close(streamed, expected, rtol=1e-4, atol=1e-4)
+
+
+def test_reset_starts_a_new_stream():
+    y = np.random.default_rng(2).uniform(-0.5, 0.5, 5000).astype(np.float32)
+    stream = StreamingSpectrogram(N_FFT, SR, HOP, WIN)
+    stream.push(np.ones(3000, dtype=np.float32) * 0.1)
+    stream.reset()
+    streamed = torch.cat([stream.push(y), stream.flush()], dim=-1)
+    torch.testing.assert_close(streamed, full_spectrogram(y), rtol=1e-4, atol=1e-4)
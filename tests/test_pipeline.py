@@ -0,0 +1,143 @@
+import time
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+import soundfile
+import torch
+
+from openvoice.api import ToneColorConverter
+from openvoice.pipeline import AudioPipeline
+
+
+def test_results_keep_input_order():
+    # later items load faster, so they finish out of order on the pool
+    def load(i):
+        time.sleep(0.01 * (5 - i))
+        return i
+
+    pipeline = AudioPipeline(load, lambda x: x * 10, num_workers=4, max_in_flight=4)
+    assert list(pipeline.run(range(5))) == [0, 10, 20, 30, 40]
+
+
+def test_write_results_keep_input_order():
+    def write(item, output):
+        time.sleep(0.01 * (5 - item))
+        return (item, output)
+
+    pipeline = AudioPipeline(lambda i: i, lambda x: x + 1, write, num_workers=4, max_in_flight=2)
+    assert list(pipeline.run(range(5))) == [(i, i + 1) for i in range(5)]
+
+
+def test_loads_are_bounded_by_max_in_flight():
+    lock = threading.Lock()
+    consumed = []
+    state = {'loads': 0, 'infers': 0, 'max_ahead': 0}
+
+    def items():
+        for i in range(20):
+            consumed.append(i)
+            yield i
+
+    def load(i):
+        with lock:
+            state['loads'] += 1
+        return i
+
+    def infer(x):
+        # items pulled from the producer but not yet inferred
+        state['max_ahead'] = max(state['max_ahead'], len(consumed) - state['infers'])
+        state['infers'] += 1
+        time.sleep(0.005)
+        return x
+
+    pipeline = AudioPipeline(load, infer, num_workers=4, max_in_flight=3)
+    assert list(pipeline.run(items())) == list(range(20))
+    assert state['max_ahead'] <= 3 + 1
+
+
+def test_writes_are_bounded_by_max_in_flight():
+    release = threading.Event()
+    lock = threading.Lock()
+    state = {'running': 0, 'max_running': 0}
+
+    def write(item, output):
+        with lock:
+            state['running'] += 1
+            state['max_running'] = max(state['max_running'], state['running'])
+        release.wait(1)
+        with lock:
+            state['running'] -= 1
+        return output
+
+    pipeline = AudioPipeline(lambda i: i, lambda x: x, write, num_workers=8, max_in_flight=2)
+    results = pipeline.run(range(6))
+    timer = threading.Timer(0.1, release.set)
+    timer.start()
+    assert list(results) == list(range(6))
+    timer.join()
+    # the pipeline waits for the oldest write once more than max_in_flight are queued
+    assert state['max_running'] <= 3
+
+
+@pytest.mark.parametrize("stage", ["load", "infer", "write"])
+def test_stage_errors_reach_the_caller(stage):
+    def fail_on_two(x):
+        if x == 2:
+            raise ValueError(f"{stage} failed")
+        return x
+
+    stages = {'load': lambda i: i, 'infer': lambda x: x, 'write': lambda item, output: output}
+    if stage == "write":
+        stages['write'] = lambda item, output: fail_on_two(output)
+    else:
+        stages[stage] = fail_on_two
+    pipeline = AudioPipeline(stages['load'], stages['infer'], stages['write'], num_workers=2, max_in_flight=2)
+    with pytest.raises(ValueError, match=f"{stage} failed"):
+        list(pipeline.run(range(5)))
+
+
+class FakeModel:
+    def __init__(self):
+        self.calls = 0
+
+    def voice_conversion(self, spec, spec_lengths, sid_src, sid_tgt, tau):
+        self.calls += 1
+        return torch.ones(1, 1, spec.size(-1) * 256), None, None
+
+
+def fake_converter(cache_dir=None):
+    converter = ToneColorConverter.__new__(ToneColorConverter)
+    converter.hps = SimpleNamespace(data=SimpleNamespace(sampling_rate=22050, filter_length=1024,
+                                                         hop_length=256, win_length=1024))
+    converter.device = "cpu"
+    converter.model = FakeModel()
+    converter.watermark_model = None
+    converter.version = "v2"
+    converter.output_cache = None
+    if cache_dir is not None:
+        converter.enable_output_cache(cache_dir)
+    return converter
+
+
+def test_convert_pipelined_uses_the_output_cache(tmp_path):
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"src{i}.wav"
+        soundfile.write(path, np.random.default_rng(i).uniform(-0.5, 0.5, 22050).astype(np.float32), 22050)
+        paths.append(str(path))
+    se = torch.zeros(1, 256, 1)
+    converter = fake_converter(str(tmp_path / "cache"))
+
+    first = converter.convert_pipelined(paths, se, se, message="@MyShell")
+    assert converter.model.calls == 3
+    second = converter.convert_pipelined(paths, se, se, message="@MyShell")
+    assert converter.model.calls == 3
+    for a, b in zip(first, second):
+        np.testing.assert_array_equal(a, b)
+
+    outputs = [str(tmp_path / f"out{i}.wav") for i in range(3)]
+    assert converter.convert_pipelined(paths, se, se, outputs, message="@MyShell") == outputs
+    assert converter.model.calls == 3
+    assert soundfile.info(outputs[0]).frames == len(first[0])
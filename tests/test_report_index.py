@@ -0,0 +1,148 @@
+import os
+import json
+import random
+import threading
+import multiprocessing
+import pytest
+import report_index
+from report_index import (INDEX_FILE, read_error_counts, scan_error_counts, empty_index, add_counts, load_index,
+                          save_index, merge_counts, update_index)
+
+ERROR_TYPES = ["None", "None", "None", "Mispronunciation", "Omission", "Insertion", "UnexpectedBreak", "Monotone"]
+
+
+def fixture_result(rng, n_words):
+    words = []
+    for i in range(n_words):
+        word = {"Word": f"word{i}", "Offset": i * 1000, "Duration": 900,
+                "PronunciationAssessment": {"AccuracyScore": rng.randint(0, 100)},
+                "Phonemes": [{"Phoneme": "a", "PronunciationAssessment": {"AccuracyScore": 50}}]}
+        error_type = rng.choice(ERROR_TYPES + ["missing"])
+        if error_type != "missing":
+            word["PronunciationAssessment"]["ErrorType"] = error_type
+        if rng.random() < 0.1:
+            del word["PronunciationAssessment"]
+        words.append(word)
+    return {"RecognitionStatus": "Success", "DisplayText": "fixture",
+            "NBest": [{"PronunciationAssessment": {"PronScore": 80}, "Words": words}]}
+
+
+def plain_counts(path):
+    """What the report computed before: stdlib json and a walk over every word."""
+    with open(path, "r", encoding="utf-8") as f:
+        result = json.load(f)
+    counts = {}
+    words = result["NBest"][0]["Words"]
+    for word in words:
+        error_type = word.get("PronunciationAssessment", {}).get("ErrorType", "None")
+        if error_type != "None":
+            counts[error_type] = counts.get(error_type, 0) + 1
+    return counts, len(words)
+
+
+@pytest.fixture
+def results_folder(tmp_path):
+    rng = random.Random(0)
+    names = []
+    for i in range(12):
+        name = f"{i % 3}-2024-05-01_10-00-{i:02d}.json"
+        with open(tmp_path / name, "w", encoding="utf-8") as f:
+            json.dump(fixture_result(rng, rng.randint(0, 30)), f, indent=4 if i % 2 else None)
+        names.append(name)
+    return tmp_path, names
+
+
+@pytest.fixture(params=["msgspec", "orjson", "json"])
+def parser(request, monkeypatch):
+    """Run a test with each parser the module may pick."""
+    if request.param != "msgspec":
+        monkeypatch.setattr(report_index, "msgspec", None)
+    if request.param == "json":
+        monkeypatch.setattr(report_index, "orjson", None)
+    if request.param == "msgspec" and report_index.msgspec is None:
+        pytest.skip("msgspec is not installed")
+    if request.param == "orjson" and report_index.orjson is None:
+        pytest.skip("orjson is not installed")
+    return request.param
+
+
+def test_read_error_counts_matches_the_plain_loader(results_folder, parser):
+    folder, names = results_folder
+    for name in names:
+        assert read_error_counts(str(folder / name)) == plain_counts(folder / name)
+
+
+def test_scan_error_counts_keeps_order_and_reports_errors(results_folder, parser):
+    folder, names = results_folder
+    (folder / "broken.json").write_text('{"NBest": [', encoding="utf-8")
+    files = names[:5] + ["broken.json", "missing.json"] + names[5:]
+    scanned = list(scan_error_counts(str(folder), files, max_workers=4))
+    assert [file_name for file_name, *_ in scanned] == files
+    for file_name, counts, total, error in scanned:
+        if file_name in ("broken.json", "missing.json"):
+            assert counts is None and total == 0 and error is not None
+        else:
+            assert error is None and (counts, total) == plain_counts(folder / file_name)
+
+
+def test_scan_of_one_or_no_files(results_folder):
+    folder, names = results_folder
+    assert list(scan_error_counts(str(folder), [])) == []
+    [(file_name, counts, total, error)] = scan_error_counts(str(folder), names[:1])
+    assert (counts, total) == plain_counts(folder / file_name) and error is None
+
+
+def test_missing_or_corrupt_index_is_empty(tmp_path):
+    assert load_index(str(tmp_path)) == empty_index()
+    (tmp_path / INDEX_FILE).write_text("{", encoding="utf-8")
+    assert load_index(str(tmp_path)) == empty_index()
+
+
+def test_add_counts_once_per_file():
+    index = empty_index()
+    add_counts(index, "a.json", {"Omission": 2}, 10)
+    add_counts(index, "b.json", {"Omission": 1, "Monotone": 1}, 5)
+    add_counts(index, "a.json", {"Omission": 2}, 10)
+    assert index == {"error_counts": {"Omission": 3, "Monotone": 1}, "total_words": 15,
+                     "files": ["a.json", "b.json"]}
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = add_counts(empty_index(), "a.json", {"Mispronunciation": 1}, 3)
+    save_index(str(tmp_path), index)
+    assert load_index(str(tmp_path)) == index
+    # written through a temp file that is renamed into place
+    assert os.listdir(tmp_path) == [INDEX_FILE]
+
+
+def test_update_index_matches_the_plain_loader(results_folder):
+    folder, names = results_folder
+    for name in names + names[:3]:
+        with open(folder / name, "r", encoding="utf-8") as f:
+            update_index(str(folder), name, json.load(f))
+    index = load_index(str(folder))
+    expected = empty_index()
+    for name in names:
+        add_counts(expected, name, *plain_counts(folder / name))
+    assert index == expected
+
+
+def merge_worker(folder, worker, n_files):
+    for i in range(n_files):
+        merge_counts(folder, [(f"{worker}-{i}.json", {"Omission": 1}, 2)])
+
+
+def test_concurrent_merges_keep_every_file(tmp_path):
+    folder = str(tmp_path)
+    threads = [threading.Thread(target=merge_worker, args=(folder, f"t{w}", 10)) for w in range(4)]
+    # fork so the child processes share nothing but the files
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=merge_worker, args=(folder, f"p{w}", 10)) for w in range(2)]
+    for worker in threads + processes:
+        worker.start()
+    for worker in threads + processes:
+        worker.join()
+    assert all(process.exitcode == 0 for process in processes)
+    index = load_index(folder)
+    assert len(index["files"]) == len(set(index["files"])) == 60
+    assert index["error_counts"] == {"Omission": 60} and index["total_words"] == 120
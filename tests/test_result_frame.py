@@ -0,0 +1,71 @@
+import numpy as np
+from result_frame import ResultFrame, as_frame
+from report_index import count_errors
+
+
+def word(text, error_type=None, accuracy=None, offset=None, phonemes=None):
+    assessment = {}
+    if error_type is not None:
+        assessment["ErrorType"] = error_type
+    if accuracy is not None:
+        assessment["AccuracyScore"] = accuracy
+    data = {"Word": text, "PronunciationAssessment": assessment}
+    if offset is not None:
+        data["Offset"], data["Duration"] = offset, 2000000
+    if phonemes is not None:
+        data["Phonemes"] = [{"Phoneme": p, "Offset": offset, "Duration": 1000000,
+                             "PronunciationAssessment": {"AccuracyScore": 50}} for p in phonemes]
+    return data
+
+
+RESULT = {"NBest": [{
+    "PronunciationAssessment": {"AccuracyScore": 80, "PronScore": 75},
+    "Words": [
+        word("the", "None", 95, offset=0, phonemes=["ð", "ə"]),
+        word("cat", "Mispronunciation", 40, offset=5000000, phonemes=["k"]),
+        word("sat", "Omission", 0),
+        word("on", "Mispronunciation", 60, offset=10000000),
+        word("um", "Insertion", 0, offset=15000000, phonemes=["ʌ", "m"]),
+        word("mat"),
+    ],
+}]}
+
+
+def test_error_counts():
+    frame = ResultFrame.from_result(RESULT)
+    assert frame.error_counts() == {"Insertion": 1, "Mispronunciation": 2, "Omission": 1}
+    assert count_errors(RESULT) == (frame.error_counts(), 6)
+
+
+def test_error_counts_without_errors():
+    frame = ResultFrame.from_result({"NBest": [{"Words": [word("ok", "None"), word("fine")]}]})
+    assert frame.error_counts() == {}
+    assert ResultFrame.from_result({"NBest": [{}]}).error_counts() == {}
+
+
+def test_columns():
+    frame = ResultFrame.from_result(RESULT)
+    assert len(frame) == 6
+    assert frame.scores["PronScore"] == 75 and frame.scores["FluencyScore"] is None
+    assert list(frame.error_type) == ["None", "Mispronunciation", "Omission", "Mispronunciation", "Insertion", "None"]
+    assert list(frame.has_error_type) == [True, True, True, True, True, False]
+    np.testing.assert_array_equal(frame.offset[:2], [0.0, 0.5])
+    assert np.isnan(frame.offset[2]) and np.isnan(frame.end[5])
+    np.testing.assert_array_equal(frame.end[:2], [0.2, 0.7])
+    # the waveform draws the words that were said
+    assert list(frame.spoken()) == [True, True, False, True, True, False]
+
+
+def test_phonemes_of_words():
+    frame = ResultFrame.from_result(RESULT)
+    assert list(frame.phoneme[frame.phonemes_of(0)]) == ["ð", "ə"]
+    assert list(frame.phoneme[frame.phonemes_of(1)]) == ["k"]
+    assert list(frame.phoneme[frame.phonemes_of(2)]) == []
+    assert list(frame.phoneme[frame.phonemes_of(4)]) == ["ʌ", "m"]
+    assert list(frame.phoneme[frame.phonemes_of(5)]) == []
+
+
+def test_as_frame_accepts_both():
+    frame = ResultFrame.from_result(RESULT)
+    assert as_frame(frame) is frame
+    assert len(as_frame(RESULT)) == 6
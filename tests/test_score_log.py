@@ -0,0 +1,112 @@
+import os
+import json
+from collections import OrderedDict
+
+import score_log
+from score_log import get_score_log, ScoreLog, empty_errors, LOG_FILE, SNAPSHOT_FILE, LEGACY_SCORES_FILE, LEGACY_ERRORS_FILE
+
+MISPRONUNCIATION = "発音ミス (Mispronunciation)"
+OMISSION = "省略 (Omission)"
+
+
+def scores(value):
+    return {'AccuracyScore': value, 'FluencyScore': value, 'CompletenessScore': value,
+            'ProsodyScore': value, 'PronScore': value}
+
+
+def scores_history(values):
+    return {score_type: list(values) for score_type in scores(0)}
+
+
+def errors(**words):
+    data = empty_errors()
+    for error_type, error_words in words.items():
+        data[error_type] = {'count': len(error_words), 'words': error_words}
+    return data
+
+
+def test_replay_builds_scores_current_and_totals(tmp_path):
+    log = ScoreLog(str(tmp_path))
+    log.append(0, scores(70), errors(**{MISPRONUNCIATION: ["cat", "dog"]}))
+    log.append(0, scores(80), errors(**{OMISSION: ["the"]}))
+    log.append(1, scores(90), errors())
+    lessons = ScoreLog(str(tmp_path)).state()
+    assert lessons[0]['scores']['PronScore'] == [70, 80]
+    assert lessons[0]['current'][OMISSION] == {'count': 1, 'words': ["the"]}
+    assert lessons[0]['current'][MISPRONUNCIATION]['count'] == 0
+    assert lessons[0]['total'][MISPRONUNCIATION] == {'count': 2, 'words': ["cat", "dog"]}
+    assert lessons[0]['total'][OMISSION]['count'] == 1
+    assert lessons[1]['scores']['AccuracyScore'] == [90]
+    log.close()
+
+
+def test_snapshot_plus_tail_equals_full_replay(tmp_path):
+    log = ScoreLog(str(tmp_path))
+    log.append(0, scores(60), errors(**{MISPRONUNCIATION: ["a"]}))
+    compacted = log.state(compact=True)
+    assert (tmp_path / SNAPSHOT_FILE).exists()
+    log.append(0, scores(65), errors(**{MISPRONUNCIATION: ["b"]}))
+    log.close()
+    lessons = ScoreLog(str(tmp_path)).state()
+    assert compacted[0]['scores']['PronScore'] == [60]
+    assert lessons[0]['scores']['PronScore'] == [60, 65]
+    assert lessons[0]['total'][MISPRONUNCIATION] == {'count': 2, 'words': ["a", "b"]}
+    # replaying the log alone gives the same state
+    (tmp_path / SNAPSHOT_FILE).unlink()
+    assert ScoreLog(str(tmp_path)).state() == lessons
+
+
+def test_partial_last_line_is_ignored(tmp_path):
+    log = ScoreLog(str(tmp_path))
+    log.append(2, scores(50), errors())
+    log.close()
+    with open(tmp_path / LOG_FILE, 'ab') as f:
+        f.write(b'{"lesson":2,"scores":')
+    assert ScoreLog(str(tmp_path)).state()[2]['scores']['PronScore'] == [50]
+
+
+def test_legacy_files_seed_the_state(tmp_path):
+    (tmp_path / LEGACY_SCORES_FILE).write_text(json.dumps({"lesson_3": scores_history([40])}), encoding='utf-8')
+    (tmp_path / LEGACY_ERRORS_FILE).write_text(json.dumps({"lesson_3": {
+        'current': errors(**{OMISSION: ["x"]}), 'total': errors(**{OMISSION: ["x"]})}}), encoding='utf-8')
+    log = ScoreLog(str(tmp_path))
+    log.append(3, scores(45), errors())
+    lessons = log.state()
+    assert lessons[3]['scores']['PronScore'] == [40, 45]
+    assert lessons[3]['total'][OMISSION]['count'] == 1
+    log.close()
+
+
+class FakeUser:
+    def __init__(self, root, name, day):
+        self.user_path = os.path.join(str(root), name, "")
+        self.today_path = os.path.join(self.user_path, "practice_history", day, "")
+
+
+def test_get_score_log_closes_the_previous_day(tmp_path):
+    log = get_score_log(FakeUser(tmp_path, "alice", "2024-01-01"))
+    log.append(0, scores(70), errors())
+    assert log._fd is not None
+    next_day = get_score_log(FakeUser(tmp_path, "alice", "2024-01-02"))
+    assert next_day is not log
+    assert log._fd is None
+    assert get_score_log(FakeUser(tmp_path, "alice", "2024-01-02")) is next_day
+    next_day.close()
+
+
+def test_get_score_log_evicts_least_recently_used(tmp_path, monkeypatch):
+    monkeypatch.setattr(score_log, "MAX_OPEN_LOGS", 2)
+    monkeypatch.setattr(score_log, "_logs", OrderedDict())
+    first = get_score_log(FakeUser(tmp_path, "a", "2024-01-01"))
+    second = get_score_log(FakeUser(tmp_path, "b", "2024-01-01"))
+    for log in (first, second):
+        log.append(0, scores(70), errors())
+    get_score_log(FakeUser(tmp_path, "a", "2024-01-01"))
+    third = get_score_log(FakeUser(tmp_path, "c", "2024-01-01"))
+    assert list(score_log._logs) == [FakeUser(tmp_path, n, "").user_path for n in ("a", "c")]
+    assert second._fd is None and first._fd is not None
+    # an evicted log is still readable and reopens its file on the next append
+    second.append(0, scores(80), errors())
+    assert second.state()[0]['scores']['PronScore'] == [70, 80]
+    for log in (first, second, third):
+        log.close()
@@ -0,0 +1,69 @@
+from segment_merge import merge_segment_results, _reference_words
+
+
+def word(text, offset, accuracy=90, error_type="None"):
+    return {
+        "Word": text,
+        "Offset": offset,
+        "Duration": 1000,
+        "PronunciationAssessment": {"AccuracyScore": accuracy, "ErrorType": error_type},
+        "Phonemes": [{"Phoneme": text[0], "Offset": offset, "Duration": 500}],
+    }
+
+
+def segment(offset, duration, words, fluency=80, prosody=70):
+    return {
+        "Offset": offset,
+        "Duration": duration,
+        "DisplayText": " ".join(w["Word"] for w in words),
+        "NBest": [{
+            "PronunciationAssessment": {"FluencyScore": fluency, "ProsodyScore": prosody},
+            "Words": words,
+        }],
+    }
+
+
+def merged_words(result):
+    return [(w["Word"], w["PronunciationAssessment"]["ErrorType"]) for w in result["NBest"][0]["Words"]]
+
+
+def test_single_segment_is_returned_as_is():
+    only = segment(0, 5000, [word("hello", 0)])
+    assert merge_segment_results([only], "hello") is only
+
+
+def test_reference_words_are_split_like_azure():
+    assert _reference_words("\"Well-known\" café, isn't it? — 42!") == ["well-known", "café", "isn't", "it", "42"]
+
+
+def test_segments_are_merged_against_the_whole_reference():
+    segments = [
+        segment(0, 4000, [word("Hello", 1000), word("world", 2000, error_type="Omission")], fluency=100),
+        segment(5000, 2000, [word("again", 5000, accuracy=60)], fluency=50, prosody=40),
+    ]
+    result = merge_segment_results(segments, "Hello there, again!")
+    # per-segment omissions are dropped and recomputed against the full text
+    assert merged_words(result) == [("Hello", "None"), ("there", "Omission"), ("again", "None")]
+    scores = result["NBest"][0]["PronunciationAssessment"]
+    assert scores["AccuracyScore"] == 50.0  # (90 + 0 + 60) / 3
+    assert scores["CompletenessScore"] == round(200 / 3, 1)
+    # fluency and prosody are weighted by segment duration
+    assert scores["FluencyScore"] == round((100 * 4000 + 50 * 2000) / 6000, 1)
+    assert scores["ProsodyScore"] == 60.0
+    assert result["Offset"] == 0 and result["Duration"] == 7000
+    assert result["DisplayText"] == "Hello world again"
+
+
+def test_insertions_are_marked_and_offsets_stay_monotonic():
+    segments = [
+        segment(0, 3000, [word("one", 1000)]),
+        # a segment whose offsets restarted from zero
+        segment(0, 3000, [word("extra", 500), word("two", 1500)]),
+    ]
+    result = merge_segment_results(segments, "one two")
+    assert merged_words(result) == [("one", "None"), ("extra", "Insertion"), ("two", "None")]
+    offsets = [w["Offset"] for w in result["NBest"][0]["Words"]]
+    assert offsets == sorted(offsets) and offsets[1] == 3500
+    assert result["NBest"][0]["Words"][1]["Phonemes"][0]["Offset"] == 3500
+    # the inserted word does not count towards accuracy or completeness
+    assert result["NBest"][0]["PronunciationAssessment"]["CompletenessScore"] == 100.0
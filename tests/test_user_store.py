@@ -0,0 +1,133 @@
+import json
+import threading
+from datetime import date, datetime
+import pytest
+from user_store import JsonUserStore, SqliteUserStore, migrate_json_to_sqlite, export_sqlite_to_json
+
+
+def result(pron_score, errors=()):
+    words = [{"Word": "ok", "PronunciationAssessment": {"ErrorType": "None"}}]
+    words += [{"Word": word, "PronunciationAssessment": {"ErrorType": error_type}} for word, error_type in errors]
+    return {"NBest": [{
+        "PronunciationAssessment": {"AccuracyScore": 80, "FluencyScore": 70, "CompletenessScore": 100,
+                                    "ProsodyScore": 60, "PronScore": pron_score},
+        "Words": words,
+    }]}
+
+
+HISTORY = [
+    ("2024-05-01", "1", "2024-05-01_10-00-00", result(70, [("cat", "Mispronunciation")])),
+    ("2024-05-01", "2", "2024-05-01_11-30-00", result(75)),
+    ("2024-05-03", "1", "2024-05-03_09-15-00", result(85, [("dog", "Omission"), ("cat", "Mispronunciation")])),
+]
+
+
+@pytest.fixture
+def database(tmp_path):
+    """A users_info.json with one user and that user's saved results."""
+    users_info = tmp_path / "all_users" / "users_info.json"
+    users_info.parent.mkdir()
+    users_info.write_text(json.dumps({"alice": {"password": "hash-a", "history": []}}))
+    for day, lesson, stamp, data in HISTORY:
+        day_path = tmp_path / "alice" / "practice_history" / day
+        day_path.mkdir(parents=True, exist_ok=True)
+        (day_path / f"{lesson}-{stamp}.json").write_text(json.dumps(data))
+    (tmp_path / "alice" / "practice_history" / "2024-05-01" / "notes.json").write_text("{}")
+    return tmp_path, str(users_info)
+
+
+def json_store(database):
+    root, users_info = database
+    return JsonUserStore(users_info, str(root))
+
+
+def sqlite_store(database):
+    root, users_info = database
+    store = SqliteUserStore(str(root / "users.db"))
+    migrate_json_to_sqlite(store, users_info, str(root))
+    return store
+
+
+@pytest.fixture(params=[json_store, sqlite_store], ids=["json", "sqlite"])
+def store(request, database):
+    return request.param(database)
+
+
+def test_users(store):
+    assert store.get_user("alice") == {"name": "alice", "password": "hash-a"}
+    assert store.get_user("bob") is None
+    assert store.add_user("bob", "hash-b")
+    assert not store.add_user("bob", "other")
+    assert store.get_user("bob")["password"] == "hash-b"
+
+
+def test_attempts_and_filters(store):
+    attempts = store.attempts("alice")
+    assert [(a["lesson"], a["recorded_at"], a["pron_score"]) for a in attempts] == [
+        ("1", datetime(2024, 5, 1, 10), 70),
+        ("2", datetime(2024, 5, 1, 11, 30), 75),
+        ("1", datetime(2024, 5, 3, 9, 15), 85),
+    ]
+    assert [a["pron_score"] for a in store.attempts("alice", lesson="1")] == [70, 85]
+    assert [a["pron_score"] for a in store.attempts("alice", start_date=date(2024, 5, 2))] == [85]
+    assert [a["pron_score"] for a in store.attempts("alice", end_date=date(2024, 5, 1))] == [70, 75]
+    assert store.attempts("nobody") == []
+
+
+def test_error_counts(store):
+    assert store.error_counts("alice") == {"Mispronunciation": 2, "Omission": 1}
+    assert store.error_counts("alice", end_date=date(2024, 5, 2)) == {"Mispronunciation": 1}
+
+
+def test_json_store_sees_users_added_by_another_process(database):
+    first, second = json_store(database), json_store(database)
+    assert first.get_user("carol") is None
+    assert second.add_user("carol", "hash-c")
+    assert first.get_user("carol")["password"] == "hash-c"
+    assert first.get_user("alice") is not None
+
+
+def test_migration_is_idempotent(database):
+    root, users_info = database
+    store = SqliteUserStore(str(root / "users.db"))
+    assert migrate_json_to_sqlite(store, users_info, str(root)) == (1, 3)
+    assert migrate_json_to_sqlite(store, users_info, str(root)) == (0, 0)
+    assert len(store.attempts("alice")) == 3
+
+
+def test_migration_without_history(database):
+    root, users_info = database
+    store = SqliteUserStore(str(root / "users.db"))
+    assert not store.has_users()
+    assert migrate_json_to_sqlite(store, users_info, str(root), with_history=False) == (1, 0)
+    assert store.has_users() and store.attempts("alice") == []
+
+
+def test_sqlite_store_is_shared_by_threads(database):
+    root, _ = database
+    store = SqliteUserStore(str(root / "users.db"))
+    store.add_user("alice", "hash-a")
+    threads = [threading.Thread(target=store.record_attempt,
+                                args=("alice", "1", datetime(2024, 6, 1, 0, 0, i), f"r{i}.json", result(i)))
+               for i in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(store.attempts("alice")) == 16
+    # the same result file is recorded once
+    assert store.record_attempt("alice", "1", datetime(2024, 6, 1), "r0.json", result(0)) is None
+    store.close()
+
+
+def test_fallback_to_json_keeps_users_registered_in_sqlite(database):
+    root, users_info = database
+    store = sqlite_store(database)
+    store.add_user("dave", "hash-d")
+    json_users = JsonUserStore(users_info, str(root))
+    assert export_sqlite_to_json(store, json_users) == 1
+    assert export_sqlite_to_json(store, json_users) == 0
+    reloaded = JsonUserStore(users_info, str(root))
+    assert reloaded.get_user("dave") == {"name": "dave", "password": "hash-d"}
+    assert reloaded.get_user("alice")["password"] == "hash-a"
+    assert [user["name"] for user in store.users()] == ["alice", "dave"]
@@ -0,0 +1,86 @@
+import itertools
+import threading
+import time
+import pytest
+from assessment_core import WarmPool
+
+
+class Factory:
+    """Fake _new_slot: numbered items, failing while `failures` is positive."""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.counter = itertools.count()
+        self.discarded = []
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            if self.failures > 0:
+                self.failures -= 1
+                raise ConnectionError("speech service unreachable")
+            return next(self.counter)
+
+    def discard(self, item):
+        self.discarded.append(item)
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def test_leased_items_are_discarded_and_replaced():
+    factory = Factory()
+    pool = WarmPool(factory, 2, discard=factory.discard)
+    assert pool.ready == 2
+    with pool.lease() as item:
+        assert item in (0, 1)
+    assert factory.discarded == [item]
+    wait_until(lambda: pool.ready == 2)
+    pool.close()
+
+
+def test_failing_factory_is_retried_with_backoff():
+    factory = Factory(failures=4)
+    pool = WarmPool(factory, 2, retry_delay=0.01, max_retry_delay=0.02)
+    # both initial builds failed, the background retries refill the pool
+    wait_until(lambda: pool.ready == 2)
+    pool.close()
+
+
+def test_empty_pool_builds_on_demand_instead_of_blocking():
+    factory = Factory(failures=10 ** 6)
+    pool = WarmPool(factory, 1, wait_seconds=0.05, retry_delay=10)
+    # the factory still fails: the caller gets the error, not a hang
+    with pytest.raises(ConnectionError):
+        with pool.lease():
+            pass
+    factory.failures = 0
+    with pool.lease() as item:
+        assert item == 0
+    pool.close()
+
+
+def test_on_demand_items_do_not_grow_the_pool():
+    factory = Factory()
+    pool = WarmPool(factory, 1, discard=factory.discard, wait_seconds=0.05)
+    with pool.lease():
+        with pool.lease() as extra:
+            pass
+    wait_until(lambda: pool.ready == 1)
+    time.sleep(0.05)
+    assert pool.ready == 1 and extra in factory.discarded
+    pool.close()
+
+
+def test_error_inside_a_lease_still_replaces_the_item():
+    factory = Factory()
+    pool = WarmPool(factory, 1, discard=factory.discard)
+    with pytest.raises(RuntimeError):
+        with pool.lease():
+            raise RuntimeError("recognition canceled")
+    wait_until(lambda: pool.ready == 1)
+    pool.close()
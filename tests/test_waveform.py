@@ -0,0 +1,60 @@
+import json
+import numpy as np
+from result_frame import as_frame
+from waveform import min_max_envelope, waveform_data
+
+
+def test_envelope_keeps_every_peak():
+    y = np.random.default_rng(0).uniform(-1, 1, 10007).astype(np.float32)
+    lows, highs, bin_size = min_max_envelope(y, 100)
+    assert bin_size == 101
+    assert len(lows) == len(highs) == 100
+    assert lows.min() == y.min() and highs.max() == y.max()
+    np.testing.assert_array_equal(highs[:-1], y[:99 * bin_size].reshape(99, bin_size).max(axis=1))
+    np.testing.assert_array_equal(lows[-1], y[99 * bin_size:].min())
+
+
+def test_short_signal_is_not_binned():
+    y = np.array([0.5, -0.25, 0.125], dtype=np.float32)
+    lows, highs, bin_size = min_max_envelope(y, 1200)
+    assert bin_size == 1
+    np.testing.assert_array_equal(lows, y)
+    np.testing.assert_array_equal(highs, y)
+
+
+def test_padding_repeats_the_last_sample():
+    lows, highs, bin_size = min_max_envelope(np.array([1.0, 2.0, 3.0, 4.0, -5.0]), 2)
+    assert bin_size == 3
+    np.testing.assert_array_equal(lows, [1.0, -5.0])
+    np.testing.assert_array_equal(highs, [3.0, 4.0])
+
+
+def assessed_word(text, error_type, accuracy, offset_s, phonemes=()):
+    ticks = int(offset_s * 10_000_000)
+    return {"Word": text, "Offset": ticks, "Duration": 4_000_000,
+            "PronunciationAssessment": {"ErrorType": error_type, "AccuracyScore": accuracy},
+            "Phonemes": [{"Phoneme": p, "Offset": ticks, "Duration": 2_000_000,
+                          "PronunciationAssessment": {"AccuracyScore": 70}} for p in phonemes]}
+
+
+def test_waveform_data_is_compact_and_aligned():
+    sr = 16000
+    y = np.random.default_rng(1).uniform(-0.6, 0.6, sr * 2).astype(np.float32)
+    result = {"NBest": [{"Words": [
+        assessed_word("hello", "None", 90, 0.1, ["h", "ə"]),
+        assessed_word("there", "Omission", 0, 0.0),
+        assessed_word("world", "Mispronunciation", 40, 1.0, ["w"]),
+    ]}]}
+    data = waveform_data(y, sr, as_frame(result), n_points=400)
+    assert data["duration"] == 2.0
+    assert len(data["lo"]) == len(data["hi"]) == 400
+    assert data["step"] * 400 == 2.0
+    assert min(data["lo"]) == round(float(y.min()), 2)
+    # no float32 noise such as 0.5899999737739563
+    assert all(len(repr(v)) <= 5 for v in data["lo"] + data["hi"])
+    assert data["words"] == {"word": ["hello", "world"], "start": [0.1, 1.0], "end": [0.5, 1.4],
+                             "score": [90.0, 40.0], "error": ["None", "Mispronunciation"]}
+    assert data["phonemes"]["phoneme"] == ["h", "ə", "w"]
+    assert data["phonemes"]["word"] == ["hello", "hello", "world"]
+    assert data["phonemes"]["end"] == [0.3, 0.3, 1.2]
+    assert len(json.dumps(data)) < 6000